@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Benchmarks for libmelee that don't need dolphin or an ISO
+
+Run with the name of a benchmark, for example:
+    ./benchmark.py live --speed=0
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+import melee
+from melee.slippstream import EnetDisconnected
+from melee.slippstreamserver import SlippstreamServer
+from melee.pipeconsumer import PipeConsumer
+
+def bench_live(args):
+    """Stream an SLP file through SlippstreamClient -> Console.step"""
+    server = SlippstreamServer(args.slp, port=args.port, speed=args.speed)
+    server.start()
+    console = melee.Console(tmp_home_directory=False, slippi_port=args.port)
+    try:
+        if not console.connect():
+            print("Could not connect to the local Slippstream server")
+            return
+        frames = 0
+        start = time.perf_counter()
+        try:
+            while True:
+                console.step()
+                frames += 1
+        except EnetDisconnected:
+            pass
+        elapsed = time.perf_counter() - start
+        print(f"live: {frames} frames in {elapsed:.3f}s ({frames / elapsed:.1f} fps)")
+    finally:
+        console.stop()
+        server.shutdown()
+
+def bench_controller(args):
+    """Flush a Controller into a local pipe consumer, measuring throughput and latency"""
+    console = melee.Console(dolphin_home_path=tempfile.mkdtemp(prefix='libmelee_') + "/",
+                            tmp_home_directory=False)
+    controller = melee.Controller(console, 1, nonblocking=args.nonblocking)
+    consumer = PipeConsumer(console.get_dolphin_pipes_path(1))
+    consumer.start()
+    controller.connect()
+
+    flush_times = []
+    start = time.perf_counter()
+    for i in range(args.frames):
+        # Change a button and both sticks every frame, like a busy bot would
+        if i % 2:
+            controller.press_button(melee.Button.BUTTON_A)
+        else:
+            controller.release_button(melee.Button.BUTTON_A)
+        controller.tilt_analog(melee.Button.BUTTON_MAIN, (i % 20) / 20, .5)
+        controller.tilt_analog(melee.Button.BUTTON_C, .5, (i % 20) / 20)
+        flush_times.append(time.perf_counter())
+        controller.flush()
+    # Wait for any queued frames to go out, without flushing extra ones
+    controller.drain()
+    controller.disconnect()
+    stats = consumer.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"controller: {len(stats.flush_times)} flushes, {stats.commands} commands in {elapsed:.3f}s "
+          f"({len(stats.flush_times) / elapsed:.1f} flushes/s, {stats.commands / elapsed:.1f} commands/s)")
+    if len(stats.flush_times) == len(flush_times):
+        latencies = sorted(arrived - sent for sent, arrived in zip(flush_times, stats.flush_times))
+        print(f"flush latency: median {latencies[len(latencies) // 2] * 1e6:.1f}us, "
+              f"p99 {latencies[int(len(latencies) * .99)] * 1e6:.1f}us")
+    else:
+        print(f"flush latency: n/a ({controller.dropped_frames} frames dropped, "
+              f"{controller.coalesced_frames} coalesced)")
+
+def _decode_file(args, keep=False):
+    """Decode the whole SLP file, optionally keeping every gamestate. Returns (frames, kept)"""
+    console = melee.Console(is_dolphin=False, path=args.slp, allow_old_version=True,
+                            lean_state=args.lean_state)
+    console.connect()
+    frames, kept = 0, []
+    while True:
+        gamestate = console.step()
+        if gamestate is None:
+            return frames, kept
+        frames += 1
+        if keep:
+            kept.append(gamestate)
+
+def bench_state(args):
+    """Decode an SLP file into gamestates, measuring throughput and memory per frame"""
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        frames, _ = _decode_file(args)
+    elapsed = time.perf_counter() - start
+    frames *= args.repeat
+    print(f"state: {frames} frames in {elapsed:.3f}s ({frames / elapsed:.1f} fps)")
+
+    # Hold the whole replay in memory, like an offline dataset would
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    frames, kept = _decode_file(args, keep=True)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"memory: {held / 2**20:.1f} MiB for {len(kept)} frames held ({held / frames:.0f} bytes/frame)")
+
+BENCHMARKS = {
+    "live": bench_live,
+    "controller": bench_controller,
+    "state": bench_state,
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='libmelee benchmarks')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS), help='Which benchmark to run')
+    parser.add_argument('--slp', type=str, default="test_artifacts/test_game_1.slp",
+                        help='SLP file to replay')
+    parser.add_argument('--port', type=int, default=51460,
+                        help='UDP port for the local Slippstream server')
+    parser.add_argument('--speed', type=float, default=0,
+                        help='Replay speed as a multiple of real time. 0 for unlimited')
+    parser.add_argument('--frames', type=int, default=100000,
+                        help='Number of controller flushes to send')
+    parser.add_argument('--nonblocking', action='store_true',
+                        help='Use a nonblocking controller pipe')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='How many times to decode the SLP file for throughput')
+    parser.add_argument('--lean_state', action='store_true',
+                        help='Decode with Console(lean_state=True)')
+    ARGS = parser.parse_args()
+    BENCHMARKS[ARGS.benchmark](ARGS)
@@ -18,7 +18,6 @@ import configparser
 import csv
 import subprocess
 import platform
-import math
 import base64
 import numpy as np
 from pathlib import Path
@@ -26,11 +25,12 @@ import shutil
 import tempfile
 
 from melee import enums
-from melee.enums import Action
-from melee.gamestate import GameState, Projectile, PlayerState
+from melee.gamestate import GameState, Projectile, PlayerState, LeanPlayerState, LeanProjectile
 from melee.slippstream import SlippstreamClient, EventType, EVENT_TO_STAGE
 from melee.slpfilestreamer import SLPFileStreamer
-from melee import stages
+from melee.sharedstate import SharedStateWriter
+from melee.features import FeatureHistory
+from melee.pipeline import default_pipeline
 
 
 class SlippiVersionTooLow(Exception):
@@ -209,6 +209,10 @@ class Console:
                  use_exi_inputs=False,
                  enable_ffw=False,
                  dump_config: Optional[DumpConfig] = None,
+                 lean_state: bool = False,
+                 shared_state: bool = False,
+                 feature_history: int = 0,
+                 feature_schema=None,
                 ):
         """Create a Console object
 
@@ -258,6 +262,15 @@ class Console:
             enable_ffw (bool): Enable fast-forward mode. Useful for bot training. Must
                 have use_exi_inputs=True.
             dump_config (DumpConfig): Settings for video dumps.
+            lean_state (bool): Only decode the canonical copy of each value. The deprecated
+                duplicates (such as PlayerState.x and the ecb_* tuples) become views of
+                position and ecb instead of being stored every frame.
+            shared_state (bool): Also write every gamestate into a shared memory block
+                that other processes can read. See `shared_state` and melee.sharedstate
+            feature_history (int): Keep the feature vectors of this many recent frames,
+                stacked in `feature_history`. 0 to disable.
+            feature_schema (features.FeatureSchema): Layout of the feature_history vectors.
+                Defaults to features.DEFAULT_SCHEMA
         """
         self.logger = logger
         self.is_dolphin = is_dolphin
@@ -326,6 +339,15 @@ class Console:
         self._prev_gamestate = GameState()
         # Half-completed gamestate not yet ready to add to the list
         self._temp_gamestate = None
+        self._lean_state = lean_state
+        self._playerstate_class = LeanPlayerState if lean_state else PlayerState
+        self._projectile_class = LeanProjectile if lean_state else Projectile
+        self.shared_state = SharedStateWriter() if shared_state else None
+        """(sharedstate.SharedStateWriter): The shared memory block gamestates are written to,
+                if enabled. Give `shared_state.name` to a SharedStateReader in other processes"""
+        self.feature_history = FeatureHistory(feature_history, feature_schema) if feature_history else None
+        """(features.FeatureHistory): Feature vectors of the last few frames, if enabled.
+                `feature_history.stacked` is a (history, features) view, oldest first"""
         self._process = None
         if self.is_dolphin:
             self._slippstream = SlippstreamClient(self.slippi_address, self.slippi_port)
@@ -357,6 +379,10 @@ class Console:
                 if line["zeroindex"] == "True":
                     self.zero_indices[int(line["character"])].add(int(line["action"]))
 
+        self.pipeline = default_pipeline(self.zero_indices)
+        """(pipeline.FeaturePipeline): Derived features computed on each gamestate after it's
+                decoded. Disable the ones you don't use, or register your own"""
+
         # Read the character data csv
         self.characterdata = dict()
         with open(path + "/characterdata.csv") as csvfile:
@@ -466,6 +492,10 @@ class Console:
             shutil.rmtree(self.temp_dir)
             self.temp_dir = None
 
+        if self.shared_state is not None:
+            self.shared_state.close()
+            self.shared_state = None
+
     def _setup_home_directory(self,):
         self._setup_dolphin_ini()
 
@@ -599,6 +629,9 @@ class Console:
             if not os.path.exists(pipes_path):
                 os.mkfifo(pipes_path)
 
+        # A fresh home directory won't have a Config dir yet
+        os.makedirs(self._get_dolphin_config_path(), exist_ok=True)
+
         #Read in dolphin's controller config file
         controller_config_path = os.path.join(self._get_dolphin_config_path(), "GCPadNew.ini")
         config = configparser.ConfigParser()
@@ -652,12 +685,36 @@ class Console:
         dolphin_config_path = os.path.join(self._get_dolphin_config_path(), "Dolphin.ini")
         config = configparser.ConfigParser()
         config.read(dolphin_config_path)
+        if not config.has_section("Core"):
+            config.add_section("Core")
         # Indexed at 0. "6" means standard controller, "12" means GCN Adapter
         #  The enum is scoped to the proper value, here
         config.set("Core", 'SIDevice'+str(port-1), controllertype.value)
         with open(dolphin_config_path, 'w') as dolphinfile:
             config.write(dolphinfile)
 
+    def apply_actions(self, ports, actions):
+        """Set the state of several controllers at once from an array of actions
+
+        The conversion is done for the whole batch at once. Inputs are sent on
+        the next step(), in a single write per controller.
+
+        Args:
+            ports (list of ints): Controller port for each row of actions
+            actions (np.ndarray): Either an array of shape (len(ports), controller.ACTION_SIZE)
+                of action vectors, or an array of len(ports) indices into each
+                controller's action table. See Controller.apply(). Indices may be floats,
+                (from a model's output, say) as long as they are whole numbers.
+                Only the L shoulder's analog press is part of an action vector
+        """
+        from melee.controller import apply_actions  # avoid circular import
+        controllers = {controller.port: controller for controller in self.controllers}
+        try:
+            batch = [controllers[port] for port in ports]
+        except KeyError as error:
+            raise ValueError(f"No controller connected on port {error.args[0]}") from None
+        apply_actions(batch, actions)
+
     def step(self):
         """ 'step' to the next state of the game and flushes all controllers
 
@@ -702,8 +759,8 @@ class Console:
 
         gamestate = self._temp_gamestate
         self._temp_gamestate = None
-        self.__fixframeindexing(gamestate)
-        self.__fixiasa(gamestate)
+        self.pipeline.run(gamestate, self._prev_gamestate)
+        self._prev_gamestate = gamestate
         # Insert some metadata into the gamestate
         gamestate.playedOn = self._slippstream.playedOn
         gamestate.startAt = self._slippstream.timestamp
@@ -725,6 +782,11 @@ class Console:
           if i in self._connect_codes:
             player.connectCode = self._connect_codes[i]
 
+        if self.shared_state is not None:
+            self.shared_state.write(gamestate)
+        if self.feature_history is not None:
+            self.feature_history.push(gamestate)
+
         # Start the processing timer now that we're done reading messages
         self._frametimestamp = time.time()
         return gamestate
@@ -792,7 +854,6 @@ class Console:
                 event_bytes = event_bytes[event_size:]
 
             elif event_type == EventType.FRAME_BOOKEND:
-                self.__frame_bookend(gamestate, event_bytes)
                 event_bytes = event_bytes[event_size:]
                 # If this is an old frame, then don't return it.
                 if gamestate.frame <= self._frame and self.skip_rollback_frames:
@@ -868,25 +929,25 @@ class Console:
         controller_port = np.ndarray((1,), ">B", event_bytes, 0x5)[0] + 1
 
         if controller_port not in gamestate.players:
-            gamestate.players[controller_port] = PlayerState()
+            gamestate.players[controller_port] = self._playerstate_class()
         playerstate = gamestate.players[controller_port]
 
         # Is this Nana?
         if np.ndarray((1,), ">B", event_bytes, 0x6)[0] == 1:
-            playerstate.nana = PlayerState()
+            if playerstate.nana is None:
+                playerstate.nana = self._playerstate_class()
             playerstate = playerstate.nana
 
         playerstate.costume = self._costumes[controller_port-1]
         playerstate.cpu_level = self._cpu_level[controller_port-1]
         playerstate.team_id = self._team_id[controller_port-1]
 
-        main_x = (np.ndarray((1,), ">f", event_bytes, 0x19)[0] / 2) + 0.5
-        main_y = (np.ndarray((1,), ">f", event_bytes, 0x1D)[0] / 2) + 0.5
-        playerstate.controller_state.main_stick = (main_x, main_y)
+        controller_state = playerstate.controller_state
+        controller_state.main_x = (np.ndarray((1,), ">f", event_bytes, 0x19)[0] / 2) + 0.5
+        controller_state.main_y = (np.ndarray((1,), ">f", event_bytes, 0x1D)[0] / 2) + 0.5
 
-        c_x = (np.ndarray((1,), ">f", event_bytes, 0x21)[0] / 2) + 0.5
-        c_y = (np.ndarray((1,), ">f", event_bytes, 0x25)[0] / 2) + 0.5
-        playerstate.controller_state.c_stick = (c_x, c_y)
+        controller_state.c_x = (np.ndarray((1,), ">f", event_bytes, 0x21)[0] / 2) + 0.5
+        controller_state.c_y = (np.ndarray((1,), ">f", event_bytes, 0x25)[0] / 2) + 0.5
 
         raw_main_x = 0  # Added in 1.2.0
         raw_main_y = 0  # Added in 3.15.0
@@ -898,26 +959,17 @@ class Console:
             raw_main_y = int(np.ndarray((1,), ">b", event_bytes, 0x40)[0])
         except TypeError:
             pass
-        playerstate.controller_state.raw_main_stick = (raw_main_x, raw_main_y)
+        controller_state.raw_main_x = raw_main_x
+        controller_state.raw_main_y = raw_main_y
 
         # The game interprets both shoulders together, so the processed value will always be the same
         trigger = (np.ndarray((1,), ">f", event_bytes, 0x29)[0])
-        playerstate.controller_state.l_shoulder = trigger
-        playerstate.controller_state.r_shoulder = trigger
+        controller_state.l_shoulder = trigger
+        controller_state.r_shoulder = trigger
 
+        # Slippi's button bits use the same layout as ControllerState.buttons (see controller.BUTTON_BITS)
         buttonbits = np.ndarray((1,), ">H", event_bytes, 0x31)[0]
-        playerstate.controller_state.button[enums.Button.BUTTON_A] = bool(int(buttonbits) & 0x0100)
-        playerstate.controller_state.button[enums.Button.BUTTON_B] = bool(int(buttonbits) & 0x0200)
-        playerstate.controller_state.button[enums.Button.BUTTON_X] = bool(int(buttonbits) & 0x0400)
-        playerstate.controller_state.button[enums.Button.BUTTON_Y] = bool(int(buttonbits) & 0x0800)
-        playerstate.controller_state.button[enums.Button.BUTTON_START] = bool(int(buttonbits) & 0x1000)
-        playerstate.controller_state.button[enums.Button.BUTTON_Z] = bool(int(buttonbits) & 0x0010)
-        playerstate.controller_state.button[enums.Button.BUTTON_R] = bool(int(buttonbits) & 0x0020)
-        playerstate.controller_state.button[enums.Button.BUTTON_L] = bool(int(buttonbits) & 0x0040)
-        playerstate.controller_state.button[enums.Button.BUTTON_D_LEFT] = bool(int(buttonbits) & 0x0001)
-        playerstate.controller_state.button[enums.Button.BUTTON_D_RIGHT] = bool(int(buttonbits) & 0x0002)
-        playerstate.controller_state.button[enums.Button.BUTTON_D_DOWN] = bool(int(buttonbits) & 0x0004)
-        playerstate.controller_state.button[enums.Button.BUTTON_D_UP] = bool(int(buttonbits) & 0x0008)
+        controller_state.buttons = int(buttonbits) & 0x1F7F
         if self._use_manual_bookends:
             self._frame = gamestate.frame
 
@@ -928,19 +980,21 @@ class Console:
         controller_port = np.ndarray((1,), ">B", event_bytes, 0x5)[0] + 1
 
         if controller_port not in gamestate.players:
-            gamestate.players[controller_port] = PlayerState()
+            gamestate.players[controller_port] = self._playerstate_class()
         playerstate = gamestate.players[controller_port]
 
         # Is this Nana?
         if np.ndarray((1,), ">B", event_bytes, 0x6)[0] == 1:
-            playerstate.nana = PlayerState()
+            if playerstate.nana is None:
+                playerstate.nana = self._playerstate_class()
             playerstate = playerstate.nana
 
         playerstate.position.x = np.ndarray((1,), ">f", event_bytes, 0xa)[0]
         playerstate.position.y = np.ndarray((1,), ">f", event_bytes, 0xe)[0]
 
-        playerstate.x = playerstate.position.x
-        playerstate.y = playerstate.position.y
+        if not self._lean_state:
+            playerstate.x = playerstate.position.x
+            playerstate.y = playerstate.position.y
 
         playerstate.character = enums.Character(np.ndarray((1,), ">B", event_bytes, 0x7)[0])
         try:
@@ -1012,26 +1066,6 @@ class Console:
         except TypeError:
             playerstate.hitlag_left = 0
 
-        # The pre-warning occurs when we first start a dash dance.
-        if controller_port in self._prev_gamestate.players:
-            if playerstate.action == Action.DASHING and \
-                    self._prev_gamestate.players[controller_port].action not in [Action.DASHING, Action.TURNING]:
-                playerstate.moonwalkwarning = True
-
-        # Take off the warning if the player does an action other than dashing
-        if playerstate.action != Action.DASHING:
-            playerstate.moonwalkwarning = False
-
-        # "off_stage" helper
-        try:
-            if (abs(playerstate.position.x) > stages.EDGE_GROUND_POSITION[gamestate.stage] or \
-                    playerstate.y < -6) and not playerstate.on_ground:
-                playerstate.off_stage = True
-            else:
-                playerstate.off_stage = False
-        except KeyError:
-            playerstate.off_stage = False
-
         # ECB top edge, x
         ecb_top_x = 0
         ecb_top_y = 0
@@ -1046,7 +1080,8 @@ class Console:
             ecb_top_y = 0
         playerstate.ecb.top.x = ecb_top_x
         playerstate.ecb.top.y = ecb_top_y
-        playerstate.ecb_top = (ecb_top_x, ecb_top_y)
+        if not self._lean_state:
+            playerstate.ecb_top = (ecb_top_x, ecb_top_y)
 
         # ECB bottom edge, x coord
         ecb_bot_x = 0
@@ -1062,7 +1097,8 @@ class Console:
             ecb_bot_y = 0
         playerstate.ecb.bottom.x = ecb_bot_x
         playerstate.ecb.bottom.y = ecb_bot_y
-        playerstate.ecb_bottom = (ecb_bot_x, ecb_bot_y)
+        if not self._lean_state:
+            playerstate.ecb_bottom = (ecb_bot_x, ecb_bot_y)
 
         # ECB left edge, x coord
         ecb_left_x = 0
@@ -1078,7 +1114,8 @@ class Console:
             ecb_left_y = 0
         playerstate.ecb.left.x = ecb_left_x
         playerstate.ecb.left.y = ecb_left_y
-        playerstate.ecb_left = (ecb_left_x, ecb_left_y)
+        if not self._lean_state:
+            playerstate.ecb_left = (ecb_left_x, ecb_left_y)
 
         # ECB right edge, x coord
         ecb_right_x = 0
@@ -1094,36 +1131,23 @@ class Console:
             ecb_right_y = 0
         playerstate.ecb.right.x = ecb_right_x
         playerstate.ecb.right.y = ecb_right_y
-        playerstate.ecb_right = (ecb_right_x, ecb_right_y)
+        if not self._lean_state:
+            playerstate.ecb_right = (ecb_right_x, ecb_right_y)
         if self._use_manual_bookends:
             self._frame = gamestate.frame
 
-    def __frame_bookend(self, gamestate, event_bytes):
-        self._prev_gamestate = gamestate
-        # Calculate helper distance variable
-        #   This is a bit kludgey.... :/
-        i = 0
-        player_one_x, player_one_y, player_two_x, player_two_y = 0, 0, 0, 0
-        for _, player_state in gamestate.players.items():
-            if i == 0:
-                player_one_x, player_one_y = player_state.position.x, player_state.position.y
-            if i == 1:
-                player_two_x, player_two_y = player_state.position.x, player_state.position.y
-            i += 1
-        xdist = player_one_x - player_two_x
-        ydist = player_one_y - player_two_y
-        gamestate.distance = math.sqrt((xdist**2) + (ydist**2))
-
     def __item_update(self, gamestate, event_bytes):
-        projectile = Projectile()
+        projectile = self._projectile_class()
         projectile.position.x = np.ndarray((1,), ">f", event_bytes, 0x14)[0]
         projectile.position.y = np.ndarray((1,), ">f", event_bytes, 0x18)[0]
-        projectile.x = projectile.position.x
-        projectile.y = projectile.position.y
+        if not self._lean_state:
+            projectile.x = projectile.position.x
+            projectile.y = projectile.position.y
         projectile.speed.x = np.ndarray((1,), ">f", event_bytes, 0xc)[0]
         projectile.speed.y = np.ndarray((1,), ">f", event_bytes, 0x10)[0]
-        projectile.x_speed = projectile.speed.x
-        projectile.y_speed = projectile.speed.y
+        if not self._lean_state:
+            projectile.x_speed = projectile.speed.x
+            projectile.y_speed = projectile.speed.y
         try:
             projectile.owner = np.ndarray((1,), ">B", event_bytes, 0x2A)[0] + 1
             if projectile.owner > 4:
@@ -1164,16 +1188,16 @@ class Console:
         if scene == 0x02:
             gamestate.menu_state = enums.Menu.CHARACTER_SELECT
             # All the controller ports are active on this screen
-            gamestate.players[1] = PlayerState()
-            gamestate.players[2] = PlayerState()
-            gamestate.players[3] = PlayerState()
-            gamestate.players[4] = PlayerState()
+            gamestate.players[1] = self._playerstate_class()
+            gamestate.players[2] = self._playerstate_class()
+            gamestate.players[3] = self._playerstate_class()
+            gamestate.players[4] = self._playerstate_class()
         elif scene in [0x0102, 0x0108]:
             gamestate.menu_state = enums.Menu.STAGE_SELECT
-            gamestate.players[1] = PlayerState()
-            gamestate.players[2] = PlayerState()
-            gamestate.players[3] = PlayerState()
-            gamestate.players[4] = PlayerState()
+            gamestate.players[1] = self._playerstate_class()
+            gamestate.players[2] = self._playerstate_class()
+            gamestate.players[3] = self._playerstate_class()
+            gamestate.players[4] = self._playerstate_class()
 
         elif scene == 0x0202:
             gamestate.menu_state = enums.Menu.IN_GAME
@@ -1181,10 +1205,10 @@ class Console:
             gamestate.menu_state = enums.Menu.MAIN_MENU
         elif scene == 0x0008:
             gamestate.menu_state = enums.Menu.SLIPPI_ONLINE_CSS
-            gamestate.players[1] = PlayerState()
-            gamestate.players[2] = PlayerState()
-            gamestate.players[3] = PlayerState()
-            gamestate.players[4] = PlayerState()
+            gamestate.players[1] = self._playerstate_class()
+            gamestate.players[2] = self._playerstate_class()
+            gamestate.players[3] = self._playerstate_class()
+            gamestate.players[4] = self._playerstate_class()
         elif scene == 0x0000:
             gamestate.menu_state = enums.Menu.PRESS_START
         else:
@@ -1327,20 +1351,3 @@ class Console:
         for port in gamestate.players:
             if gamestate.players[port].controller_status != enums.ControllerStatus.CONTROLLER_CPU:
                 gamestate.players[port].cpu_level = 0
-
-    def __fixframeindexing(self, gamestate: GameState):
-        """ Melee's indexing of action frames is wildly inconsistent.
-            Here we adjust all of the frames to be indexed at 1 (so math is easier)"""
-        for _, player in gamestate.players.items():
-            if player.action.value in self.zero_indices[player.character.value]:
-                player.action_frame = player.action_frame + 1
-
-    def __fixiasa(self, gamestate: GameState):
-        """ The IASA flag doesn't set or reset for special attacks.
-            So let's just set IASA to False for all non-A attacks.
-        """
-        for _, player in gamestate.players.items():
-            # Luckily for us, all the A-attacks are in a contiguous place in the enums!
-            #   So we don't need to call them out one by one
-            if player.action.value < Action.NEUTRAL_ATTACK_1.value or player.action.value > Action.DAIR.value:
-                player.iasa = False
@@ -1,8 +1,12 @@
 """ Defines a Clontroller class that manages pressing buttons for your console"""
 
+import collections
+import os
 import platform
-import copy
+import select
 import time
+from collections.abc import MutableMapping
+import numpy as np
 try:
     import win32file
     import pywintypes
@@ -29,43 +33,180 @@ def fix_analog_trigger(x: float) -> float:
     return fudged / 255  # Desired input value in [0, 1]
 
 
+# Bit for each digital button in ControllerState.buttons. This matches the
+#   layout of the button bits in Slippi's pre-frame event
+BUTTON_BITS = {
+    enums.Button.BUTTON_A: 0x0100,
+    enums.Button.BUTTON_B: 0x0200,
+    enums.Button.BUTTON_X: 0x0400,
+    enums.Button.BUTTON_Y: 0x0800,
+    enums.Button.BUTTON_Z: 0x0010,
+    enums.Button.BUTTON_L: 0x0040,
+    enums.Button.BUTTON_R: 0x0020,
+    enums.Button.BUTTON_START: 0x1000,
+    enums.Button.BUTTON_D_UP: 0x0008,
+    enums.Button.BUTTON_D_DOWN: 0x0004,
+    enums.Button.BUTTON_D_LEFT: 0x0001,
+    enums.Button.BUTTON_D_RIGHT: 0x0002,
+}
+ALL_BUTTONS_MASK = sum(BUTTON_BITS.values())
+
+# Layout of an action vector for Controller.apply() and Console.apply_actions():
+#   One entry per button in ACTION_BUTTONS (pressed if > 0.5), then main stick x, y,
+#   C stick x, y (0 -> 1, 0.5 is neutral) and the analog shoulder (0 -> 1).
+#   The analog shoulder is L's. R's analog press can't be set from an action and stays 0,
+#   though the digital R button can still be pressed like any other button.
+ACTION_BUTTONS = tuple(BUTTON_BITS)
+ACTION_SIZE = len(ACTION_BUTTONS) + 5
+_ACTION_BUTTON_BITS = np.array([BUTTON_BITS[button] for button in ACTION_BUTTONS], dtype=np.int64)
+
+def fix_analog_sticks(x: np.ndarray) -> np.ndarray:
+    """Vectorized fix_analog_stick(), for arrays of stick values"""
+    raw = np.round((np.asarray(x, dtype=np.float64) - 0.5) * 160)
+    return ((raw + 0.1) / (127 * 2)) + 0.5
+
+def actions_to_states(actions, fix_analog_inputs: bool = True):
+    """Converts a batch of action vectors into ControllerStates
+
+    Args:
+        actions (np.ndarray): Array of shape (N, ACTION_SIZE). See ACTION_BUTTONS for the layout
+        fix_analog_inputs (bool): Remap the sticks the same way Controller.tilt_analog() does
+
+    Returns:
+        List of N ControllerState objects
+    """
+    actions = np.asarray(actions, dtype=np.float64)
+    if actions.ndim != 2 or actions.shape[1] != ACTION_SIZE:
+        raise ValueError(f"Expected actions of shape (N, {ACTION_SIZE}), got {actions.shape}")
+    buttons = ((actions[:, :len(ACTION_BUTTONS)] > 0.5) @ _ACTION_BUTTON_BITS).tolist()
+    sticks = actions[:, len(ACTION_BUTTONS):len(ACTION_BUTTONS)+4]
+    if fix_analog_inputs:
+        sticks = fix_analog_sticks(sticks)
+    sticks = sticks.tolist()
+    shoulders = actions[:, -1].tolist()
+
+    states = []
+    for i, (main_x, main_y, c_x, c_y) in enumerate(sticks):
+        state = ControllerState()
+        state.buttons = buttons[i]
+        state.main_x, state.main_y = main_x, main_y
+        state.c_x, state.c_y = c_x, c_y
+        state.l_shoulder = shoulders[i]
+        states.append(state)
+    return states
+
+class _ButtonView(MutableMapping):
+    """Dict-like view of a ControllerState's button bitmask, keyed by enums.Button"""
+    __slots__ = ('_state',)
+
+    def __init__(self, state):
+        self._state = state
+
+    def __getitem__(self, button):
+        return bool(self._state.buttons & BUTTON_BITS[button])
+
+    def __setitem__(self, button, pressed):
+        if pressed:
+            self._state.buttons |= BUTTON_BITS[button]
+        else:
+            self._state.buttons &= ~BUTTON_BITS[button]
+
+    def __delitem__(self, button):
+        raise TypeError("Buttons can't be removed from a controller")
+
+    def __iter__(self):
+        return iter(BUTTON_BITS)
+
+    def __len__(self):
+        return len(BUTTON_BITS)
+
 class ControllerState:
     """A snapshot of the state of a virtual controller"""
+    __slots__ = ('buttons', 'main_x', 'main_y', 'c_x', 'c_y', 'raw_main_x', 'raw_main_y',
+                 'l_shoulder', 'r_shoulder')
 
     def __init__(self):
-        __slots__ = ('button', 'main_stick', 'c_stick', 'l_shoulder', 'r_shoulder')
-        self.button = dict()
-        """(dict of enums.Button to bool): For the each Button as key, tells you if the button is pressed."""
         #Boolean buttons
-        self.button[enums.Button.BUTTON_A] = False
-        self.button[enums.Button.BUTTON_B] = False
-        self.button[enums.Button.BUTTON_X] = False
-        self.button[enums.Button.BUTTON_Y] = False
-        self.button[enums.Button.BUTTON_Z] = False
-        self.button[enums.Button.BUTTON_L] = False
-        self.button[enums.Button.BUTTON_R] = False
-        self.button[enums.Button.BUTTON_START] = False
-        self.button[enums.Button.BUTTON_D_UP] = False
-        self.button[enums.Button.BUTTON_D_DOWN] = False
-        self.button[enums.Button.BUTTON_D_LEFT] = False
-        self.button[enums.Button.BUTTON_D_RIGHT] = False
+        self.buttons = 0
+        """(int): Bitmask of the pressed buttons. See BUTTON_BITS for each button's bit"""
         #Analog sticks
-        self.main_stick = (.5, .5)
-        """(pair of floats): The main stick's x,y position. Ranges from 0->1, 0.5 is neutral"""
-        self.c_stick = (.5, .5)
-        """(pair of floats): The C stick's x,y position. Ranges from 0->1, 0.5 is neutral"""
-        self.raw_main_stick = (0, 0)
-        """(pair of ints): The raw unprocessed main stick coordinates. Ranges from -128 -> 127. 0 is neutral."""
+        self.main_x, self.main_y = .5, .5
+        self.c_x, self.c_y = .5, .5
+        self.raw_main_x, self.raw_main_y = 0, 0
         #Analog shoulders
         self.l_shoulder = 0
         """(float): L shoulder analog press. Ranges from 0 (not pressed) to 1 (fully pressed)"""
         self.r_shoulder = 0
         """(float): R shoulder analog press. Ranges from 0 (not pressed) to 1 (fully pressed)"""
 
+    @property
+    def button(self):
+        """(dict of enums.Button to bool): For the each Button as key, tells you if the button is pressed.
+
+        This is a live view of `buttons`, so writing to it presses or releases the button."""
+        return _ButtonView(self)
+
+    @property
+    def main_stick(self):
+        """(pair of floats): The main stick's x,y position. Ranges from 0->1, 0.5 is neutral"""
+        return (self.main_x, self.main_y)
+
+    @main_stick.setter
+    def main_stick(self, value):
+        self.main_x, self.main_y = value
+
+    @property
+    def c_stick(self):
+        """(pair of floats): The C stick's x,y position. Ranges from 0->1, 0.5 is neutral"""
+        return (self.c_x, self.c_y)
+
+    @c_stick.setter
+    def c_stick(self, value):
+        self.c_x, self.c_y = value
+
+    @property
+    def raw_main_stick(self):
+        """(pair of ints): The raw unprocessed main stick coordinates. Ranges from -128 -> 127. 0 is neutral."""
+        return (self.raw_main_x, self.raw_main_y)
+
+    @raw_main_stick.setter
+    def raw_main_stick(self, value):
+        self.raw_main_x, self.raw_main_y = value
+
+    def copy(self):
+        """Returns an independent snapshot of this controller state"""
+        state = ControllerState.__new__(ControllerState)
+        state.buttons = self.buttons
+        state.main_x, state.main_y = self.main_x, self.main_y
+        state.c_x, state.c_y = self.c_x, self.c_y
+        state.raw_main_x, state.raw_main_y = self.raw_main_x, self.raw_main_y
+        state.l_shoulder, state.r_shoulder = self.l_shoulder, self.r_shoulder
+        return state
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        # Every field is immutable, so a shallow copy is already a deep one
+        return self.copy()
+
+    def __eq__(self, other):
+        if not isinstance(other, ControllerState):
+            return NotImplemented
+        return (self.buttons == other.buttons and
+                self.main_x == other.main_x and self.main_y == other.main_y and
+                self.c_x == other.c_x and self.c_y == other.c_y and
+                self.raw_main_x == other.raw_main_x and self.raw_main_y == other.raw_main_y and
+                self.l_shoulder == other.l_shoulder and self.r_shoulder == other.r_shoulder)
+
+    # States are mutable, so they keep hashing by identity, as they always have. Equal
+    #   states can still be different set members or dict keys
+    __hash__ = object.__hash__
+
     def __str__(self):
         string = ""
-        for val in self.button:
-            string += str(val) + ": " + str(self.button[val])
+        for val in BUTTON_BITS:
+            string += str(val) + ": " + str(bool(self.buttons & BUTTON_BITS[val]))
             string += "\n"
         string += "MAIN_STICK: " + str(self.main_stick) + "\n"
         string += "C_STICK: " + str(self.c_stick) + "\n"
@@ -73,6 +214,71 @@ class ControllerState:
         string += "R_SHOULDER: " + str(self.r_shoulder) + "\n"
         return string
 
+class InputSequence:
+    """A precompiled series of controller inputs, one per frame
+
+    Build a sequence once (a wavedash, a multishine, a ledgedash...) and hand it to
+    Controller.schedule(). The inputs are then sent at flush time, one frame at a time,
+    without any per-frame Python in the bot.
+
+    Each add() call appends whole controller states, so anything not pressed on a
+    frame is released. For example, a jump-cancelled shine::
+
+        shine = InputSequence()
+        shine.add(buttons=[enums.Button.BUTTON_B], main_stick=(.5, 0))
+        shine.add(frames=3)
+        shine.add(buttons=[enums.Button.BUTTON_Y])
+    """
+    def __init__(self, actions=None):
+        """Create a sequence
+
+        Args:
+            actions (np.ndarray): Optional array of shape (N, ACTION_SIZE) to start from.
+                See ACTION_BUTTONS for the layout.
+        """
+        self._actions = []
+        if actions is not None:
+            self._actions.extend(np.asarray(actions, dtype=np.float64).reshape(-1, ACTION_SIZE))
+
+    def add(self, frames=1, buttons=(), main_stick=(.5, .5), c_stick=(.5, .5), shoulder=0):
+        """Append an input, held for some number of frames
+
+        Args:
+            frames (int): How many frames to hold the input for
+            buttons (list of enums.Button): Buttons pressed. All others are released
+            main_stick (pair of floats): Main stick x,y. Ranges from 0->1, 0.5 is neutral
+            c_stick (pair of floats): C stick x,y. Ranges from 0->1, 0.5 is neutral
+            shoulder (float): Analog L shoulder press, from 0 to 1
+
+        Returns:
+            This sequence, so calls can be chained
+        """
+        action = np.zeros(ACTION_SIZE)
+        for button in buttons:
+            action[ACTION_BUTTONS.index(button)] = 1
+        action[len(ACTION_BUTTONS):] = (*main_stick, *c_stick, shoulder)
+        self._actions.extend([action] * frames)
+        return self
+
+    def extend(self, sequence):
+        """Append all the inputs of another sequence
+
+        Returns:
+            This sequence, so calls can be chained
+        """
+        self._actions.extend(sequence._actions)
+        return self
+
+    @property
+    def actions(self):
+        """(np.ndarray): The inputs as an array of shape (N, ACTION_SIZE)"""
+        if not self._actions:
+            return np.zeros((0, ACTION_SIZE))
+        return np.stack(self._actions)
+
+    def __len__(self):
+        return len(self._actions)
+
 class Controller:
     """Manages virtual controller state and button presses
 
@@ -86,6 +292,9 @@ class Controller:
             port: int,
             type: enums.ControllerType = enums.ControllerType.STANDARD,
             fix_analog_inputs: bool = True,
+            nonblocking: bool = False,
+            queue_size: int = 8,
+            queue_policy: str = "drop_oldest",
             ):
         """Create a new virtual controller
 
@@ -98,7 +307,33 @@ class Controller:
               that the stick values from Console.step are consistent with the values
               you send as inputs, modulo the deadzone or sticks with magnitude > 80.
               Also adjusts the analog triggers in an analogous way.
+            nonblocking (bool): If True, never block on the pipe to dolphin. Flushed frames
+              that dolphin isn't ready for wait in a bounded queue instead, so a stalled
+              dolphin (loading, rollback) doesn't freeze the bot. Linux/OSX only.
+            queue_size (int): With nonblocking, how many flushed frames can wait to be written
+            queue_policy (str): With nonblocking, what to do when the queue is full.
+              "drop_oldest" throws away the oldest waiting frame, "coalesce" merges the new
+              frame into the newest waiting one. Either way the newest frame is never thrown
+              away, but it's only written once the pipe has room, on a later flush() or drain()
         """
+        if nonblocking:
+            if platform.system() == "Windows":
+                raise ValueError("Nonblocking controllers are not supported on Windows")
+            if queue_policy not in ("drop_oldest", "coalesce"):
+                raise ValueError(f"Unknown queue_policy {queue_policy!r}. Use 'drop_oldest' or 'coalesce'")
+            if queue_size < 1:
+                raise ValueError("queue_size must be at least 1")
+        self._nonblocking = nonblocking
+        self._queue_size = queue_size
+        self._queue_policy = queue_policy
+        self._queue = collections.deque()
+        self._pending = b""
+        self._sent = ControllerState()
+        self.dropped_frames = 0
+        """(int): With nonblocking, frames thrown away because the queue was full"""
+        self.coalesced_frames = 0
+        """(int): With nonblocking, frames merged into a later one because the queue was full"""
+
         self._is_dolphin = console.is_dolphin
         if self._is_dolphin:
             self.pipe_path = console.get_dolphin_pipes_path(port)
@@ -111,6 +346,10 @@ class Controller:
         self._console = console
         self._type = type
         self._fix_analog_inputs = fix_analog_inputs
+        self._action_table = None
+        self._schedule = collections.deque()
+        self.recorder = None
+        """(inputrecording.InputRecorder): If set, every flushed controller state is recorded to it"""
 
         # Configure our controller with the console
         self._console.setup_dolphin_controller(port, type)
@@ -149,6 +388,10 @@ class Controller:
                             return True
                         except pywintypes.error:
                             time.sleep(1)
+                elif self._nonblocking:
+                    # Wait for dolphin to open its end, then never block again
+                    self.pipe = open(self.pipe_path, "wb", buffering=0)
+                    os.set_blocking(self.pipe.fileno(), False)
                 else:
                     self.pipe = open(self.pipe_path, "w")
                 return True
@@ -208,14 +451,7 @@ class Controller:
         Args:
             button (enums.Button): Button to press
         """
-        self.current.button[button] = True
-        if self._is_dolphin:
-            if not self.pipe:
-                return
-            command = "PRESS " + str(button.value) + "\n"
-            if self.logger:
-                self.logger.log("Buttons Pressed", command, concat=True)
-            self._write(command)
+        self.current.buttons |= BUTTON_BITS[button]
 
     def release_button(self, button):
         """Release a single button
@@ -225,14 +461,7 @@ class Controller:
         Args:
             button (enums.Button): Button to release
         """
-        self.current.button[button] = False
-        if self._is_dolphin:
-            if not self.pipe:
-                return
-            command = "RELEASE " + str(button.value) + "\n"
-            if self.logger:
-                self.logger.log("Buttons Pressed", command, concat=True)
-            self._write(command)
+        self.current.buttons &= ~BUTTON_BITS[button]
 
     def press_shoulder(self, button: enums.Button, amount: float):
         """Press the analog shoulder buttons to a given amount
@@ -250,15 +479,6 @@ class Controller:
             self.current.l_shoulder = amount
         elif button == enums.Button.BUTTON_R:
             self.current.r_shoulder = amount
-        if self._is_dolphin:
-            if not self.pipe:
-                return
-            if self._fix_analog_inputs:
-                amount = fix_analog_trigger(amount)
-            command = "SET " + str(button.value) + " " + str(amount) + "\n"
-            if self.logger:
-                self.logger.log("Buttons Pressed", command, concat=True)
-            self._write(command)
 
     def tilt_analog(self, button: enums.Button, x: float, y: float):
         """ Tilt one of the analog sticks to a given (x,y) value
@@ -279,14 +499,6 @@ class Controller:
         else:
             raise ValueError(f"Invalid button type {button} for tilt_analog.")
 
-        if self._is_dolphin:
-            if not self.pipe:
-                return
-            command = "SET " + str(button.value) + " " + str(x) + " " + str(y) + "\n"
-            if self.logger:
-                self.logger.log("Buttons Pressed", command, concat=True)
-            self._write(command)
-
     def tilt_analog_unit(self, button, x, y):
         """Tilt one of the analog sticks to a given (x,y) value.
 
@@ -312,45 +524,152 @@ class Controller:
         All buttons are released, all sticks set to 0.5, all shoulders set to 0
         """
         #Set the internal state back to neutral
-        self.current.button[enums.Button.BUTTON_A] = False
-        self.current.button[enums.Button.BUTTON_B] = False
-        self.current.button[enums.Button.BUTTON_X] = False
-        self.current.button[enums.Button.BUTTON_Y] = False
-        self.current.button[enums.Button.BUTTON_Z] = False
-        self.current.button[enums.Button.BUTTON_L] = False
-        self.current.button[enums.Button.BUTTON_R] = False
-        self.current.button[enums.Button.BUTTON_START] = False
-        self.current.button[enums.Button.BUTTON_D_UP] = False
-        self.current.button[enums.Button.BUTTON_D_DOWN] = False
-        self.current.button[enums.Button.BUTTON_D_LEFT] = False
-        self.current.button[enums.Button.BUTTON_D_RIGHT] = False
-        self.current.main_stick = (.5, .5)
-        self.current.c_stick = (.5, .5)
+        self.current.buttons = 0
+        self.current.main_x, self.current.main_y = .5, .5
+        self.current.c_x, self.current.c_y = .5, .5
         self.current.l_shoulder = 0
         self.current.r_shoulder = 0
-        if self._is_dolphin:
-            if not self.pipe:
+
+    def set_action_table(self, actions):
+        """Precompute a discrete action table for apply()
+
+        Args:
+            actions (np.ndarray): Array of shape (N, ACTION_SIZE), one action vector per row.
+                Afterwards, apply(i) is the same as apply(actions[i]), but costs no conversion.
+        """
+        self._action_table = actions_to_states(actions, self._fix_analog_inputs)
+
+    def apply(self, action):
+        """Set the whole controller state from a single action
+
+        Replaces the current state, as if release_all() were called first. Like the
+        other input functions, nothing is sent until the next flush.
+
+        Args:
+            action: Either an array of ACTION_SIZE values (see ACTION_BUTTONS for the layout),
+                or an index into the table given to set_action_table(). The index may be a
+                float, (from a model's output, say) as long as it's a whole number.
+        """
+        if np.ndim(action) == 0:
+            if self._action_table is None:
+                raise ValueError("No action table set. Call set_action_table() first")
+            index = int(action)
+            if index != action:
+                raise ValueError(f"Action table index must be a whole number, got {action}")
+            self.current = self._action_table[index].copy()
+        else:
+            self.current = actions_to_states(np.reshape(action, (1, ACTION_SIZE)),
+                                             self._fix_analog_inputs)[0]
+
+    @property
+    def fix_analog_inputs(self):
+        """(bool): Whether analog inputs are remapped to the range melee uses. Set at creation"""
+        return self._fix_analog_inputs
+
+    def schedule(self, sequence: InputSequence, frame: int = None):
+        """Play a sequence of inputs, one per frame, starting at the given frame
+
+        The inputs are applied at flush time. The input for a given frame is the one sent
+        by the Console.step() that follows the gamestate of that frame. (The same place
+        that inputs pressed in response to that gamestate go.) While a sequence is playing,
+        it overrides anything pressed by hand. Scheduling on top of frames that are
+        already scheduled replaces them.
+
+        If frames get skipped (lag, or a slow bot) the latest input that's due is used,
+        so the sequence never falls behind the game.
+
+        Args:
+            sequence (InputSequence): The inputs to play
+            frame (int): Game frame of the first input. Defaults to the next flush.
+        """
+        if frame is None:
+            frame = self._console._frame
+        states = actions_to_states(sequence.actions, self._fix_analog_inputs)
+        self.schedule_states(range(frame, frame + len(states)), states)
+
+    def schedule_states(self, frames, states):
+        """Schedule exact controller states for the given game frames
+
+        Like schedule(), but with ready-made states that are sent as they are,
+        (no analog stick remapping) and frames that don't need to be consecutive.
+
+        Args:
+            frames (list of ints): Game frame for each state
+            states (list of ControllerState): The state to send on each frame
+        """
+        scheduled = dict(self._schedule)
+        scheduled.update(zip(frames, states))
+        self._schedule = collections.deque(sorted(scheduled.items(), key=lambda item: item[0]))
+
+    def clear_schedule(self):
+        """Cancel all scheduled inputs"""
+        self._schedule.clear()
+
+    @property
+    def scheduled_frames(self):
+        """(int): How many frames of scheduled inputs are still left to send"""
+        return len(self._schedule)
+
+    @property
+    def queued_frames(self):
+        """(int): With nonblocking, how many flushed frames are still waiting to be written"""
+        return len(self._queue) + bool(self._pending)
+
+    def drain(self, timeout=None):
+        """With nonblocking, wait until every queued frame has been written to the pipe
+
+        Call this before disconnect() if the last frames need to reach dolphin.
+
+        Args:
+            timeout (float): How long to wait, in seconds. None to wait forever
+
+        Returns:
+            True if the queue is empty, False if the timeout ran out first
+        """
+        if not (self._is_dolphin and self.pipe and self._nonblocking):
+            return True
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        self._drain()
+        while self.queued_frames:
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                return False
+            select.select([], [self.pipe], [], remaining)
+            self._drain()
+        return True
+
+    def _enqueue(self, state):
+        """Add a flushed frame to the nonblocking queue, applying the queue policy"""
+        if len(self._queue) >= self._queue_size:
+            if self._queue_policy == "coalesce":
+                self._queue[-1] = state
+                self.coalesced_frames += 1
+                return
+            self._queue.popleft()
+            self.dropped_frames += 1
+        self._queue.append(state)
+
+    def _drain(self):
+        """Write as much of the nonblocking queue as the pipe will take right now
+
+        Commands are built against the last state actually written, so dropping or
+        merging frames never leaves dolphin with a wrong idea of what's pressed.
+        """
+        while True:
+            if not self._pending:
+                if not self._queue:
+                    return
+                state = self._queue.popleft()
+                commands = self._commands(self._sent, state)
+                if self.logger and commands:
+                    self.logger.log("Buttons Pressed", commands, concat=True)
+                self._pending = (commands + "FLUSH\n").encode()
+                self._sent = state
+            try:
+                written = os.write(self.pipe.fileno(), self._pending)
+            except BlockingIOError:
                 return
-            command = "RELEASE A" + "\n"
-            command += "RELEASE B" + "\n"
-            command += "RELEASE X" + "\n"
-            command += "RELEASE Y" + "\n"
-            command += "RELEASE Z" + "\n"
-            command += "RELEASE L" + "\n"
-            command += "RELEASE R" + "\n"
-            command += "RELEASE START" + "\n"
-            command += "RELEASE D_UP" + "\n"
-            command += "RELEASE D_DOWN" + "\n"
-            command += "RELEASE D_LEFT" + "\n"
-            command += "RELEASE D_RIGHT" + "\n"
-            command += "SET MAIN .5 .5" + "\n"
-            command += "SET C .5 .5" + "\n"
-            command += "SET L 0" + "\n"
-            command += "SET R 0" + "\n"
-            #Send the presses to dolphin
-            self._write(command)
-            if self.logger:
-                self.logger.log("Buttons Pressed", "Empty Input", concat=True)
+            self._pending = self._pending[written:]
 
     def _write(self, command):
         """ Platform independent button write function.
@@ -363,18 +682,81 @@ class Controller:
         else:
             self.pipe.write(command)
 
+    def _commands(self, prev, current):
+        """Build the pipe commands that take the controller from prev to current"""
+        commands = []
+        changed = current.buttons ^ prev.buttons
+        if changed:
+            for button, bit in BUTTON_BITS.items():
+                if changed & bit:
+                    commands.append(("PRESS " if current.buttons & bit else "RELEASE ") + button.value + "\n")
+        if current.main_x != prev.main_x or current.main_y != prev.main_y:
+            commands.append("SET MAIN " + str(current.main_x) + " " + str(current.main_y) + "\n")
+        if current.c_x != prev.c_x or current.c_y != prev.c_y:
+            commands.append("SET C " + str(current.c_x) + " " + str(current.c_y) + "\n")
+        for name, prev_amount, amount in (("L", prev.l_shoulder, current.l_shoulder),
+                                          ("R", prev.r_shoulder, current.r_shoulder)):
+            if amount != prev_amount:
+                if self._fix_analog_inputs:
+                    amount = fix_analog_trigger(amount)
+                commands.append("SET " + name + " " + str(amount) + "\n")
+        return "".join(commands)
+
     def flush(self):
         """Actually send the button presses to the console
 
-        Up until this point, any buttons you 'press' are just queued in a pipe.
-        It doesn't get sent to the console until you flush
+        Up until this point, any buttons you 'press' are just recorded in the
+        controller's current state. On flush, only the inputs that changed since
+        the last flush are sent to the console, in a single write.
         """
-        # Move the current controller state into the previous one
-        self.prev = copy.copy(self.current)
-
-        if self._is_dolphin:
-            self._write("FLUSH\n")
+        if self._schedule:
+            frame = self._console._frame
+            state = None
+            while self._schedule and self._schedule[0][0] <= frame:
+                state = self._schedule.popleft()[1]
+            if state is not None:
+                self.current = state.copy()
+
+        if self.recorder is not None:
+            self.recorder.record(self._console._frame, self.port, self.current)
+
+        if self._is_dolphin and self.pipe and self._nonblocking:
+            self._enqueue(self.current.copy())
+            self._drain()
+        elif self._is_dolphin and self.pipe:
+            commands = self._commands(self.prev, self.current)
+            if self.logger and commands:
+                self.logger.log("Buttons Pressed", commands, concat=True)
+            self._write(commands + "FLUSH\n")
             if platform.system() != "Windows":
-                if not self.pipe:
-                    return
                 self.pipe.flush()
+
+        # Move the current controller state into the previous one
+        self.prev = self.current.copy()
+
+def apply_actions(controllers, actions):
+    """Set the state of several controllers at once from an array of actions
+
+    Action vectors are converted for the whole batch at once. See Console.apply_actions()
+
+    Args:
+        controllers (list of Controller): The controller for each row of actions
+        actions (np.ndarray): Either an array of shape (len(controllers), ACTION_SIZE)
+            of action vectors, or an array of len(controllers) indices into each
+            controller's action table. See Controller.apply()
+    """
+    actions = np.asarray(actions)
+    if len(actions) != len(controllers):
+        raise ValueError(f"Got {len(actions)} actions for {len(controllers)} controllers")
+    if actions.ndim == 1:
+        for controller, action in zip(controllers, actions.tolist()):
+            controller.apply(action)
+        return
+
+    for fix_analog_inputs in (True, False):
+        rows = [i for i, controller in enumerate(controllers)
+                if controller.fix_analog_inputs == fix_analog_inputs]
+        if rows:
+            states = actions_to_states(actions[rows], fix_analog_inputs)
+            for i, state in zip(rows, states):
+                controllers[i].current = state
@@ -0,0 +1,192 @@
+""" Fixed-length numeric feature vectors from gamestates
+
+Most bots that learn (RL, imitation) need the gamestate as a flat vector of numbers.
+A FeatureSchema decides once which fields go where, and then writes each gamestate
+straight into a preallocated float32 buffer, with no per-frame allocation.
+
+    schema = FeatureSchema(ports=(1, 2), action_encoding="onehot")
+    features = schema.empty()
+    while True:
+        gamestate = console.step()
+        gamestate.to_array(schema, out=features)
+"""
+
+import numpy as np
+
+from melee import enums
+
+# Every action, in a stable order, for one-hot encoding
+ACTIONS = list(enums.Action)
+_ACTION_INDEX = {action: i for i, action in enumerate(ACTIONS)}
+
+PLAYER_FEATURES = (
+    "present",
+    "position_x", "position_y",
+    "speed_air_x_self", "speed_y_self", "speed_x_attack", "speed_y_attack", "speed_ground_x_self",
+    "percent", "stock",
+    "action_frame", "jumps_left", "shield_strength",
+    "ecb_top_x", "ecb_top_y", "ecb_bottom_x", "ecb_bottom_y",
+    "ecb_left_x", "ecb_left_y", "ecb_right_x", "ecb_right_y",
+    "facing", "on_ground", "invulnerable", "hitlag_left", "hitstun_frames_left",
+)
+"""Names of the per-player features, in order. The action encoding follows these"""
+
+PROJECTILE_FEATURES = (
+    "present", "position_x", "position_y", "speed_x", "speed_y", "owner", "type", "frame",
+)
+"""Names of the per-projectile features, in order"""
+
+class FeatureSchema:
+    """ The layout of a gamestate's feature vector
+
+    The vector is laid out as: frame, stage, then one block per port (see
+    PLAYER_FEATURES, followed by the action), then max_projectiles projectile
+    blocks (see PROJECTILE_FEATURES). Ports and projectile slots that are empty
+    are all zeros, including their "present" flag.
+    """
+    def __init__(self, ports=(1, 2), action_encoding="id", max_projectiles=8):
+        """Create a schema
+
+        Args:
+            ports (tuple of ints): Which controller ports get a player block, in order
+            action_encoding (str): "id" for the raw action value as a single feature,
+                or "onehot" for one feature per enums.Action
+            max_projectiles (int): Number of projectile slots. Extra projectiles are ignored
+        """
+        if action_encoding not in ("id", "onehot"):
+            raise ValueError(f"Unknown action_encoding {action_encoding!r}. Use 'id' or 'onehot'")
+        self.ports = tuple(ports)
+        self.action_encoding = action_encoding
+        self.max_projectiles = max_projectiles
+
+        self.action_size = len(ACTIONS) if action_encoding == "onehot" else 1
+        self.player_size = len(PLAYER_FEATURES) + self.action_size
+        """(int): Length of a single player's block"""
+        self.projectile_size = len(PROJECTILE_FEATURES)
+        self.player_offsets = {port: 2 + i * self.player_size for i, port in enumerate(self.ports)}
+        """(dict of int - int): Where each port's block starts"""
+        self.projectile_offset = 2 + len(self.ports) * self.player_size
+        self.size = self.projectile_offset + max_projectiles * self.projectile_size
+        """(int): Total length of the feature vector"""
+
+    @property
+    def names(self):
+        """(list of str): A name for every feature, in order"""
+        if self.action_encoding == "onehot":
+            action_names = ["action_" + action.name for action in ACTIONS]
+        else:
+            action_names = ["action"]
+        names = ["frame", "stage"]
+        for port in self.ports:
+            names += [f"p{port}_{name}" for name in PLAYER_FEATURES + tuple(action_names)]
+        for i in range(self.max_projectiles):
+            names += [f"projectile{i}_{name}" for name in PROJECTILE_FEATURES]
+        return names
+
+    def empty(self):
+        """Returns a zeroed float32 buffer of the right size for this schema"""
+        return np.zeros(self.size, dtype=np.float32)
+
+    def write_player(self, player, out, offset=0):
+        """Write a single player's block into out, starting at offset"""
+        end = offset + len(PLAYER_FEATURES)
+        if player is None:
+            out[offset:end + self.action_size] = 0
+            return
+        ecb = player.ecb
+        out[offset:end] = (
+            1,
+            player.position.x, player.position.y,
+            player.speed_air_x_self, player.speed_y_self, player.speed_x_attack,
+            player.speed_y_attack, player.speed_ground_x_self,
+            player.percent, player.stock,
+            player.action_frame, player.jumps_left, player.shield_strength,
+            ecb.top.x, ecb.top.y, ecb.bottom.x, ecb.bottom.y,
+            ecb.left.x, ecb.left.y, ecb.right.x, ecb.right.y,
+            player.facing, player.on_ground, player.invulnerable,
+            player.hitlag_left, player.hitstun_frames_left,
+        )
+        if self.action_encoding == "onehot":
+            out[end:end + self.action_size] = 0
+            index = _ACTION_INDEX.get(player.action)
+            if index is not None:
+                out[end + index] = 1
+        else:
+            out[end] = player.action.value
+
+    def write(self, gamestate, out):
+        """Write a whole gamestate into out, which must have at least `size` elements"""
+        out[0] = gamestate.frame
+        out[1] = gamestate.stage.value
+        players = gamestate.players
+        for port, offset in self.player_offsets.items():
+            self.write_player(players.get(port), out, offset)
+
+        offset = self.projectile_offset
+        projectiles = gamestate.projectiles
+        for i in range(self.max_projectiles):
+            if i < len(projectiles):
+                projectile = projectiles[i]
+                out[offset:offset + self.projectile_size] = (
+                    1,
+                    projectile.position.x, projectile.position.y,
+                    projectile.speed.x, projectile.speed.y,
+                    projectile.owner, projectile.type.value, projectile.frame,
+                )
+            else:
+                out[offset:offset + self.projectile_size] = 0
+            offset += self.projectile_size
+        return out
+
+DEFAULT_SCHEMA = FeatureSchema()
+"""The schema used when none is given: ports 1 and 2, action ids, 8 projectile slots"""
+
+class FeatureHistory:
+    """ The feature vectors of the last few frames, stacked into one array
+
+    Backed by a ring buffer that holds every row twice, so that the last `length`
+    frames are always one contiguous slice. Getting the stack in order is just a
+    view, never a copy. Frames from before the first push are all zeros.
+    """
+    def __init__(self, length, schema=None):
+        """Create a history
+
+        Args:
+            length (int): How many frames to keep
+            schema (FeatureSchema): Layout of each frame. Defaults to DEFAULT_SCHEMA
+        """
+        if length < 1:
+            raise ValueError("length must be at least 1")
+        self.length = length
+        self.schema = schema if schema is not None else DEFAULT_SCHEMA
+        self._buffer = np.zeros((2 * length, self.schema.size), dtype=np.float32)
+        self._next = 0
+        self.count = 0
+        """(int): Number of frames pushed so far"""
+
+    def push(self, gamestate):
+        """Add a gamestate as the newest frame, dropping the oldest"""
+        row = self._buffer[self._next]
+        self.schema.write(gamestate, row)
+        self._buffer[self._next + self.length] = row
+        self._next = (self._next + 1) % self.length
+        self.count += 1
+
+    @property
+    def stacked(self):
+        """(np.ndarray): View of shape (length, schema.size), oldest frame first
+
+        The view is only valid until the next push. Copy it to keep it.
+        """
+        return self._buffer[self._next:self._next + self.length]
+
+    @property
+    def latest(self):
+        """(np.ndarray): View of the newest frame's feature vector"""
+        return self._buffer[self._next + self.length - 1]
+
+    def clear(self):
+        """Forget all frames"""
+        self._buffer[:] = 0
+        self._next = 0
+        self.count = 0
@@ -6,13 +6,737 @@ and state information that would be difficult to discover on your own.
 """
 
 import csv
+import functools
+import hashlib
 import os
 import math
-from collections import defaultdict
+import platform
+import tempfile
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+
 from melee import enums
 from melee.enums import Action, Character, AttackState, DodgeState
 from melee import stages
 
+FRAME_COLUMNS = ['hitbox_1_status', 'hitbox_1_size', 'hitbox_1_x', 'hitbox_1_y',
+                 'hitbox_2_status', 'hitbox_2_size', 'hitbox_2_x', 'hitbox_2_y',
+                 'hitbox_3_status', 'hitbox_3_size', 'hitbox_3_x', 'hitbox_3_y',
+                 'hitbox_4_status', 'hitbox_4_size', 'hitbox_4_x', 'hitbox_4_y',
+                 'locomotion_x', 'locomotion_y', 'iasa', 'facing_changed', 'projectile',
+                 'intangible']
+"""The per-frame fields of framedata.csv, after character, action and frame"""
+
+_BOOL_COLUMNS = {'hitbox_1_status', 'hitbox_2_status', 'hitbox_3_status', 'hitbox_4_status',
+                 'iasa', 'facing_changed', 'projectile', 'intangible'}
+
+# Bump this whenever the layout of the compiled cache changes
+CACHE_VERSION = 2
+
+_DATA_PATH = os.path.dirname(os.path.realpath(__file__))
+CSV_PATH = os.path.join(_DATA_PATH, "framedata.csv")
+CACHE_PATH = os.path.join(_DATA_PATH, "framedata.npz")
+"""The cache `python -m melee.framedata` builds, next to the CSV. Never written at runtime"""
+
+def _user_cache_dir():
+    if platform.system() == "Windows":
+        return os.environ.get("LOCALAPPDATA") or os.path.expanduser("~/AppData/Local")
+    if platform.system() == "Darwin":
+        return os.path.expanduser("~/Library/Caches")
+    return os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+
+USER_CACHE_PATH = os.path.join(_user_cache_dir(), "libmelee", "framedata.npz")
+"""Where FrameData builds its own cache, when CACHE_PATH is missing or out of date"""
+
+def _file_hash(path):
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+def _file_stamp(path):
+    """(size, modification time in ns) of a file. Cheap to check, unlike its hash"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def _read_csv(path):
+    """Parse framedata.csv into a dict of numpy columns, sorted by (character, action, frame)"""
+    rows = {}
+    with open(path) as csvfile:
+        for frame in csv.DictReader(csvfile):
+            # Later rows for the same frame replace earlier ones
+            key = (int(frame["character"]), int(frame["action"]), int(frame["frame"]))
+            rows[key] = [frame[column] == "True" if column in _BOOL_COLUMNS else float(frame[column])
+                         for column in FRAME_COLUMNS]
+    keys = sorted(rows)
+    columns = {}
+    for i, name in enumerate(("character", "action", "frame")):
+        columns[name] = np.array([key[i] for key in keys], dtype=np.int32)
+    values = [rows[key] for key in keys]
+    for i, name in enumerate(FRAME_COLUMNS):
+        dtype = bool if name in _BOOL_COLUMNS else np.float64
+        columns[name] = np.array([row[i] for row in values], dtype=dtype).reshape(len(keys))
+    return columns
+
+def compile_framedata(csv_path=CSV_PATH, cache_path=CACHE_PATH):
+    """Compile framedata.csv into the binary cache that FrameData loads
+
+    The CSV stays the source of truth. Run this (or `python -m melee.framedata`) to
+    build the cache next to the CSV ahead of time, such as when packaging. Otherwise
+    FrameData builds one in the user's cache directory by itself. See load_framedata()
+
+    Args:
+        csv_path (str): Path of the frame data CSV
+        cache_path (str): Path of the .npz file to write
+
+    Returns:
+        dict of str - np.ndarray: The compiled columns
+    """
+    # Stamp it before reading, so a CSV that changes while it's read looks out of date
+    source_size, source_mtime = _file_stamp(csv_path)
+    source_hash = _file_hash(csv_path)
+    columns = _read_csv(csv_path)
+    # Write it next to where it goes, then swap it into place. So other processes
+    #   loading the cache at the same time never see a half written file
+    directory = os.path.dirname(os.path.abspath(cache_path))
+    descriptor, temp_path = tempfile.mkstemp(prefix=".framedata-", suffix=".npz", dir=directory)
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            np.savez(file, version=CACHE_VERSION, source_hash=source_hash,
+                     source_size=source_size, source_mtime=source_mtime, **columns)
+        os.replace(temp_path, cache_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return columns
+
+def _read_cache(cache_path, csv_path):
+    """The columns in a cache, or None if it's missing, unreadable or built from a different CSV"""
+    try:
+        with open(cache_path, "rb") as file, np.load(file) as cache:
+            if int(cache["version"]) != CACHE_VERSION:
+                return None
+            # Only hash the CSV if it looks different. A fresh checkout or install can
+            #   change its modification time without changing what's in it
+            if os.path.exists(csv_path) and \
+                    (int(cache["source_size"]), int(cache["source_mtime"])) != _file_stamp(csv_path) and \
+                    str(cache["source_hash"]) != _file_hash(csv_path):
+                return None
+            return {name: cache[name] for name in ("character", "action", "frame", *FRAME_COLUMNS)}
+    except Exception:
+        # Missing, truncated or otherwise corrupt (BadZipFile, EOFError, ...)
+        return None
+
+def load_framedata(csv_path=CSV_PATH, cache_path=CACHE_PATH, user_cache_path=USER_CACHE_PATH):
+    """Load the frame data columns, from a binary cache when there's one up to date
+
+    The cache at cache_path (built by `python -m melee.framedata`) is used first, then
+    the one at user_cache_path. If neither is up to date, the CSV is parsed and the user
+    cache is rebuilt, if it can be written. The cache at cache_path is never written here,
+    so an installed package stays untouched.
+
+    Returns:
+        dict of str - np.ndarray: character, action and frame, plus FRAME_COLUMNS. One element
+            per frame, sorted by (character, action, frame)
+    """
+    for path in (cache_path, user_cache_path):
+        columns = _read_cache(path, csv_path)
+        if columns is not None:
+            return columns
+    try:
+        os.makedirs(os.path.dirname(user_cache_path), exist_ok=True)
+        return compile_framedata(csv_path, user_cache_path)
+    except OSError:
+        # Can't write the cache either. Just use the CSV
+        return _read_csv(csv_path)
+
+def _action_frames():
+    return defaultdict(dict)
+
+def _frames_to_dicts(columns):
+    """The nested framedata dicts, [character][action][action_frame] -> dict of FRAME_COLUMNS"""
+    framedata = defaultdict(_action_frames)
+    lists = [columns[name].tolist() for name in FRAME_COLUMNS]
+    characters = columns["character"].tolist()
+    actions = columns["action"].tolist()
+    frames = columns["frame"].tolist()
+    for i, values in enumerate(zip(*lists)):
+        character = Character(characters[i])
+        action = Action(actions[i])
+        framedata[character][action][frames[i]] = dict(zip(FRAME_COLUMNS, values))
+    return framedata
+
+class ActionSummary:
+    """Per-action facts that are otherwise found by scanning every frame of the action.
+    FrameData builds one of these for each (character, action) when it loads."""
+    __slots__ = ('is_attack', 'first_hitbox_frame', 'last_hitbox_frame', 'hitbox_count', 'iasa',
+                 'frame_count', 'first_intangible_frame', 'last_intangible_frame')
+
+    def __init__(self, is_attack=False, first_hitbox_frame=-1, last_hitbox_frame=-1, hitbox_count=0,
+                 iasa=-1, frame_count=-1, first_intangible_frame=-1, last_intangible_frame=-1):
+        self.is_attack = is_attack
+        self.first_hitbox_frame = first_hitbox_frame
+        self.last_hitbox_frame = last_hitbox_frame
+        self.hitbox_count = hitbox_count
+        self.iasa = iasa
+        self.frame_count = frame_count
+        self.first_intangible_frame = first_intangible_frame
+        self.last_intangible_frame = last_intangible_frame
+
+_NO_ACTION = ActionSummary()
+
+def _action_starts(columns):
+    """The index of the first row of each (character, action) in the columns"""
+    character, action = columns["character"], columns["action"]
+    return np.flatnonzero(np.r_[True, (character[1:] != character[:-1]) | (action[1:] != action[:-1])])
+
+def _summarize(columns):
+    """An ActionSummary for each (character, action) in the columns from load_framedata()"""
+    frame = columns["frame"].astype(np.int64)
+    if len(frame) == 0:
+        return {}
+    character, action = columns["character"], columns["action"]
+    starts = _action_starts(columns)
+
+    def first(mask):
+        values = np.minimum.reduceat(np.where(mask, frame, np.iinfo(np.int64).max), starts)
+        return np.where(values == np.iinfo(np.int64).max, -1, values)
+
+    def last(mask):
+        return np.maximum.reduceat(np.where(mask, frame, -1), starts)
+
+    hit = columns["hitbox_1_status"] | columns["hitbox_2_status"] | columns["hitbox_3_status"] | \
+        columns["hitbox_4_status"] | columns["projectile"]
+    # Every time we go from NOT having a hit box to having one, up the count
+    follows_hit = np.r_[False, hit[:-1] & (frame[:-1] == frame[1:] - 1)]
+    follows_hit[starts] = False
+    rising = hit & (frame >= 1) & ((frame == 1) | ~follows_hit)
+
+    is_attack = np.logical_or.reduceat(hit, starts)
+    frame_count = np.maximum.reduceat(frame, starts)
+    first_iasa = first(columns["iasa"])
+    iasa = np.where(is_attack, np.where(first_iasa == -1, frame_count, first_iasa), -1)
+
+    summaries = {}
+    table = zip(character[starts].tolist(), action[starts].tolist(), is_attack.tolist(),
+                first(hit).tolist(), last(hit).tolist(), np.add.reduceat(rising, starts).tolist(),
+                iasa.tolist(), frame_count.tolist(),
+                first(columns["intangible"]).tolist(), last(columns["intangible"]).tolist())
+    for character_value, action_value, *values in table:
+        summaries[(Character(character_value), Action(action_value))] = ActionSummary(*values)
+    return summaries
+
+class FrameArrays:
+    """ Frame data as dense numpy arrays, one row per action frame
+
+    Each action's rows are contiguous, running from its first frame to its last with
+    no gaps. Frames missing from the frame data have `present` False and are otherwise
+    all zeros. The hitbox arrays have 4 columns, one per hitbox.
+    """
+    __slots__ = ('frame', 'present', 'hitbox_status', 'hitbox_size', 'hitbox_x', 'hitbox_y',
+                 'locomotion_x', 'locomotion_y', 'iasa', 'facing_changed', 'projectile', 'intangible')
+
+    def __init__(self, **arrays):
+        for name in self.__slots__:
+            setattr(self, name, arrays[name])
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __getitem__(self, index):
+        """Index every array at once. Slices give views, not copies"""
+        return FrameArrays(**{name: getattr(self, name)[index] for name in self.__slots__})
+
+def _densify(columns):
+    """Lay out the columns from load_framedata() as FrameArrays
+
+    Returns:
+        (FrameArrays, dict of (Character, Action) - (int, int, int)): The arrays, and the
+            (offset, first frame, last frame) of each action's rows in them
+    """
+    frame = columns["frame"].astype(np.int64)
+    if len(frame) == 0:
+        starts = np.zeros(0, dtype=np.int64)
+    else:
+        starts = _action_starts(columns)
+    ends = np.r_[starts[1:], len(frame)].astype(np.int64)
+    first = frame[starts]
+    last = frame[ends - 1]
+    span = last - first + 1
+    offsets = np.r_[0, np.cumsum(span)[:-1]].astype(np.int64)
+    rows = offsets.repeat(ends - starts) + frame - first.repeat(ends - starts)
+    size = int(span.sum())
+
+    def scatter(values, dtype):
+        dense = np.zeros((size,) + values.shape[1:], dtype=dtype)
+        dense[rows] = values
+        return dense
+
+    def hitboxes(field):
+        return np.stack([columns[f"hitbox_{i}_{field}"] for i in range(1, 5)], axis=1)
+
+    arrays = FrameArrays(
+        frame=np.arange(size, dtype=np.int64) - (offsets - first).repeat(span),
+        present=scatter(np.ones(len(frame), dtype=bool), bool),
+        hitbox_status=scatter(hitboxes("status"), bool),
+        hitbox_size=scatter(hitboxes("size"), np.float64),
+        hitbox_x=scatter(hitboxes("x"), np.float64),
+        hitbox_y=scatter(hitboxes("y"), np.float64),
+        **{name: scatter(columns[name], columns[name].dtype)
+           for name in ("locomotion_x", "locomotion_y", "iasa", "facing_changed", "projectile", "intangible")},
+    )
+    spans = {}
+    character, action = columns["character"], columns["action"]
+    for character_value, action_value, offset, first_frame, last_frame in zip(
+            character[starts].tolist(), action[starts].tolist(),
+            offsets.tolist(), first.tolist(), last.tolist()):
+        spans[(Character(character_value), Action(action_value))] = (offset, first_frame, last_frame)
+    return arrays, spans
+
+# Action classification
+#   Most of the is_*() questions only depend on the action (and sometimes the character),
+#   so they're compiled once into boolean tables indexed by action value.
+
+_LAST_ACTION = max(action.value for action in Action if action != Action.UNKNOWN_ANIMATION) + 1
+"""Table slot shared by every action value past the known ones, such as UNKNOWN_ANIMATION"""
+
+def _action_array(actions):
+    array = np.zeros(_LAST_ACTION + 1, dtype=bool)
+    for action in actions:
+        array[min(action.value, _LAST_ACTION)] = True
+    return array
+
+class ActionTable:
+    """ A yes or no question about actions, answered with a lookup instead of comparisons
+
+    Call it with a single action (and character) to get a bool, or use mask() to
+    answer for a whole array of action values at once.
+    """
+    __slots__ = ('array', 'overrides', '_list', '_override_lists')
+
+    def __init__(self, actions, overrides=None):
+        """
+        Args:
+            actions (iterable of enums.Action): The actions the answer is yes for
+            overrides (dict of enums.Character - iterable of enums.Action): Characters that
+                have their own set of yes actions, instead of `actions`
+        """
+        self.array = _action_array(actions)
+        """(np.ndarray): The answer for each action value. The last slot covers any larger value"""
+        self.overrides = {character: _action_array(override) for character, override in (overrides or {}).items()}
+        """(dict of enums.Character - np.ndarray): The tables of characters with their own answers"""
+        self._list = self.array.tolist()
+        self._override_lists = {character: array.tolist() for character, array in self.overrides.items()}
+
+    def __call__(self, action, character=None):
+        """The answer for one action
+
+        Args:
+            action (enums.Action): The action we're interested in
+            character (enums.Character): The character doing it, if the answer depends on that
+        """
+        value = action.value
+        if value > _LAST_ACTION:
+            value = _LAST_ACTION
+        table = self._list
+        if self._override_lists:
+            table = self._override_lists.get(character, table)
+        return table[value]
+
+    def mask(self, actions, characters=None):
+        """The answer for every element of an array of actions, such as a column of a replay
+
+        Args:
+            actions (array of int): Action values
+            characters (array of int): Character values, the same shape as actions. None
+                to ignore character specific answers
+
+        Returns:
+            np.ndarray of bool, the same shape as actions
+        """
+        actions = np.minimum(np.asarray(actions), _LAST_ACTION)
+        result = self.array[actions]
+        if characters is not None and self.overrides:
+            characters = np.asarray(characters)
+            for character, array in self.overrides.items():
+                chosen = characters == character.value
+                result[chosen] = array[actions[chosen]]
+        return result
+
+_ROLL_ACTIONS = (
+    Action.SPOTDODGE, Action.ROLL_FORWARD, Action.ROLL_BACKWARD, Action.NEUTRAL_TECH,
+    Action.FORWARD_TECH, Action.BACKWARD_TECH, Action.NEUTRAL_GETUP, Action.GROUND_GETUP,
+    Action.TECH_MISS_UP, Action.TECH_MISS_DOWN, Action.LYING_GROUND_UP, Action.LYING_GROUND_DOWN,
+    Action.GETUP_ATTACK, Action.GROUND_ATTACK_UP, Action.EDGE_GETUP_SLOW, Action.EDGE_GETUP_QUICK,
+    Action.EDGE_ROLL_SLOW, Action.EDGE_ROLL_QUICK, Action.GROUND_ROLL_FORWARD_UP,
+    Action.GROUND_ROLL_BACKWARD_UP, Action.GROUND_ROLL_FORWARD_DOWN,
+    Action.GROUND_ROLL_BACKWARD_DOWN, Action.SHIELD_BREAK_FLY, Action.SHIELD_BREAK_FALL,
+    Action.SHIELD_BREAK_DOWN_U, Action.SHIELD_BREAK_DOWN_D, Action.SHIELD_BREAK_STAND_U,
+    Action.SHIELD_BREAK_STAND_D, Action.TAUNT_RIGHT, Action.TAUNT_LEFT, Action.SHIELD_BREAK_TEETER
+)
+_SHIELD_ACTIONS = (
+    Action.SHIELD, Action.SHIELD_START, Action.SHIELD_REFLECT, Action.SHIELD_STUN,
+    Action.SHIELD_RELEASE
+)
+_DEAD_ACTIONS = (
+    Action.DEAD_DOWN, Action.DEAD_FLY, Action.DEAD_FLY_SPLATTER, Action.DEAD_FLY_SPLATTER_FLAT,
+    Action.DEAD_FLY_SPLATTER_FLAT_ICE, Action.DEAD_FLY_STAR, Action.DEAD_FLY_STAR_ICE,
+    Action.DEAD_LEFT, Action.DEAD_RIGHT, Action.DEAD_UP
+)
+_THROWN_ACTIONS = (
+    Action.THROWN_FORWARD, Action.THROWN_BACK, Action.THROWN_UP, Action.THROWN_DOWN,
+    Action.THROWN_DOWN_2, Action.THROWN_KIRBY_STAR, Action.THROWN_COPY_STAR, Action.THROWN_KIRBY,
+    Action.BURY, Action.DAMAGE_BIND, Action.THROWN_MEWTWO, Action.THROWN_MEWTWO_AIR
+)
+_DAMAGED_ACTIONS = (
+    Action.DAMAGE_HIGH_1, Action.DAMAGE_HIGH_2, Action.DAMAGE_HIGH_3, Action.DAMAGE_NEUTRAL_1,
+    Action.DAMAGE_NEUTRAL_2, Action.DAMAGE_NEUTRAL_3, Action.DAMAGE_LOW_1, Action.DAMAGE_LOW_2,
+    Action.DAMAGE_LOW_3, Action.DAMAGE_AIR_1, Action.DAMAGE_AIR_2, Action.DAMAGE_AIR_3,
+    Action.DAMAGE_SCREW, Action.DAMAGE_SCREW_AIR, Action.DAMAGE_FLY_HIGH, Action.DAMAGE_FLY_NEUTRAL,
+    Action.DAMAGE_FLY_LOW, Action.DAMAGE_FLY_TOP, Action.DAMAGE_FLY_ROLL,
+    Action.LYING_GROUND_UP_HIT, Action.DAMAGE_GROUND, Action.PUMMELED_HIGH, Action.GRAB_PUMMELED,
+    Action.DAMAGE_SONG, Action.DAMAGE_SONG_WAIT, Action.DAMAGE_SONG_RV, Action.DAMAGE_BIND,
+    Action.DAMAGE_ICE, Action.DAMAGE_ICE_JUMP
+)
+_GRABBED_ACTIONS = (
+    Action.GRABBED, Action.GRAB_PULL, Action.GRAB_ESCAPE, Action.GRAB_JUMP, Action.GRAB_NECK,
+    Action.GRAB_FOOT, Action.GRABBED_WAIT_HIGH
+)
+_MISTECH_ACTIONS = (
+    Action.TECH_MISS_UP, Action.TECH_MISS_DOWN, Action.LYING_GROUND_UP, Action.LYING_GROUND_DOWN
+)
+_HIT_ACTIONS = (
+    Action.SHIELD_STUN, Action.BURY_WAIT, Action.BURY_JUMP, Action.DOWN_REFLECT, Action.DOWN_B_STUN
+)
+_INACTIONABLE_ACTIONS = (
+    Action.NOTHING_STATE, Action.ON_HALO_DESCENT, Action.DEAD_FALL, Action.SPECIAL_FALL_FORWARD,
+    Action.SPECIAL_FALL_BACK, Action.TECH_MISS_UP, Action.GROUND_GETUP,
+    Action.GROUND_ROLL_FORWARD_UP, Action.GROUND_ROLL_BACKWARD_UP, Action.TECH_MISS_DOWN,
+    Action.NEUTRAL_GETUP, Action.GROUND_ROLL_FORWARD_DOWN, Action.GROUND_ROLL_BACKWARD_DOWN,
+    Action.NEUTRAL_TECH, Action.FORWARD_TECH, Action.BACKWARD_TECH, Action.SHIELD_BREAK_FLY,
+    Action.SHIELD_BREAK_FALL, Action.SHIELD_BREAK_DOWN_U, Action.SHIELD_BREAK_DOWN_D,
+    Action.SHIELD_BREAK_STAND_U, Action.SHIELD_BREAK_STAND_D, Action.SHIELD_BREAK_TEETER,
+    Action.ROLL_FORWARD, Action.ROLL_BACKWARD, Action.SPOTDODGE, Action.AIRDODGE,
+    Action.EDGE_CATCHING, Action.EDGE_GETUP_SLOW, Action.EDGE_GETUP_QUICK, Action.EDGE_ROLL_SLOW,
+    Action.EDGE_ROLL_QUICK, Action.EDGE_JUMP_1_SLOW, Action.EDGE_JUMP_2_SLOW,
+    Action.EDGE_JUMP_1_QUICK, Action.EDGE_JUMP_2_QUICK, Action.TAUNT_RIGHT, Action.TAUNT_LEFT,
+    Action.ENTRY, Action.ENTRY_START, Action.ENTRY_END, Action.LASER_GUN_PULL
+)
+_NORMAL_ATTACK_ACTIONS = (
+    Action.NEUTRAL_ATTACK_1, Action.NEUTRAL_ATTACK_2, Action.NEUTRAL_ATTACK_3,
+    Action.LOOPING_ATTACK_START, Action.LOOPING_ATTACK_MIDDLE, Action.LOOPING_ATTACK_END,
+    Action.FTILT_HIGH, Action.FTILT_HIGH_MID, Action.FTILT_MID, Action.FTILT_LOW_MID,
+    Action.FTILT_LOW, Action.UPTILT, Action.DOWNTILT, Action.FSMASH_HIGH, Action.FSMASH_MID_HIGH,
+    Action.FSMASH_MID, Action.FSMASH_MID_LOW, Action.FSMASH_LOW, Action.UPSMASH, Action.DOWNSMASH,
+    Action.NAIR, Action.FAIR, Action.BAIR, Action.UAIR, Action.DAIR, Action.NAIR_LANDING,
+    Action.FAIR_LANDING, Action.BAIR_LANDING, Action.UAIR_LANDING, Action.DAIR_LANDING,
+    Action.LIFT_WAIT, Action.LIFT_WALK_1, Action.LIFT_WALK_2, Action.LIFT_TURN,
+    Action.GROUND_ATTACK_UP, Action.GETUP_ATTACK, Action.EDGE_ATTACK_SLOW, Action.EDGE_ATTACK_QUICK,
+    Action.THROW_UP, Action.THROW_DOWN, Action.THROW_BACK, Action.THROW_FORWARD
+)
+_SPECIAL_ATTACK_ACTIONS = (
+    Action.YOSHI_EGG, Action.KIRBY_YOSHI_EGG, Action.DOWN_REFLECT, Action.LASER_GUN_PULL,
+    Action.NEUTRAL_B_CHARGING, Action.NEUTRAL_B_ATTACKING, Action.NEUTRAL_B_FULL_CHARGE,
+    Action.NEUTRAL_B_CHARGING_AIR, Action.NEUTRAL_B_ATTACKING_AIR, Action.NEUTRAL_B_FULL_CHARGE_AIR,
+    Action.DOWN_B_GROUND_START, Action.DOWN_B_GROUND, Action.SHINE_TURN, Action.DOWN_B_STUN,
+    Action.DOWN_B_AIR, Action.UP_B_GROUND, Action.SHINE_RELEASE_AIR, Action.SWORD_DANCE_1,
+    Action.SWORD_DANCE_2_HIGH, Action.SWORD_DANCE_2_MID, Action.SWORD_DANCE_3_HIGH,
+    Action.SWORD_DANCE_3_MID, Action.SWORD_DANCE_3_LOW, Action.SWORD_DANCE_4_HIGH,
+    Action.SWORD_DANCE_4_MID, Action.SWORD_DANCE_4_LOW, Action.SWORD_DANCE_1_AIR,
+    Action.SWORD_DANCE_2_HIGH_AIR, Action.SWORD_DANCE_2_MID_AIR, Action.SWORD_DANCE_3_HIGH_AIR,
+    Action.SWORD_DANCE_3_MID_AIR, Action.SWORD_DANCE_3_LOW_AIR, Action.SWORD_DANCE_4_HIGH_AIR,
+    Action.SWORD_DANCE_4_MID_AIR, Action.SWORD_DANCE_4_LOW_AIR, Action.FOX_ILLUSION_START,
+    Action.FOX_ILLUSION, Action.FOX_ILLUSION_SHORTENED, Action.FIREFOX_WAIT_GROUND,
+    Action.FIREFOX_WAIT_AIR, Action.FIREFOX_GROUND, Action.FIREFOX_AIR, Action.UP_B_AIR,
+    Action.MARTH_COUNTER, Action.MARTH_COUNTER_FALLING, Action.NESS_SHEILD_START,
+    Action.NESS_SHEILD, Action.NESS_SHEILD_AIR, Action.NESS_SHEILD_AIR_END,
+    Action.DK_GROUND_POUND_START, Action.DK_GROUND_POUND, Action.DK_GROUND_POUND_END,
+    Action.KIRBY_BLADE_GROUND, Action.KIRBY_BLADE_UP, Action.KIRBY_BLADE_APEX,
+    Action.KIRBY_BLADE_DOWN, Action.KIRBY_STONE_FORMING_GROUND, Action.KIRBY_STONE_RESTING,
+    Action.KIRBY_STONE_RELEASE, Action.KIRBY_STONE_FORMING_AIR, Action.KIRBY_STONE_FALLING,
+    Action.KIRBY_STONE_UNFORMING
+)
+_ITEM_ATTACK_ACTIONS = (
+    Action.ITEM_THROW_LIGHT_FORWARD, Action.ITEM_THROW_LIGHT_BACK, Action.ITEM_THROW_LIGHT_HIGH,
+    Action.ITEM_THROW_LIGHT_LOW, Action.ITEM_THROW_LIGHT_DASH, Action.ITEM_THROW_LIGHT_DROP,
+    Action.ITEM_THROW_LIGHT_AIR_FORWARD, Action.ITEM_THROW_LIGHT_AIR_BACK,
+    Action.ITEM_THROW_LIGHT_AIR_HIGH, Action.ITEM_THROW_LIGHT_AIR_LOW,
+    Action.ITEM_THROW_HEAVY_FORWARD, Action.ITEM_THROW_HEAVY_BACK, Action.ITEM_THROW_HEAVY_HIGH,
+    Action.ITEM_THROW_HEAVY_LOW, Action.ITEM_THROW_LIGHT_SMASH_FORWARD,
+    Action.ITEM_THROW_LIGHT_SMASH_BACK, Action.ITEM_THROW_LIGHT_SMASH_UP,
+    Action.ITEM_THROW_LIGHT_SMASH_DOWN, Action.ITEM_THROW_LIGHT_AIR_SMASH_FORWARD,
+    Action.ITEM_THROW_LIGHT_AIR_SMASH_BACK, Action.ITEM_THROW_LIGHT_AIR_SMASH_HIGH,
+    Action.ITEM_THROW_LIGHT_AIR_SMASH_LOW, Action.ITEM_THROW_HEAVY_AIR_SMASH_FORWARD,
+    Action.ITEM_THROW_HEAVY_AIR_SMASH_BACK, Action.ITEM_THROW_HEAVY_AIR_SMASH_HIGH,
+    Action.ITEM_THROW_HEAVY_AIR_SMASH_LOW, Action.BEAM_SWORD_SWING_1, Action.BEAM_SWORD_SWING_2,
+    Action.BEAM_SWORD_SWING_3, Action.BEAM_SWORD_SWING_4, Action.BAT_SWING_1, Action.BAT_SWING_2,
+    Action.BAT_SWING_3, Action.BAT_SWING_4, Action.PARASOL_SWING_1, Action.PARASOL_SWING_2,
+    Action.PARASOL_SWING_3, Action.PARASOL_SWING_4, Action.FAN_SWING_1, Action.FAN_SWING_2,
+    Action.FAN_SWING_3, Action.FAN_SWING_4, Action.STAR_ROD_SWING_1, Action.STAR_ROD_SWING_2,
+    Action.STAR_ROD_SWING_3, Action.STAR_ROD_SWING_4, Action.LIP_STICK_SWING_1,
+    Action.LIP_STICK_SWING_2, Action.LIP_STICK_SWING_3, Action.LIP_STICK_SWING_4,
+    Action.ITEM_PARASOL_OPEN, Action.ITEM_PARASOL_FALL, Action.ITEM_PARASOL_FALL_SPECIAL,
+    Action.ITEM_PARASOL_DAMAGE_FALL, Action.GUN_SHOOT, Action.GUN_SHOOT_AIR, Action.GUN_SHOOT_EMPTY,
+    Action.GUN_SHOOT_AIR_EMPTY, Action.FIRE_FLOWER_SHOOT, Action.FIRE_FLOWER_SHOOT_AIR,
+    Action.ITEM_SCREW, Action.ITEM_SCREW_AIR, Action.DAMAGE_SCREW, Action.DAMAGE_SCREW_AIR,
+    Action.ITEM_SCOPE_START, Action.ITEM_SCOPE_RAPID, Action.ITEM_SCOPE_FIRE, Action.ITEM_SCOPE_END,
+    Action.ITEM_SCOPE_AIR_START, Action.ITEM_SCOPE_AIR_RAPID, Action.ITEM_SCOPE_AIR_FIRE,
+    Action.ITEM_SCOPE_AIR_END, Action.ITEM_SCOPE_START_EMPTY, Action.ITEM_SCOPE_RAPID_EMPTY,
+    Action.ITEM_SCOPE_FIRE_EMPTY, Action.ITEM_SCOPE_END_EMPTY, Action.ITEM_SCOPE_AIR_START_EMPTY,
+    Action.ITEM_SCOPE_AIR_RAPID_EMPTY, Action.ITEM_SCOPE_AIR_FIRE_EMPTY,
+    Action.ITEM_SCOPE_AIR_END_EMPTY, Action.WARP_STAR_JUMP, Action.WARP_STAR_FALL,
+    Action.HAMMER_WAIT, Action.HAMMER_WALK, Action.HAMMER_TURN, Action.HAMMER_KNEE_BEND,
+    Action.HAMMER_FALL, Action.HAMMER_JUMP, Action.HAMMER_LANDING
+)
+_GRABBING_ACTIONS = (
+    Action.GRAB, Action.GRAB_PULLING, Action.GRAB_RUNNING, Action.GRAB_RUNNING_PULLING,
+    Action.GRAB_WAIT, Action.GRAB_PUMMEL, Action.GRAB_BREAK, Action.THROW_FORWARD,
+    Action.THROW_BACK, Action.THROW_UP, Action.THROW_DOWN, Action.GRAB_PULLING_HIGH,
+    Action.LIFT_WAIT, Action.LIFT_WALK_1, Action.LIFT_WALK_2, Action.LIFT_TURN
+)
+_SHIELDING_ACTIONS = (
+    Action.SHIELD_START, Action.SHIELD, Action.SHIELD_STUN, Action.SHIELD_REFLECT
+)
+_FALLING_ACTIONS = (
+    Action.FALLING, Action.FALLING_FORWARD, Action.FALLING_BACKWARD, Action.FALLING_AERIAL,
+    Action.FALLING_AERIAL_FORWARD, Action.FALLING_AERIAL_BACKWARD, Action.DEAD_FALL,
+    Action.SPECIAL_FALL_FORWARD, Action.SPECIAL_FALL_BACK, Action.ITEM_PARASOL_FALL,
+    Action.ITEM_PARASOL_FALL_SPECIAL, Action.ITEM_PARASOL_DAMAGE_FALL, Action.PLATFORM_DROP,
+    Action.EDGE_JUMP_2_SLOW, Action.EDGE_JUMP_2_QUICK, Action.WARP_STAR_FALL, Action.HAMMER_FALL,
+    Action.PARASOL_FALLING
+)
+_JUMPING_ACTIONS = (
+    Action.KNEE_BEND, Action.JUMPING_FORWARD, Action.JUMPING_BACKWARD, Action.JUMPING_ARIAL_FORWARD,
+    Action.JUMPING_ARIAL_BACKWARD
+)
+
+_BMOVE_ACTIONS = tuple(action for action in Action
+                       if Action.LASER_GUN_PULL.value <= action.value and action != Action.UNKNOWN_ANIMATION)
+# Peach float and her float aerials, and her smashes
+_PEACH_BMOVE_ACTIONS = tuple(set(_BMOVE_ACTIONS) - {
+    Action.LASER_GUN_PULL, Action.NEUTRAL_B_CHARGING, Action.NEUTRAL_B_ATTACKING,
+    Action.SWORD_DANCE_2_MID, Action.SWORD_DANCE_1, Action.SWORD_DANCE_2_HIGH})
+# SWORD_DANCE_2_HIGH_AIR has always counted for every character, not just Link
+_ITEM_PULL_ACTIONS = (Action.ITEM_PICKUP_LIGHT, Action.ITEM_PICKUP_HEAVY, Action.SWORD_DANCE_2_HIGH_AIR)
+_GRAB_ACTIONS = (Action.GRAB, Action.GRAB_RUNNING)
+
+# Yea, I know. The sword dance isn't the right name
+_COMMAND_GRABS = {
+    Character.CPTFALCON: (Action.SWORD_DANCE_3_MID, Action.SWORD_DANCE_3_LOW),
+    Character.GANONDORF: (Action.SWORD_DANCE_3_MID, Action.SWORD_DANCE_3_LOW),
+    Character.BOWSER: (Action.NEUTRAL_B_ATTACKING_AIR, Action.SWORD_DANCE_3_MID),
+    Character.YOSHI: (Action.NEUTRAL_B_CHARGING_AIR, Action.SWORD_DANCE_2_MID),
+    Character.MEWTWO: (Action.SWORD_DANCE_2_MID, Action.SWORD_DANCE_3_HIGH),
+}
+
+IS_ROLL = ActionTable(_ROLL_ACTIONS, {
+    Character.MARTH: _ROLL_ACTIONS + (Action.MARTH_COUNTER, Action.MARTH_COUNTER_FALLING)})
+IS_SHIELD = ActionTable(_SHIELD_ACTIONS)
+IS_GRAB = ActionTable(_GRAB_ACTIONS, {character: _GRAB_ACTIONS + grabs for character, grabs in _COMMAND_GRABS.items()})
+IS_BMOVE = ActionTable(_BMOVE_ACTIONS, {Character.PEACH: _PEACH_BMOVE_ACTIONS})
+IS_DEAD = ActionTable(_DEAD_ACTIONS)
+IS_THROWN = ActionTable(_THROWN_ACTIONS)
+IS_DAMAGED = ActionTable(_DAMAGED_ACTIONS + _THROWN_ACTIONS)
+IS_GRABBED = ActionTable(_GRABBED_ACTIONS)
+HAS_MISTECHED = ActionTable(_MISTECH_ACTIONS)
+IS_NORMAL_ATTACKING = ActionTable(_NORMAL_ATTACK_ACTIONS)
+IS_SPECIAL_ATTACKING = ActionTable(set(_SPECIAL_ATTACK_ACTIONS) & set(_BMOVE_ACTIONS), {
+    Character.PEACH: set(_SPECIAL_ATTACK_ACTIONS) & set(_PEACH_BMOVE_ACTIONS)})
+IS_ITEM_ATTACKING = ActionTable(_ITEM_ATTACK_ACTIONS)
+IS_GRABBING = ActionTable(_GRABBING_ACTIONS)
+IS_SHIELDING = ActionTable(_SHIELDING_ACTIONS)
+IS_FALLING = ActionTable(_FALLING_ACTIONS)
+IS_ITEM_PULLING = ActionTable(_ITEM_PULL_ACTIONS, {
+    Character.LINK: _ITEM_PULL_ACTIONS + (Action.SWORD_DANCE_1_AIR,),
+    Character.PEACH: _ITEM_PULL_ACTIONS + (Action.SWORD_DANCE_3_HIGH,)})
+IS_JUMPING = ActionTable(_JUMPING_ACTIONS)
+# The parts of is_hit() and is_actionable() that only depend on the action
+_HIT_ACTION = ActionTable(_DAMAGED_ACTIONS + _THROWN_ACTIONS + _HIT_ACTIONS)
+_INACTIONABLE_ACTION = ActionTable(_DEAD_ACTIONS + _DAMAGED_ACTIONS + _THROWN_ACTIONS + _HIT_ACTIONS +
+                                   _INACTIONABLE_ACTIONS)
+
+ACTION_TABLES = {
+    "is_roll": IS_ROLL, "is_shield": IS_SHIELD, "is_grab": IS_GRAB, "is_bmove": IS_BMOVE,
+    "is_dead": IS_DEAD, "is_thrown": IS_THROWN, "is_damaged": IS_DAMAGED, "is_grabbed": IS_GRABBED,
+    "has_misteched": HAS_MISTECHED, "is_normal_attacking": IS_NORMAL_ATTACKING,
+    "is_special_attacking": IS_SPECIAL_ATTACKING, "is_item_attacking": IS_ITEM_ATTACKING,
+    "is_grabbing": IS_GRABBING, "is_shielding": IS_SHIELDING, "is_falling": IS_FALLING,
+    "is_item_pulling": IS_ITEM_PULLING, "is_jumping": IS_JUMPING,
+}
+"""The ActionTable behind each FrameData method of the same name. See FrameData.action_mask()"""
+
+def _crossed_platforms(platforms, dtype, cx, cy, dx, dy):
+    """FrameData._intersect() of every platform against every segment CD, all at once
+
+    The platforms' corners are plain numbers, so every term of _intersect() that only
+    involves them is worked out in Python first, and then cast, just like the loop does.
+
+    Args:
+        platforms (list): Tuples of (height, left, right), from get_platforms()
+        dtype (np.dtype): Precision of the segments
+        cx, cy, dx, dy (np.ndarray): Ends of the segments, C to D
+
+    Returns:
+        np.ndarray of bool, shape (platforms, segments)
+    """
+    height, left, right, width, flat, lowest, highest = (
+        np.array(column, dtype=dtype)[:, np.newaxis] for column in zip(*(
+            (height, left, right, right - left, height - height, min(left, right), max(left, right))
+            for height, left, right in platforms)))
+    # AB is the platform. All of _intersect()'s orientation checks, spelled out
+    c_above, d_above = cy - height, dy - height
+    c_past, d_past = cx - left, dx - left
+    ccw_acd = d_above * c_past > c_above * d_past
+    ccw_bcd = d_above * (cx - right) > c_above * (dx - right)
+    ccw_abc = c_above * width > flat * c_past
+    ccw_abd = d_above * width > flat * d_past
+    crossed = (ccw_acd != ccw_bcd) & (ccw_abc != ccw_abd)
+
+    for px, py, above, past in ((cx, cy, c_above, c_past), (dx, dy, d_above, d_past)):
+        # An end of CD lying on the platform
+        crossed |= (flat * past == above * width) & \
+            (lowest <= px) & (px <= highest) & (height <= py) & (py <= height)
+    for corner in (left, right):
+        # A corner of the platform lying on CD
+        crossed |= ((dy - cy) * (corner - cx) == (height - cy) * (dx - cx)) & \
+            (np.minimum(cx, dx) <= corner) & (corner <= np.maximum(cx, dx)) & \
+            (np.minimum(cy, dy) <= height) & (height <= np.maximum(cy, dy))
+    return crossed
+
+JIGGLYPUFF_DJ_SPEEDS = (1.186, 1.186, 1.296, 1.406, 1.526, 1.586)
+"""Initial vertical speed of Jigglypuff's next double jump, by jumps_left. 5 or more uses the last"""
+
+def _rise(speed, gravity):
+    """Height gained, and frames taken, rising from the given vertical speed until it runs out
+
+    Gravity is constant, so the speed on each frame is an arithmetic series: speed, speed - gravity, ...
+    """
+    if speed <= 0:
+        return 0, 0
+    frames = math.ceil(speed / gravity)
+    return frames * speed - gravity * frames * (frames - 1) / 2, frames
+
+def _slide(speed, slowdown, frames):
+    """Slide for up to `frames` frames, losing `slowdown` speed at the start of each
+
+    Returns:
+        (distance, speed left, whether the slide stopped before the frames ran out)
+    """
+    moving = max(math.floor(speed / slowdown), 0)
+    stopped = moving < frames
+    if stopped:
+        frames = moving
+    return frames * speed - slowdown * frames * (frames + 1) / 2, speed - slowdown * frames, stopped
+
+# Memoizing the physics simulations
+#   Each cached FrameData method gets a key function, with the same arguments as the
+#   method, that picks out everything its result depends on. `quantize` rounds positions
+#   and speeds, so nearly identical states from one frame to the next share an entry.
+
+def _in_range_key(quantize, attacker, defender, stage):
+    return (attacker.character.value, attacker.action.value, attacker.action_frame, attacker.facing,
+            attacker.on_ground, quantize(attacker.position.x), quantize(attacker.position.y),
+            quantize(attacker.speed_ground_x_self), quantize(attacker.speed_air_x_self),
+            quantize(attacker.speed_y_self), defender.character.value, quantize(defender.position.x),
+            quantize(defender.position.y), stage.value)
+
+def _project_hit_location_key(quantize, gamestate, player, frames=-1, y_margin=0.0, collide_below_platforms=False):
+    if frames == -1:
+        frames = player.hitstun_frames_left
+    return (gamestate.stage.value, player.character.value, player.action.value, player.on_ground,
+            bool(player.hitstun_frames_left), frames, quantize(player.position.x), quantize(player.position.y),
+            quantize(player.speed_x_attack), quantize(player.speed_y_attack), quantize(player.speed_y_self),
+            y_margin, collide_below_platforms)
+
+def _roll_end_position_key(quantize, gamestate, player):
+    return (gamestate.stage.value, player.character.value, player.action.value, player.action_frame,
+            player.facing, quantize(player.position.x), quantize(player.position.y))
+
+def _slide_distance_key(quantize, player, initspeed, frames):
+    return (player.character.value, player.action.value, player.action_frame, quantize(initspeed), frames)
+
+CACHED_METHODS = {
+    "in_range": _in_range_key,
+    "project_hit_location": _project_hit_location_key,
+    "roll_end_position": _roll_end_position_key,
+    "slide_distance": _slide_distance_key,
+}
+"""The FrameData methods that FrameData.enable_cache() memoizes, and how each one's key is made"""
+
+class PhysicsCache:
+    """ A bounded memo of FrameData's physics simulations, evicting the least recently used
+
+    Positions and speeds in the keys are rounded to `digits` decimal places. So a lookup
+    can return the result for a very slightly different state than the one asked about.
+    See FrameData.enable_cache()
+    """
+    def __init__(self, maxsize=4096, digits=2):
+        """
+        Args:
+            maxsize (int): Most results to keep
+            digits (int): Decimal places to round positions and speeds to, in the keys
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.digits = digits
+        self.hits = 0
+        """(int): Calls answered from the cache"""
+        self.misses = 0
+        """(int): Calls that had to run the simulation"""
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def quantize(self, value):
+        """Round a position or speed for use in a key"""
+        return round(float(value), self.digits)
+
+    def wrap(self, name, function, key):
+        """Returns a memoized version of function
+
+        Args:
+            name (str): Name of the method, to tell its entries apart. See invalidate()
+            function (callable): The method to memoize
+            key (callable): Takes quantize() and the method's arguments, returns a hashable key
+        """
+        entries = self._entries
+        quantize = self.quantize
+
+        @functools.wraps(function)
+        def cached(*args, **kwargs):
+            cache_key = (name,) + key(quantize, *args, **kwargs)
+            try:
+                result = entries[cache_key]
+            except KeyError:
+                self.misses += 1
+                result = entries[cache_key] = function(*args, **kwargs)
+                if len(entries) > self.maxsize:
+                    entries.popitem(last=False)
+                return result
+            self.hits += 1
+            entries.move_to_end(cache_key)
+            return result
+        return cached
+
+    def invalidate(self, name=None):
+        """Forget cached results, such as after changing characterdata
+
+        Args:
+            name (str): Only forget the results of this method, such as "in_range". None for all of them
+        """
+        if name is None:
+            self._entries.clear()
+            return
+        for cache_key in [cache_key for cache_key in self._entries if cache_key[0] == name]:
+            del self._entries[cache_key]
+
+    def clear(self):
+        """Forget every result, and reset the hit and miss counts"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
 class FrameData:
     """Set of helper functions and data structures for knowing Melee frame data
 
@@ -23,13 +747,7 @@ class FrameData:
     def __init__(self, write=False):
         if write:
             self.csvfile = open('framedata.csv', 'a')
-            fieldnames = ['character', 'action', 'frame',
-                          'hitbox_1_status', 'hitbox_1_size', 'hitbox_1_x', 'hitbox_1_y',
-                          'hitbox_2_status', 'hitbox_2_size', 'hitbox_2_x', 'hitbox_2_y',
-                          'hitbox_3_status', 'hitbox_3_size', 'hitbox_3_x', 'hitbox_3_y',
-                          'hitbox_4_status', 'hitbox_4_size', 'hitbox_4_x', 'hitbox_4_y',
-                          'locomotion_x', 'locomotion_y', 'iasa', 'facing_changed', 'projectile',
-                          'intangible']
+            fieldnames = ['character', 'action', 'frame'] + FRAME_COLUMNS
             self.writer = csv.DictWriter(self.csvfile, fieldnames=fieldnames)
             self.writer.writeheader()
             self.rows = []
@@ -44,40 +762,13 @@ class FrameData:
             self.prevprojectilecount = {}
 
         #Read the existing framedata
-        path = os.path.dirname(os.path.realpath(__file__))
-        self.framedata = defaultdict(lambda: defaultdict(lambda: defaultdict(dict)))
-        with open(path + "/framedata.csv") as csvfile:
-            # A list of dicts containing the frame data
-            csvreader = list(csv.DictReader(csvfile))
-            # Build a series of nested dicts for faster read access
-            for frame in csvreader:
-                # Pull out the character, action, and frame
-                character = Character(int(frame["character"]))
-                action = Action(int(frame["action"]))
-                action_frame = int(frame["frame"])
-                self.framedata[character][action][action_frame] = \
-                    {"hitbox_1_status": frame["hitbox_1_status"] == "True", \
-                    "hitbox_1_size": float(frame["hitbox_1_size"]), \
-                    "hitbox_1_x": float(frame["hitbox_1_x"]), \
-                    "hitbox_1_y": float(frame["hitbox_1_y"]), \
-                    "hitbox_2_status": frame["hitbox_2_status"] == "True", \
-                    "hitbox_2_size": float(frame["hitbox_2_size"]), \
-                    "hitbox_2_x": float(frame["hitbox_2_x"]), \
-                    "hitbox_2_y": float(frame["hitbox_2_y"]), \
-                    "hitbox_3_status": frame["hitbox_3_status"] == "True", \
-                    "hitbox_3_size": float(frame["hitbox_3_size"]), \
-                    "hitbox_3_x": float(frame["hitbox_3_x"]), \
-                    "hitbox_3_y": float(frame["hitbox_3_y"]), \
-                    "hitbox_4_status": frame["hitbox_4_status"] == "True", \
-                    "hitbox_4_size": float(frame["hitbox_4_size"]), \
-                    "hitbox_4_x": float(frame["hitbox_4_x"]), \
-                    "hitbox_4_y": float(frame["hitbox_4_y"]), \
-                    "locomotion_x": float(frame["locomotion_x"]), \
-                    "locomotion_y": float(frame["locomotion_y"]), \
-                    "iasa": frame["iasa"] == "True", \
-                    "facing_changed": frame["facing_changed"] == "True", \
-                    "projectile": frame["projectile"] == "True", \
-                    "intangible": frame["intangible"] == "True"}
+        self._columns = load_framedata()
+        self._framedata = None
+        self._summaries = _summarize(self._columns)
+        self._arrays, self._spans = _densify(self._columns)
+        self._attack_tables = {}
+        self.cache = None
+        """(PhysicsCache): The memo of physics results, if enabled. See enable_cache()"""
 
         #read the character data csv
         self.characterdata = dict()
@@ -91,35 +782,108 @@ class FrameData:
                     line[key] = float(value)
                 self.characterdata[Character(line["CharacterIndex"])] = line
 
-    def is_grab(self, character, action):
-        """For the given character, is the supplied action a grab?
+        # How high and for how long each character's double jump rises, by jumps_left. See _dj_rise()
+        self._dj_rises = {}
+        for character, characterdata in self.characterdata.items():
+            if character == Character.JIGGLYPUFF:
+                speeds = JIGGLYPUFF_DJ_SPEEDS
+            else:
+                # With no jumps left, it's the jump they're already in. Worked out as it happens
+                speeds = (None,) + (characterdata["InitDJSpeed"],) * 5
+            self._dj_rises[character] = [None if speed is None else _rise(speed, characterdata["Gravity"])
+                                         for speed in speeds]
+
+    @property
+    def arrays(self):
+        """(FrameArrays): All of the frame data, as dense numpy arrays. See action_frames()"""
+        return self._arrays
+
+    def action_frames(self, character, action, first=None, last=None):
+        """The dense frame data of an action, as views into `arrays`
+
+        Row i is action frame `first + i`. Missing frames have `present` False.
 
         Args:
             character (enums.Character): The character we're interested in
             action (enums.Action): The action we're interested in
+            first (int): First action frame to include. None for the start of the action
+            last (int): Last action frame to include. None for the end of the action
 
-        This includes command grabs, such as Bowser's claw. Not just Z-grabs."""
-        if action in [Action.GRAB, Action.GRAB_RUNNING]:
-            return True
+        Returns:
+            FrameArrays, empty if there are no such frames
+        """
+        span = self._spans.get((character, action))
+        if span is None:
+            return self._arrays[0:0]
+        offset, first_frame, last_frame = span
+        first = first_frame if first is None else max(first, first_frame)
+        last = last_frame if last is None else min(last, last_frame)
+        if last < first:
+            return self._arrays[0:0]
+        return self._arrays[offset + first - first_frame:offset + last - first_frame + 1]
+
+    @property
+    def framedata(self):
+        """(dict): Nested dicts of every frame, as framedata[character][action][action_frame][column].
+            Built the first time it's used, since most queries don't need it"""
+        if self._framedata is None:
+            self._framedata = _frames_to_dicts(self._columns)
+        return self._framedata
+
+    def __getstate__(self):
+        # The nested dicts are big and can be rebuilt from the columns
+        state = self.__dict__.copy()
+        state["_framedata"] = None
+        # The memoized methods are closures. They get wrapped again on the other side
+        for name in CACHED_METHODS:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.cache is not None:
+            self._wrap_cached(self.cache)
+
+    def enable_cache(self, maxsize=4096, digits=2):
+        """Memoize in_range(), project_hit_location(), roll_end_position() and slide_distance()
+
+        Bots tend to ask these the same questions, about nearly the same states, frame
+        after frame. With the cache on, a repeated question is a dict lookup instead of
+        a simulation. Positions and speeds are rounded to `digits` decimal places to
+        make the keys, so answers can be for a state that's very slightly different.
 
-        # Yea, I know. The sword dance isn't the right name
-        if character in [Character.CPTFALCON, Character.GANONDORF] and \
-                action in [Action.SWORD_DANCE_3_MID, Action.SWORD_DANCE_3_LOW]:
-            return True
+        Args:
+            maxsize (int): Most results to keep. The least recently used go first
+            digits (int): Decimal places to round positions and speeds to
 
-        if character == Character.BOWSER and \
-                action in [Action.NEUTRAL_B_ATTACKING_AIR, Action.SWORD_DANCE_3_MID]:
-            return True
+        Returns:
+            PhysicsCache: The cache, for its hit and miss counts, and invalidate()
+        """
+        self.disable_cache()
+        self.cache = PhysicsCache(maxsize, digits)
+        self._wrap_cached(self.cache)
+        return self.cache
+
+    def disable_cache(self):
+        """Stop memoizing, and drop the cache"""
+        for name in CACHED_METHODS:
+            self.__dict__.pop(name, None)
+        self.cache = None
+
+    def _wrap_cached(self, cache):
+        # Instance attributes shadow the methods, so internal calls go through the cache too
+        for name, key in CACHED_METHODS.items():
+            setattr(self, name, cache.wrap(name, getattr(type(self), name).__get__(self), key))
 
-        if character == Character.YOSHI and \
-                action in [Action.NEUTRAL_B_CHARGING_AIR, Action.SWORD_DANCE_2_MID]:
-            return True
+    def is_grab(self, character, action):
+        """For the given character, is the supplied action a grab?
 
-        if character == Character.MEWTWO and \
-                action in [Action.SWORD_DANCE_2_MID, Action.SWORD_DANCE_3_HIGH]:
-            return True
+        Args:
+            character (enums.Character): The character we're interested in
+            action (enums.Action): The action we're interested in
 
-        return False
+        This includes command grabs, such as Bowser's claw. Not just Z-grabs."""
+        return IS_GRAB(action, character)
 
     def is_roll(self, character, action):
         """For a given character, is the supplied action a roll?
@@ -134,24 +898,7 @@ class FrameData:
             character (enums.Character): The character we're interested in
             action (enums.Action): The action we're interested in
         """
-        # Marth counter
-        if character == Character.MARTH and action == Action.MARTH_COUNTER:
-            return True
-        if character == Character.MARTH and action == Action.MARTH_COUNTER_FALLING:
-            return True
-
-        # Turns out that the actions we'd call a "roll" are fairly few. Let's just
-        # hardcode them since it's just more cumbersome to do otherwise
-        rolls = [Action.SPOTDODGE, Action.ROLL_FORWARD, Action.ROLL_BACKWARD, \
-            Action.NEUTRAL_TECH, Action.FORWARD_TECH, Action.BACKWARD_TECH, \
-            Action.NEUTRAL_GETUP, Action.GROUND_GETUP, Action.TECH_MISS_UP, Action.TECH_MISS_DOWN, \
-            Action.LYING_GROUND_UP, Action.LYING_GROUND_DOWN, Action.GETUP_ATTACK, Action.GROUND_ATTACK_UP, \
-            Action.EDGE_GETUP_SLOW, Action.EDGE_GETUP_QUICK, Action.EDGE_ROLL_SLOW, \
-            Action.EDGE_ROLL_QUICK, Action.GROUND_ROLL_FORWARD_UP, Action.GROUND_ROLL_BACKWARD_UP, \
-            Action.GROUND_ROLL_FORWARD_DOWN, Action.GROUND_ROLL_BACKWARD_DOWN, Action.SHIELD_BREAK_FLY, \
-            Action.SHIELD_BREAK_FALL, Action.SHIELD_BREAK_DOWN_U, Action.SHIELD_BREAK_DOWN_D, \
-            Action.SHIELD_BREAK_STAND_U, Action.SHIELD_BREAK_STAND_D, Action.TAUNT_RIGHT, Action.TAUNT_LEFT, Action.SHIELD_BREAK_TEETER]
-        return action in rolls
+        return IS_ROLL(action, character)
 
     def is_bmove(self, character, action):
         """For a given character, is the supplied action a 'B-Move'
@@ -162,24 +909,7 @@ class FrameData:
             character (enums.Character): The character we're interested in
             action (enums.Action): The action we're interested in
         """
-        # If we're missing it, don't call it a B move
-        if action == Action.UNKNOWN_ANIMATION:
-            return False
-
-        # Don't consider peach float to be a B move
-        #   But the rest of her float aerials ARE
-        if character == Character.PEACH and action in [Action.LASER_GUN_PULL, \
-                Action.NEUTRAL_B_CHARGING, Action.NEUTRAL_B_ATTACKING]:
-            return False
-        # Peach smashes also shouldn't be B moves
-        if character == Character.PEACH and action in [Action.SWORD_DANCE_2_MID, Action.SWORD_DANCE_1, \
-                Action.SWORD_DANCE_2_HIGH]:
-            return False
-
-        if Action.LASER_GUN_PULL.value <= action.value:
-            return True
-
-        return False
+        return IS_BMOVE(action, character)
 
     #Returns boolean on if the given action is an attack (contains a hitbox)
     def is_attack(self, character, action):
@@ -191,13 +921,7 @@ class FrameData:
             character (enums.Character): The character we're interested in
             action (enums.Action): The action we're interested in
         """
-        # For each frame...
-        for _, frame in self.framedata[character][action].items():
-            if frame:
-                if frame['hitbox_1_status'] or frame['hitbox_2_status'] or frame['hitbox_3_status'] or \
-                        frame['hitbox_4_status'] or frame['projectile']:
-                    return True
-        return False
+        return self.summary(character, action).is_attack
 
     def is_shield(self, action):
         """Is the given action a Shielding action?
@@ -205,7 +929,7 @@ class FrameData:
         Args:
             action (enums.Action): The action we're interested in
         """
-        return action in [Action.SHIELD, Action.SHIELD_START, Action.SHIELD_REFLECT, Action.SHIELD_STUN, Action.SHIELD_RELEASE]
+        return IS_SHIELD(action)
 
     def max_jumps(self, character):
         """ Returns the number of double-jumps the given character has.
@@ -282,20 +1006,11 @@ class FrameData:
             action_frame (int): The frame of the action we're interested in
         """
         attackrange = 0
-        lastframe = self.last_hitbox_frame(character, action)
-        for i in range(action_frame+1, lastframe+1):
-            attackingframe = self._getframe(character, action, i)
-            if attackingframe is None:
-                continue
-
-            if attackingframe['hitbox_1_status']:
-                attackrange = max(attackingframe["hitbox_1_size"] + attackingframe["hitbox_1_x"], attackrange)
-            if attackingframe['hitbox_2_status']:
-                attackrange = max(attackingframe["hitbox_2_size"] + attackingframe["hitbox_2_x"], attackrange)
-            if attackingframe['hitbox_3_status']:
-                attackrange = max(attackingframe["hitbox_3_size"] + attackingframe["hitbox_3_x"], attackrange)
-            if attackingframe['hitbox_4_status']:
-                attackrange = max(attackingframe["hitbox_4_size"] + attackingframe["hitbox_4_x"], attackrange)
+        frames = self.action_frames(character, action, action_frame+1,
+                                    self.last_hitbox_frame(character, action))
+        reach = np.where(frames.hitbox_status, frames.hitbox_size + frames.hitbox_x, -np.inf)
+        if frames.hitbox_status.any():
+            attackrange = max(float(reach.max()), attackrange)
         return attackrange
 
     def range_backward(self, character, action, action_frame):
@@ -310,22 +1025,86 @@ class FrameData:
             action_frame (int): The frame of the action we're interested in
         """
         attackrange = 0
-        lastframe = self.last_hitbox_frame(character, action)
-        for i in range(action_frame+1, lastframe+1):
-            attackingframe = self._getframe(character, action, i)
-            if attackingframe is None:
-                continue
-
-            if attackingframe['hitbox_1_status']:
-                attackrange = min(-attackingframe["hitbox_1_size"] + attackingframe["hitbox_1_x"], attackrange)
-            if attackingframe['hitbox_2_status']:
-                attackrange = min(-attackingframe["hitbox_2_size"] + attackingframe["hitbox_2_x"], attackrange)
-            if attackingframe['hitbox_3_status']:
-                attackrange = min(-attackingframe["hitbox_3_size"] + attackingframe["hitbox_3_x"], attackrange)
-            if attackingframe['hitbox_4_status']:
-                attackrange = min(-attackingframe["hitbox_4_size"] + attackingframe["hitbox_4_x"], attackrange)
+        frames = self.action_frames(character, action, action_frame+1,
+                                    self.last_hitbox_frame(character, action))
+        reach = np.where(frames.hitbox_status, -frames.hitbox_size + frames.hitbox_x, np.inf)
+        if frames.hitbox_status.any():
+            attackrange = min(float(reach.min()), attackrange)
         return abs(attackrange)
 
+    def _attack_path(self, present, locomotion_x, locomotion_y, attacker, stage, dtype):
+        """Where the attacker will be at the end of each frame, for one or more rows of action frames
+
+        Follows the same movement rules as in_range() always has, one frame at a time: the
+        animation's locomotion if it has any, otherwise friction on the ground, or gravity
+        in the air until landing on the stage. The running totals are built with
+        cumulative sums, which add in the same order as a loop, so the results match it exactly.
+
+        Args:
+            present, locomotion_x, locomotion_y (np.ndarray): Shape (rows, frames). Each row
+                is a separate action, all starting from the attacker's current state
+
+        Returns:
+            (np.ndarray, np.ndarray): x and y of the attacker, in the same shape
+        """
+        rows, count = present.shape
+        characterdata = self.characterdata[attacker.character]
+        friction = characterdata["Friction"]
+        gravity = characterdata["Gravity"]
+        termvelocity = characterdata["TerminalVelocity"]
+
+        # Frames without locomotion move by the character's own physics. Missing frames don't move at all
+        physics = present & (locomotion_x == 0) & (locomotion_y == 0)
+        locomotion_x = np.where(physics, 0, locomotion_x).astype(dtype)
+        locomotion_y = np.where(physics, 0, locomotion_y).astype(dtype)
+
+        def running(start, steps):
+            totals = np.empty((rows, count + 1), dtype=dtype)
+            totals[:, 0] = start
+            totals[:, 1:] = steps
+            return np.add.accumulate(totals, axis=1)
+
+        def ground_speeds(speed_x, grounded):
+            """Speed on each frame, slowing down by friction on the grounded physics frames"""
+            step = -friction if speed_x > 0 else friction
+            speeds = running(speed_x, np.where(grounded, step, 0))[:, 1:]
+            return np.maximum(speeds, 0) if speed_x > 0 else np.minimum(speeds, 0)
+
+        position_x = np.asarray(attacker.position.x, dtype=dtype)
+        position_y = np.asarray(attacker.position.y, dtype=dtype)
+        if attacker.on_ground:
+            speeds = ground_speeds(attacker.speed_ground_x_self, physics)
+            path_x = running(position_x, np.where(physics, speeds, locomotion_x))[:, 1:]
+            path_y = running(position_y, locomotion_y)[:, 1:]
+            return path_x, path_y
+
+        speed_x = attacker.speed_air_x_self
+        speeds_y = running(attacker.speed_y_self, np.where(physics, -gravity, 0))[:, 1:]
+        speeds_y = np.maximum(speeds_y, dtype.type(-termvelocity))
+        path_y = running(position_y, np.where(physics, speeds_y, locomotion_y))[:, 1:]
+        air_steps_x = np.where(physics, speed_x, locomotion_x)
+        path_x = running(position_x, air_steps_x)
+        before_x, path_x = path_x[:, :-1], path_x[:, 1:]
+
+        # Did we hit the ground on any of these frames? If so, the rest are on the ground
+        falling = physics & (path_y <= 0)
+        if not falling.any():
+            return path_x, path_y
+        lands = falling & (np.abs(before_x) < stages.EDGE_GROUND_POSITION[stage])
+        landed = lands.any(axis=1, keepdims=True)
+        if not landed.any():
+            return path_x, path_y
+        landing = np.argmax(lands, axis=1)[:, np.newaxis]
+        frame = np.arange(count)
+        after = landed & (frame > landing)
+        # Up to the landing, the same steps as in the air. Then friction takes over, and
+        #   the height starts again from exactly 0
+        speeds = ground_speeds(speed_x, physics & after)
+        ground_steps_x = np.where(physics, speeds, locomotion_x)
+        path_x = running(position_x, np.where(after, ground_steps_x, air_steps_x))[:, 1:]
+        ground_y = running(0, np.where(after, locomotion_y, 0))[:, 1:]
+        path_y = np.where(after | (landed & (frame == landing)), ground_y, path_y)
+        return path_x, path_y
 
     def in_range(self, attacker, defender, stage):
         """Calculates if an attack is in range of a given defender
@@ -344,109 +1123,126 @@ class FrameData:
             at the x,y coordinates of the player (adjusted up a little to be centered)
         """
         lastframe = self.last_hitbox_frame(attacker.character, attacker.action)
+        frames = self.action_frames(attacker.character, attacker.action, attacker.action_frame+1, lastframe)
+        # Only frames with a hitbox out can hit. (But then all 4 hitboxes count)
+        active = np.flatnonzero(frames.hitbox_status.any(axis=1))
+        if len(active) == 0:
+            return 0
 
         # Adjust the defender's hurtbox up a little, to be more centered.
         #   the game keeps y coordinates based on the bottom of a character, not
         #   their center. So we need to move up by one radius of the character's size
         defender_size = float(self.characterdata[defender.character]["size"])
-        defender_y = defender.y + defender_size
+        defender_y = defender.position.y + defender_size
+        dtype = np.result_type(attacker.position.x, attacker.position.y, defender.position.x, defender_y)
+
+        # Where the attacker will be on each frame
+        attacker_x, attacker_y = self._attack_path(
+            frames.present[np.newaxis], frames.locomotion_x[np.newaxis], frames.locomotion_y[np.newaxis],
+            attacker, stage, dtype)
+        attacker_x, attacker_y = attacker_x[0], attacker_y[0]
+
+        hitbox_x = frames.hitbox_x[active]
+        # Flip the horizontal hitboxes around if we're facing left
+        if not attacker.facing:
+            hitbox_x = -hitbox_x
+        hitbox_x = hitbox_x.astype(dtype) + attacker_x[active, np.newaxis]
+        hitbox_y = frames.hitbox_y[active].astype(dtype) + attacker_y[active, np.newaxis]
+
+        # Now see if any of the hitboxes are in range
+        distance = np.sqrt(((hitbox_x - defender.position.x)**2 + (hitbox_y - defender_y)**2).astype(np.float64))
+        hits = np.flatnonzero((distance < defender_size + frames.hitbox_size[active]).any(axis=1))
+        if len(hits) == 0:
+            return 0
+        return int(frames.frame[active[hits[0]]])
 
-        # Running totals of how far the attacker will travel each frame
-        attacker_x = attacker.position.x
-        attacker_y = attacker.position.y
+    def _attack_table(self, character):
+        """The attack actions of a character, with where their rows are in `arrays`
 
-        onground = attacker.on_ground
+        Returns:
+            (list of enums.Action, np.ndarray, np.ndarray, np.ndarray): The actions, and the
+                offset, first frame and last hitbox frame of each
+        """
+        table = self._attack_tables.get(character)
+        if table is None:
+            actions, offsets, firsts, lasts = [], [], [], []
+            for (span_character, action), (offset, first_frame, _) in self._spans.items():
+                summary = self.summary(span_character, action)
+                if span_character == character and summary.is_attack:
+                    actions.append(action)
+                    offsets.append(offset)
+                    firsts.append(first_frame)
+                    lasts.append(summary.last_hitbox_frame)
+            table = (actions, np.array(offsets, dtype=np.int64), np.array(firsts, dtype=np.int64),
+                     np.array(lasts, dtype=np.int64))
+            self._attack_tables[character] = table
+        return table
+
+    def hitting_moves(self, attacker, defender, stage, max_frames=60, actions=None):
+        """Which of the attacker's moves would hit the defender, if they started them right now
+
+        Works like in_range() for every attack action of the attacker's character at
+        once, as if each one were starting this frame from the attacker's current
+        position, speed and facing. Much faster than calling in_range() per action.
 
-        attacker_speed_x = 0
-        if onground:
-            attacker_speed_x = attacker.speed_ground_x_self
-        else:
-            attacker_speed_x = attacker.speed_air_x_self
-        attacker_speed_y = attacker.speed_y_self
+        Args:
+            attacker (gamestate.PlayerState): The attacking player
+            defender (gamestate.PlayerState): The defending player
+            stage (enums.Stage): The stage being played on
+            max_frames (int): Only consider hits in the first this many frames of each action
+            actions (list of enums.Action): Only consider these actions. None for every attack
 
-        friction = self.characterdata[attacker.character]["Friction"]
-        gravity = self.characterdata[attacker.character]["Gravity"]
-        termvelocity = self.characterdata[attacker.character]["TerminalVelocity"]
+        Returns:
+            list of (enums.Action, int, float): Each action that would hit, the action frame
+                it first hits on, and the margin: how far the deepest hitbox is inside the
+                defender's hurtbox on that frame. Earliest hits first, then the biggest margin
 
-        for i in range(attacker.action_frame+1, lastframe+1):
-            attackingframe = self._getframe(attacker.character, attacker.action, i)
-            if attackingframe is None:
-                continue
+        Note:
+            The defender is treated the same as in in_range(), with a single hurtbox
+        """
+        all_actions, offsets, firsts, lasts = self._attack_table(attacker.character)
+        if actions is not None:
+            wanted = set(actions)
+            keep = np.array([action in wanted for action in all_actions], dtype=bool)
+            all_actions = [action for action in all_actions if action in wanted]
+            offsets, firsts, lasts = offsets[keep], firsts[keep], lasts[keep]
+        lasts = np.minimum(lasts, max_frames)
+        if len(all_actions) == 0 or lasts.max() < 1:
+            return []
+
+        # One row per action, one column per action frame from 1 on
+        frame = np.arange(1, int(lasts.max()) + 1)
+        valid = (frame >= firsts[:, np.newaxis]) & (frame <= lasts[:, np.newaxis])
+        rows = np.where(valid, offsets[:, np.newaxis] + frame - firsts[:, np.newaxis], 0)
+        arrays = self._arrays
+        present = arrays.present[rows] & valid
+        locomotion_x = np.where(valid, arrays.locomotion_x[rows], 0)
+        locomotion_y = np.where(valid, arrays.locomotion_y[rows], 0)
+        active = arrays.hitbox_status[rows].any(axis=2) & valid
+        if not active.any():
+            return []
 
-            # Figure out how much the attaker will be moving this frame
-            #   Is there any locomotion in the animation? If so, use that
-            locomotion_x = float(attackingframe["locomotion_x"])
-            locomotion_y = float(attackingframe["locomotion_y"])
-            if locomotion_y == 0 and locomotion_x == 0:
-                # There's no locomotion, so let's figure out how the attacker will be moving...
-                #   Are they on the ground or in the air?
-                if onground:
-                    attacker_speed_y = 0
-                    # Slow down the speed by the character's friction, then apply it
-                    if attacker_speed_x > 0:
-                        attacker_speed_x = max(0, attacker_speed_x - friction)
-                    else:
-                        attacker_speed_x = min(0, attacker_speed_x + friction)
-                    attacker_x += attacker_speed_x
-                # If attacker is in tha air...
-                else:
-                    # First consider vertical movement. They will decelerate towards the stage
-                    attacker_speed_y = max(-termvelocity, attacker_speed_y - gravity)
-                    # NOTE Assume that the attacker will keep moving how they currently are
-                    # If they do move halfway, then this will re-calculate later runs
-
-                    attacker_y += attacker_speed_y
-                    # Did we hit the ground this frame? If so, let's make some changes
-                    if attacker_y <= 0 and abs(attacker_x) < stages.EDGE_GROUND_POSITION[stage]:
-                        # TODO: Let's consider A moves that cancel when landing
-                        attacker_y = 0
-                        attacker_speed_y = 0
-                        onground = True
-
-                    attacker_x += attacker_speed_x
-            else:
-                attacker_x += locomotion_x
-                attacker_y += locomotion_y
-
-            if attackingframe['hitbox_1_status'] or attackingframe['hitbox_2_status'] or \
-                    attackingframe['hitbox_3_status'] or attackingframe['hitbox_4_status']:
-                # Calculate the x and y positions of all 4 hitboxes for this frame
-                hitbox_1_x = float(attackingframe["hitbox_1_x"])
-                hitbox_1_y = float(attackingframe["hitbox_1_y"]) + attacker_y
-                hitbox_2_x = float(attackingframe["hitbox_2_x"])
-                hitbox_2_y = float(attackingframe["hitbox_2_y"]) + attacker_y
-                hitbox_3_x = float(attackingframe["hitbox_3_x"])
-                hitbox_3_y = float(attackingframe["hitbox_3_y"]) + attacker_y
-                hitbox_4_x = float(attackingframe["hitbox_4_x"])
-                hitbox_4_y = float(attackingframe["hitbox_4_y"]) + attacker_y
-
-                # Flip the horizontal hitboxes around if we're facing left
-                if not attacker.facing:
-                    hitbox_1_x *= -1
-                    hitbox_2_x *= -1
-                    hitbox_3_x *= -1
-                    hitbox_4_x *= -1
-
-                hitbox_1_x += attacker_x
-                hitbox_2_x += attacker_x
-                hitbox_3_x += attacker_x
-                hitbox_4_x += attacker_x
-
-                # Now see if any of the hitboxes are in range
-                distance1 = math.sqrt((hitbox_1_x - defender.position.x)**2 + (hitbox_1_y - defender_y)**2)
-                distance2 = math.sqrt((hitbox_2_x - defender.position.x)**2 + (hitbox_2_y - defender_y)**2)
-                distance3 = math.sqrt((hitbox_3_x - defender.position.x)**2 + (hitbox_3_y - defender_y)**2)
-                distance4 = math.sqrt((hitbox_4_x - defender.position.x)**2 + (hitbox_4_y - defender_y)**2)
-
-                if distance1 < defender_size + float(attackingframe["hitbox_1_size"]):
-                    return i
-                if distance2 < defender_size + float(attackingframe["hitbox_2_size"]):
-                    return i
-                if distance3 < defender_size + float(attackingframe["hitbox_3_size"]):
-                    return i
-                if distance4 < defender_size + float(attackingframe["hitbox_4_size"]):
-                    return i
-        return 0
+        defender_size = float(self.characterdata[defender.character]["size"])
+        defender_y = defender.position.y + defender_size
+        dtype = np.result_type(attacker.position.x, attacker.position.y, defender.position.x, defender_y)
+        attacker_x, attacker_y = self._attack_path(present, locomotion_x, locomotion_y, attacker, stage, dtype)
+
+        hitbox_x = arrays.hitbox_x[rows]
+        if not attacker.facing:
+            hitbox_x = -hitbox_x
+        hitbox_x = hitbox_x.astype(dtype) + attacker_x[..., np.newaxis]
+        hitbox_y = arrays.hitbox_y[rows].astype(dtype) + attacker_y[..., np.newaxis]
+        distance = np.sqrt(((hitbox_x - defender.position.x)**2 + (hitbox_y - defender_y)**2).astype(np.float64))
+        margin = np.where(active[..., np.newaxis], defender_size + arrays.hitbox_size[rows] - distance, -np.inf)
+        margin = margin.max(axis=2)
+
+        hits = margin > 0
+        hit = hits.any(axis=1)
+        first_hit = np.argmax(hits, axis=1)
+        results = [(all_actions[i], int(frame[first_hit[i]]), float(margin[i, first_hit[i]]))
+                   for i in np.flatnonzero(hit)]
+        results.sort(key=lambda result: (result[1], -result[2]))
+        return results
 
     def dj_height(self, character_state):
         """Returns the height the character's double jump will take them.
@@ -465,29 +1261,7 @@ class FrameData:
             # This isn't exact. But it's close
             return 33.218964577 * (1 - (character_state.action_frame / 60))
 
-        gravity = self.characterdata[character_state.character]["Gravity"]
-        initdjspeed = self.characterdata[character_state.character]["InitDJSpeed"]
-        if character_state.jumps_left == 0:
-            initdjspeed = character_state.speed_y_self - gravity
-
-        if character_state.character == Character.JIGGLYPUFF:
-            if character_state.jumps_left >= 5:
-                initdjspeed = 1.586
-            if character_state.jumps_left == 4:
-                initdjspeed = 1.526
-            if character_state.jumps_left == 3:
-                initdjspeed = 1.406
-            if character_state.jumps_left == 2:
-                initdjspeed = 1.296
-            if character_state.jumps_left <= 1:
-                initdjspeed = 1.186
-
-        distance = 0
-
-        while initdjspeed > 0:
-            distance += initdjspeed
-            initdjspeed -= gravity
-        return distance
+        return self._dj_rise(character_state)[0]
 
     def frames_until_dj_apex(self, character_state):
         """Return the number of frames it takes for the character to reach the apex of
@@ -502,33 +1276,61 @@ class FrameData:
         if character_state.character == Character.PEACH:
             return 1
 
-        gravity = self.characterdata[character_state.character]["Gravity"]
-        initdjspeed = self.characterdata[character_state.character]["InitDJSpeed"]
-        if character_state.jumps_left == 0:
-            initdjspeed = character_state.speed_y_self - gravity
-
-        if character_state.character == Character.JIGGLYPUFF:
-            if character_state.jumps_left >= 5:
-                initdjspeed = 1.586
-            if character_state.jumps_left == 4:
-                initdjspeed = 1.526
-            if character_state.jumps_left == 3:
-                initdjspeed = 1.406
-            if character_state.jumps_left == 2:
-                initdjspeed = 1.296
-            if character_state.jumps_left <= 1:
-                initdjspeed = 1.186
-
-        frames = 0
-        while initdjspeed > 0:
-            frames += 1
-            initdjspeed -= gravity
-        return frames
+        return self._dj_rise(character_state)[1]
+
+    def _dj_rise(self, character_state):
+        """(height, frames) of the rise of the player's double jump, or of the one they're in"""
+        rises = self._dj_rises[character_state.character]
+        jumps_left = min(character_state.jumps_left, 5)
+        rise = rises[jumps_left if jumps_left >= 0 else 1]
+        if rise is None:
+            gravity = self.characterdata[character_state.character]["Gravity"]
+            rise = _rise(float(character_state.speed_y_self) - gravity, gravity)
+        return rise
+
+    def summary(self, character, action):
+        """Returns the ActionSummary of the given action. O(1), unlike scanning the frames
+
+        Args:
+            character (enums.Character): The character we're interested in
+            action (enums.Action): The action we're interested in
+        """
+        return self._summaries.get((character, action), _NO_ACTION)
+
+    def action_mask(self, predicate, actions, characters=None):
+        """Answers one of the action questions (such as is_dead) for a whole array of actions at once
+
+        Args:
+            predicate (str): Name of the FrameData method to answer. One of ACTION_TABLES
+            actions (array of int): Action values, such as a column of a replay
+            characters (array of int): Character values, the same shape as actions. Needed
+                for the questions with character specific answers, like is_grab
+
+        Returns:
+            np.ndarray of bool, the same shape as actions
+
+        Note:
+            is_hit() and is_actionable() also depend on hitstun and the action frame, so
+            they aren't available here
+        """
+        table = ACTION_TABLES.get(predicate)
+        if table is None:
+            raise ValueError(f"Can't classify actions in bulk by {predicate!r}. "
+                             f"Use one of: {', '.join(ACTION_TABLES)}")
+        return table.mask(actions, characters)
+
+    def _frames(self, character, action):
+        """Returns the dict of frames of the given action, without adding empty entries to framedata"""
+        actions = self.framedata.get(character)
+        if actions is None:
+            return {}
+        return actions.get(action, {})
 
     def _getframe(self, character, action, action_frame):
         """Returns a raw frame dict for the specified frame """
-        if self.framedata[character][action][action_frame]:
-            return self.framedata[character][action][action_frame]
+        frame = self._frames(character, action).get(action_frame)
+        if frame:
+            return frame
         return None
 
     def last_frame(self, character, action):
@@ -539,9 +1341,7 @@ class FrameData:
             character (enums.Character): The character we're calculating for
             action (enums.Action): The action we're calculating for
         """
-        if not self.framedata[character][action]:
-            return -1
-        return max(self.framedata[character][action].keys())
+        return self.summary(character, action).frame_count
 
     def last_roll_frame(self, character, action):
         """Returns the last frame of the roll
@@ -566,16 +1366,17 @@ class FrameData:
         try:
             #TODO: Take current momentum into account
             # Loop through each frame in the attack
-            for action_frame in self.framedata[player.character][player.action]:
+            frames = self._frames(player.character, player.action)
+            for action_frame, frame in frames.items():
                 # Only care about frames that haven't happened yet
                 if action_frame > player.action_frame:
-                    distance += self.framedata[player.character][player.action][action_frame]["locomotion_x"]
+                    distance += frame["locomotion_x"]
 
             # We can derive the direction we're supposed to be moving by xor'ing a few things together...
             #   1) Current facing
             #   2) Facing changed in the frame data
             #   3) Is backwards roll
-            facingchanged = self.framedata[player.character][player.action][player.action_frame]["facing_changed"]
+            facingchanged = frames.get(player.action_frame, {})["facing_changed"]
             backroll = player.action in [Action.ROLL_BACKWARD, Action.GROUND_ROLL_BACKWARD_UP, \
                 Action.GROUND_ROLL_BACKWARD_DOWN, Action.BACKWARD_TECH]
             if not (player.facing ^ facingchanged ^ backroll):
@@ -609,18 +1410,7 @@ class FrameData:
             character (enums.Character): The character we're interested in
             action (enums.Action): The action we're interested in
         """
-        # Grab only the subset that have a hitbox
-        hitboxes = []
-        for action_frame, frame in self.framedata[character][action].items():
-            if frame:
-                #Does this frame have a hitbox?
-                if frame['hitbox_1_status'] or frame['hitbox_2_status'] \
-                    or frame['hitbox_3_status'] or frame['hitbox_4_status'] or \
-                        frame['projectile']:
-                    hitboxes.append(action_frame)
-        if not hitboxes:
-            return -1
-        return min(hitboxes)
+        return self.summary(character, action).first_hitbox_frame
 
     def hitbox_count(self, character, action):
         """Returns the number of hitboxes an attack has
@@ -633,34 +1423,13 @@ class FrameData:
            By this we mean is it a multihit attack? (Peach's down B?)
            or a single-hit attack? (Marth's fsmash?)
         """
-        # Grab only the subset that have a hitbox
-
         # This math doesn't work for Samus's UP_B
         #   Because the hitboxes are contiguous
         if character == Character.SAMUS and action in [Action.SWORD_DANCE_3_MID, Action.SWORD_DANCE_3_LOW]:
             return 7
         if character == Character.YLINK and action == Action.SWORD_DANCE_4_MID:
             return 10
-
-        hitboxes = []
-        for action_frame, frame in self.framedata[character][action].items():
-            if frame:
-                #Does this frame have a hitbox?
-                if frame['hitbox_1_status'] or frame['hitbox_2_status'] \
-                    or frame['hitbox_3_status'] or frame['hitbox_4_status'] or \
-                        frame['projectile']:
-                    hitboxes.append(action_frame)
-        if not hitboxes:
-            return 0
-        hashitbox = False
-        count = 0
-        # Every time we go from NOT having a hit box to having one, up the count
-        for i in range(1, max(hitboxes)+1):
-            hashitbox_new = i in hitboxes
-            if hashitbox_new and not hashitbox:
-                count += 1
-            hashitbox = hashitbox_new
-        return count
+        return self.summary(character, action).hitbox_count
 
     def iasa(self, character, action):
         """Returns the first frame of an attack that the character is interruptible (actionable)
@@ -671,19 +1440,7 @@ class FrameData:
             character (enums.Character): The character we're interested in
             action (enums.Action): The action we're interested in
         """
-        if not self.is_attack(character, action):
-            return -1
-        iasaframes = []
-        allframes = []
-        for action_frame, frame in self.framedata[character][action].items():
-            if frame:
-                #Does this frame have a hitbox?
-                allframes.append(action_frame)
-                if frame["iasa"]:
-                    iasaframes.append(action_frame)
-        if not iasaframes:
-            return max(allframes)
-        return min(iasaframes)
+        return self.summary(character, action).iasa
 
     def last_hitbox_frame(self, character, action):
         """Returns the last frame that a hitbox appears for a given action
@@ -695,18 +1452,7 @@ class FrameData:
             action (enums.Action): The action we're interested in
 
         """
-        # Grab only the subset that have a hitbox
-        hitboxes = []
-        for action_frame, frame in self.framedata[character][action].items():
-            if frame:
-                #Does this frame have a hitbox?
-                if frame['hitbox_1_status'] or frame['hitbox_2_status'] \
-                    or frame['hitbox_3_status'] or frame['hitbox_4_status'] or \
-                        frame['projectile']:
-                    hitboxes.append(action_frame)
-        if not hitboxes:
-            return -1
-        return max(hitboxes)
+        return self.summary(character, action).last_hitbox_frame
 
     def frame_count(self, character, action):
         """Returns the count of total frames in the given action.
@@ -715,13 +1461,8 @@ class FrameData:
             character (enums.Character): The character we're interested in
             action (enums.Action): The action we're interested in
         """
-        frames = []
-        for action_frame, _ in self.framedata[character][action].items():
-            frames.append(action_frame)
-        if not frames:
-            return -1
-        return max(frames)
-    
+        return self.summary(character, action).frame_count
+
     def first_intangible_frame(self, character, action):
         """Returns the first frame of an attack that the character is intangible
         
@@ -731,17 +1472,8 @@ class FrameData:
             character (enums.Character): The character we're interested in
             action (enums.Action): The action we're interested in
         """
-        # Grab only the subset that have intangibility
-        frames = []
-        for action_frame, frame in self.framedata[character][action].items():
-            if frame:
-                # Does this frame have intangibility?
-                if frame['intangible']:
-                    frames.append(action_frame)
-        if not frames:
-            return -1
-        return min(frames)
-    
+        return self.summary(character, action).first_intangible_frame
+
     def last_intangible_frame(self, character, action):
         """Returns the last frame of an attack that the character is intangible
         
@@ -751,16 +1483,7 @@ class FrameData:
             character (enums.Character): The character we're interested in
             action (enums.Action): The action we're interested in
         """
-        # Grab only the subset that have intangibility
-        frames = []
-        for action_frame, frame in self.framedata[character][action].items():
-            if frame:
-                # Does this frame have intangibility?
-                if frame['intangible']:
-                    frames.append(action_frame)
-        if not frames:
-            return -1
-        return max(frames)
+        return self.summary(character, action).last_intangible_frame
 
     def _cleanupcsv(self):
         """ Helper function to remove all the non-attacking, non-rolling, non-B move actions """
@@ -937,32 +1660,25 @@ class FrameData:
             initspeed (float): The character's starting speed
             frames (int): Maximum number of frames to calculate for
         """
-        normalfriction = self.characterdata[player.character]["Friction"]
-        friction = normalfriction
-        totaldistance = 0
-        walkspeed = self.characterdata[player.character]["MaxWalkSpeed"]
+        # The slowdown is constant within each phase of the slide, so each phase is an
+        #   arithmetic series that _slide() sums in one go
+        characterdata = self.characterdata[player.character]
+        friction = characterdata["Friction"]
         # Just the speed, not direction
-        absspeed = abs(initspeed)
-        multiplier = 1
-        for i in range(frames):
-            # Special case for these two damn animations, for some reason. Thanks melee
-            if player.action in [Action.TECH_MISS_UP]:
-                if player.action_frame + i < 18:
-                    friction = .051
-                    multiplier = 1
-                else:
-                    friction = normalfriction
+        absspeed = abs(float(initspeed))
+        if player.action == Action.TECH_MISS_UP:
+            # Special case for this damn animation, for some reason. Thanks melee
+            first_frames = min(max(18 - player.action_frame, 0), frames)
+            totaldistance, absspeed, stopped = _slide(absspeed, .051, first_frames)
+        else:
             # If we're sliding faster than the character's walk speed, then
             #   the slowdown is doubled
-            elif absspeed > walkspeed:
-                multiplier = 2
-            else:
-                multiplier = 1
-
-            absspeed -= friction * multiplier
-            if absspeed < 0:
-                break
-            totaldistance += absspeed
+            walkspeed = characterdata["MaxWalkSpeed"]
+            first_frames = min(max(math.ceil((absspeed - walkspeed) / (friction * 2)), 0), frames)
+            totaldistance, absspeed, stopped = _slide(absspeed, friction * 2, first_frames)
+        # Then plain friction for the rest
+        if not stopped:
+            totaldistance += _slide(absspeed, friction, frames - first_frames)[0]
         if initspeed < 0:
             totaldistance = -totaldistance
 
@@ -1191,6 +1907,107 @@ class FrameData:
 
         return position_x, position_y, init_frames
     
+    def project_hit_locations(self, gamestate, characters, position_x, position_y, speed_x, speed_y_attack,
+                              speed_y_self, frames, falling=True, y_margin=0.0, collide_below_platforms=False):
+        """project_hit_location() for many flights at once, such as every player, or every DI angle
+
+        All of the flights are advanced together a frame at a time, and checked against
+        every platform at once. Each one ends up exactly where project_hit_location()
+        would put it, given the same starting state.
+
+        Args:
+            gamestate (GameState): The current game state to use
+            characters (enums.Character or array of int): The character of every flight, or a
+                character value per flight
+            position_x, position_y (array of float): Where each flight starts
+            speed_x, speed_y_attack, speed_y_self (array of float): The starting speeds of each flight
+            frames (int or array of int): The number of frames to calculate each flight for
+            falling (bool or array of bool): Whether gravity applies. project_hit_location()
+                turns it off for players on the ground who aren't in a hit state
+            y_margin (float): As in project_hit_location()
+            collide_below_platforms (bool): As in project_hit_location()
+
+        Returns:
+            (np.ndarray, np.ndarray, np.ndarray): x, y coordinates of where each flight ends up,
+                plus frames until that position. Shaped like the inputs
+        """
+        position_x, position_y, speed_x, speed_y_attack, speed_y_self = np.broadcast_arrays(
+            position_x, position_y, speed_x, speed_y_attack, speed_y_self)
+        shape = position_x.shape
+        # Work in the precision of the inputs. Constants are cast to it, like Python numbers would be
+        dtype = np.result_type(position_x, position_y, speed_x, speed_y_attack, speed_y_self)
+        x, y, speed_x, speed_y_attack, speed_y_self = (np.array(value, dtype=dtype).ravel() for value in (
+            position_x, position_y, speed_x, speed_y_attack, speed_y_self))
+        count = len(x)
+        frames = np.broadcast_to(frames, shape).ravel()
+
+        if isinstance(characters, Character):
+            characters = characters.value
+        characters = np.broadcast_to(characters, shape).ravel()
+        gravity = np.empty(count, dtype=dtype)
+        termvelocity = np.empty(count, dtype=dtype)
+        for value in np.unique(characters).tolist():
+            characterdata = self.characterdata[Character(value)]
+            chosen = characters == value
+            gravity[chosen] = characterdata["Gravity"]
+            termvelocity[chosen] = -characterdata["TerminalVelocity"]
+        gravity[~np.broadcast_to(falling, shape).ravel()] = 0
+
+        horizontal_decay = np.empty(count, dtype=dtype)
+        vertical_decay = np.empty(count, dtype=dtype)
+        for i, (flight_x, flight_y) in enumerate(zip(speed_x.tolist(), speed_y_attack.tolist())):
+            angle = math.atan2(flight_x, flight_y)
+            horizontal_decay[i] = abs(0.051 * math.cos(-angle + (math.pi/2)))
+            vertical_decay[i] = abs(0.051 * math.sin(-angle + (math.pi/2)))
+
+        platforms = self.get_platforms(gamestate)
+        heights = np.array([platform[0] for platform in platforms], dtype=np.float64)
+        end_x, end_y, end_frame = np.zeros(count), np.zeros(count), frames.astype(np.int64)
+        done = np.zeros(count, dtype=bool)
+
+        def collide(flying, failsafe, check_below):
+            """Stop the flights that cross a platform this frame. Earlier platforms win, like the loop"""
+            checked = flying & ~done
+            if not platforms or not checked.any():
+                return
+            hits = _crossed_platforms(platforms, dtype, x, y + y_margin,
+                                      x + speed_x, y + speed_y_attack + speed_y_self) & checked
+            if check_below:
+                hits &= ~(y < heights[:, np.newaxis].astype(dtype))
+            hit = hits.any(axis=0)
+            # speed_x/2 to just assume we intersect half way through. This will be wrong, but close enough
+            end_x[hit] = (x + (speed_x/2))[hit]
+            end_y[hit] = heights[np.argmax(hits[:, hit], axis=0)]
+            end_frame[hit] = 181 - failsafe
+            done[hit] = True
+
+        # Check if initial frame is already intersecting with a platform
+        collide(np.ones(count, dtype=bool), 180, False)
+
+        # Always quit out after 180 iterations just in case
+        steps = np.minimum(frames, 180)
+        for step in range(int(steps.max(initial=0))):
+            flying = ~done & (step < steps)
+            if not flying.any():
+                break
+            # Collisions with platforms can only happen from above
+            collide(flying, 180 - step, not collide_below_platforms)
+            flying &= ~done
+
+            x = np.where(flying, x + speed_x, x)
+            y = np.where(flying, y + speed_y_attack + speed_y_self, y)
+            speed_y_self = np.where(flying, np.maximum(termvelocity, speed_y_self - gravity), speed_y_self)
+            speed_y_attack = np.where(flying, np.where(speed_y_attack > 0,
+                                                       np.maximum(0, speed_y_attack - vertical_decay),
+                                                       np.minimum(0, speed_y_attack + vertical_decay)), speed_y_attack)
+            speed_x = np.where(flying, np.where(speed_x > 0,
+                                                np.maximum(0, speed_x - horizontal_decay),
+                                                np.minimum(0, speed_x + horizontal_decay)), speed_x)
+
+        end_x[~done] = x[~done]
+        end_y[~done] = y[~done]
+        return end_x.reshape(shape), end_y.reshape(shape), end_frame.reshape(shape)
+
     def is_attacking(self, player):
         """Whether the player is in an attacking state"""
         return (
@@ -1318,437 +2135,69 @@ class FrameData:
     def is_actionable(self, player):
         """Whether the player is able to change their action
            in the current state"""
-        return (
-            not self.is_dead(player) and
-            not self.is_hit(player) and
-            not self.is_damaged(player) and
-            # TODO: Account for iasa special attacks
-            (not self.is_normal_attacking(player) or self.in_iasa_attack(player)) and
-            not player.action == Action.NOTHING_STATE and
-            not player.action == Action.ON_HALO_DESCENT and
-            not player.action == Action.DEAD_FALL and
-            not player.action == Action.SPECIAL_FALL_FORWARD and
-            not player.action == Action.SPECIAL_FALL_BACK and
-            not player.action == Action.TECH_MISS_UP and
-            not player.action == Action.GROUND_GETUP and
-            not player.action == Action.GROUND_ROLL_FORWARD_UP and
-            not player.action == Action.GROUND_ROLL_BACKWARD_UP and
-            not player.action == Action.TECH_MISS_DOWN and
-            not player.action == Action.NEUTRAL_GETUP and
-            not player.action == Action.GROUND_ROLL_FORWARD_DOWN and
-            not player.action == Action.GROUND_ROLL_BACKWARD_DOWN and
-            not player.action == Action.NEUTRAL_TECH and
-            not player.action == Action.FORWARD_TECH and
-            not player.action == Action.BACKWARD_TECH and
-            not player.action == Action.SHIELD_BREAK_FLY and
-            not player.action == Action.SHIELD_BREAK_FALL and
-            not player.action == Action.SHIELD_BREAK_DOWN_U and
-            not player.action == Action.SHIELD_BREAK_DOWN_D and
-            not player.action == Action.SHIELD_BREAK_STAND_U and
-            not player.action == Action.SHIELD_BREAK_STAND_D and
-            not player.action == Action.SHIELD_BREAK_TEETER and
-            not player.action == Action.ROLL_FORWARD and
-            not player.action == Action.ROLL_BACKWARD and
-            not player.action == Action.SPOTDODGE and
-            not player.action == Action.AIRDODGE and
-            not player.action == Action.EDGE_CATCHING and
-            not player.action == Action.EDGE_GETUP_SLOW and
-            not player.action == Action.EDGE_GETUP_QUICK and
-            not player.action == Action.EDGE_ROLL_SLOW and
-            not player.action == Action.EDGE_ROLL_QUICK and
-            not player.action == Action.EDGE_JUMP_1_SLOW and
-            not player.action == Action.EDGE_JUMP_2_SLOW and
-            not player.action == Action.EDGE_JUMP_1_QUICK and
-            not player.action == Action.EDGE_JUMP_2_QUICK and
-            not player.action == Action.TAUNT_RIGHT and
-            not player.action == Action.TAUNT_LEFT and
-            not player.action == Action.ENTRY and
-            not player.action == Action.ENTRY_START and
-            not player.action == Action.ENTRY_END and
-            not player.action == Action.LASER_GUN_PULL
-        )
+        action = player.action
+        if _INACTIONABLE_ACTION(action):
+            return False
+        # Tumbling is only a hit state while in hitstun
+        if player.hitstun_frames_left and action == Action.TUMBLING:
+            return False
+        # TODO: Account for iasa special attacks
+        return not IS_NORMAL_ATTACKING(action) or self.in_iasa_attack(player)
     
     def is_dead(self, player):
         """Whether the player is in a death state"""
-        return (
-            player.action == Action.DEAD_DOWN or
-            player.action == Action.DEAD_FLY or
-            player.action == Action.DEAD_FLY_SPLATTER or
-            player.action == Action.DEAD_FLY_SPLATTER_FLAT or
-            player.action == Action.DEAD_FLY_SPLATTER_FLAT_ICE or
-            player.action == Action.DEAD_FLY_STAR or
-            player.action == Action.DEAD_FLY_STAR_ICE or
-            player.action == Action.DEAD_LEFT or
-            player.action == Action.DEAD_RIGHT or
-            player.action == Action.DEAD_UP
-        )
+        return IS_DEAD(player.action)
 
     def is_thrown(self, player):
         """Whether the player is in a thrown state"""
-        return (
-            player.action == Action.THROWN_FORWARD or
-            player.action == Action.THROWN_BACK or
-            player.action == Action.THROWN_UP or
-            player.action == Action.THROWN_DOWN or
-            player.action == Action.THROWN_DOWN_2 or
-            player.action == Action.THROWN_KIRBY_STAR or
-            player.action == Action.THROWN_COPY_STAR or
-            player.action == Action.THROWN_KIRBY or
-            player.action == Action.BURY or
-            player.action == Action.DAMAGE_BIND or
-            player.action == Action.THROWN_MEWTWO or
-            player.action == Action.THROWN_MEWTWO_AIR
-        )
+        return IS_THROWN(player.action)
 
     def is_damaged(self, player):
         """Whether the player is in a damage state"""
-        return (
-            player.action == Action.DAMAGE_HIGH_1 or
-            player.action == Action.DAMAGE_HIGH_2 or
-            player.action == Action.DAMAGE_HIGH_3 or
-            player.action == Action.DAMAGE_NEUTRAL_1 or
-            player.action == Action.DAMAGE_NEUTRAL_2 or
-            player.action == Action.DAMAGE_NEUTRAL_3 or
-            player.action == Action.DAMAGE_LOW_1 or
-            player.action == Action.DAMAGE_LOW_2 or
-            player.action == Action.DAMAGE_LOW_3 or
-            player.action == Action.DAMAGE_AIR_1 or
-            player.action == Action.DAMAGE_AIR_2 or
-            player.action == Action.DAMAGE_AIR_3 or
-            player.action == Action.DAMAGE_SCREW or
-            player.action == Action.DAMAGE_SCREW_AIR or
-            player.action == Action.DAMAGE_FLY_HIGH or
-            player.action == Action.DAMAGE_FLY_NEUTRAL or
-            player.action == Action.DAMAGE_FLY_LOW or
-            player.action == Action.DAMAGE_FLY_TOP or
-            player.action == Action.DAMAGE_FLY_ROLL or
-            player.action == Action.LYING_GROUND_UP_HIT or
-            player.action == Action.DAMAGE_GROUND or
-            player.action == Action.PUMMELED_HIGH or
-            player.action == Action.GRAB_PUMMELED or
-            player.action == Action.DAMAGE_SONG or
-            player.action == Action.DAMAGE_SONG_WAIT or
-            player.action == Action.DAMAGE_SONG_RV or
-            player.action == Action.DAMAGE_BIND or
-            player.action == Action.DAMAGE_ICE or
-            player.action == Action.DAMAGE_ICE_JUMP or
-            self.is_thrown(player)
-        )
+        return IS_DAMAGED(player.action)
     
     def is_grabbed(self, player):
         """Whether the player is in a grabbed state"""
-        return (
-            player.action == Action.GRABBED or
-            player.action == Action.GRAB_PULL or
-            player.action == Action.GRAB_ESCAPE or
-            player.action == Action.GRAB_JUMP or
-            player.action == Action.GRAB_NECK or
-            player.action == Action.GRAB_FOOT or
-            player.action == Action.GRABBED_WAIT_HIGH
-        )
+        return IS_GRABBED(player.action)
     
     def has_misteched(self, player):
-        return (player.action == Action.TECH_MISS_UP or
-                player.action == Action.TECH_MISS_DOWN or
-                player.action == Action.LYING_GROUND_UP or
-                player.action == Action.LYING_GROUND_DOWN)
+        return HAS_MISTECHED(player.action)
     
     def is_hit(self, player):
         """Whether the player is in a hit state"""
-        return (
-            self.is_damaged(player) or
-            player.action == Action.SHIELD_STUN or
-            player.action == Action.BURY_WAIT or
-            player.action == Action.BURY_JUMP or
-            player.action == Action.DOWN_REFLECT or
-            player.action == Action.DOWN_B_STUN or
-            (player.hitstun_frames_left and
-             (self.is_damaged(player) or
-              player.action == Action.TUMBLING))
-        )
+        return _HIT_ACTION(player.action) or \
+            (player.hitstun_frames_left and player.action == Action.TUMBLING)
         
     def is_normal_attacking(self, player):
         """Whether the player is in an normal attack state"""
-        return (
-            player.action == Action.NEUTRAL_ATTACK_1 or
-            player.action == Action.NEUTRAL_ATTACK_2 or
-            player.action == Action.NEUTRAL_ATTACK_3 or
-            player.action == Action.LOOPING_ATTACK_START or
-            player.action == Action.LOOPING_ATTACK_MIDDLE or
-            player.action == Action.LOOPING_ATTACK_END or
-            player.action == Action.FTILT_HIGH or
-            player.action == Action.FTILT_HIGH_MID or
-            player.action == Action.FTILT_MID or
-            player.action == Action.FTILT_LOW_MID or
-            player.action == Action.FTILT_LOW or
-            player.action == Action.UPTILT or
-            player.action == Action.DOWNTILT or
-            player.action == Action.FSMASH_HIGH or
-            player.action == Action.FSMASH_MID_HIGH or
-            player.action == Action.FSMASH_MID or
-            player.action == Action.FSMASH_MID_LOW or
-            player.action == Action.FSMASH_LOW or
-            player.action == Action.UPSMASH or
-            player.action == Action.DOWNSMASH or
-            player.action == Action.NAIR or
-            player.action == Action.FAIR or
-            player.action == Action.BAIR or
-            player.action == Action.UAIR or
-            player.action == Action.DAIR or
-            player.action == Action.NAIR_LANDING or
-            player.action == Action.FAIR_LANDING or
-            player.action == Action.BAIR_LANDING or
-            player.action == Action.UAIR_LANDING or
-            player.action == Action.DAIR_LANDING or
-            player.action == Action.LIFT_WAIT or
-            player.action == Action.LIFT_WALK_1 or
-            player.action == Action.LIFT_WALK_2 or
-            player.action == Action.LIFT_TURN or
-            player.action == Action.GROUND_ATTACK_UP or
-            player.action == Action.GETUP_ATTACK or
-            player.action == Action.EDGE_ATTACK_SLOW or
-            player.action == Action.EDGE_ATTACK_QUICK or
-            player.action == Action.THROW_UP or
-            player.action == Action.THROW_DOWN or
-            player.action == Action.THROW_BACK or
-            player.action == Action.THROW_FORWARD
-        )
+        return IS_NORMAL_ATTACKING(player.action)
         
     def is_special_attacking(self, player):
         """Whether the player is in a special attack state"""
-        return (
-            self.is_bmove(player.character, player.action) and
-            (player.action == Action.YOSHI_EGG or
-            player.action == Action.KIRBY_YOSHI_EGG or
-            player.action == Action.DOWN_REFLECT or
-            player.action == Action.LASER_GUN_PULL or
-            player.action == Action.NEUTRAL_B_CHARGING or
-            player.action == Action.NEUTRAL_B_ATTACKING or
-            player.action == Action.NEUTRAL_B_FULL_CHARGE or
-            player.action == Action.NEUTRAL_B_CHARGING_AIR or
-            player.action == Action.NEUTRAL_B_ATTACKING_AIR or
-            player.action == Action.NEUTRAL_B_FULL_CHARGE_AIR or
-            player.action == Action.DOWN_B_GROUND_START or
-            player.action == Action.DOWN_B_GROUND or
-            player.action == Action.SHINE_TURN or
-            player.action == Action.DOWN_B_STUN or
-            player.action == Action.DOWN_B_AIR or
-            player.action == Action.UP_B_GROUND or
-            player.action == Action.SHINE_RELEASE_AIR or
-            player.action == Action.SWORD_DANCE_1 or
-            player.action == Action.SWORD_DANCE_2_HIGH or
-            player.action == Action.SWORD_DANCE_2_MID or
-            player.action == Action.SWORD_DANCE_3_HIGH or
-            player.action == Action.SWORD_DANCE_3_MID or
-            player.action == Action.SWORD_DANCE_3_LOW or
-            player.action == Action.SWORD_DANCE_4_HIGH or
-            player.action == Action.SWORD_DANCE_4_MID or
-            player.action == Action.SWORD_DANCE_4_LOW or
-            player.action == Action.SWORD_DANCE_1_AIR or
-            player.action == Action.SWORD_DANCE_2_HIGH_AIR or
-            player.action == Action.SWORD_DANCE_2_MID_AIR or
-            player.action == Action.SWORD_DANCE_3_HIGH_AIR or
-            player.action == Action.SWORD_DANCE_3_MID_AIR or
-            player.action == Action.SWORD_DANCE_3_LOW_AIR or
-            player.action == Action.SWORD_DANCE_4_HIGH_AIR or
-            player.action == Action.SWORD_DANCE_4_MID_AIR or
-            player.action == Action.SWORD_DANCE_4_LOW_AIR or
-            player.action == Action.FOX_ILLUSION_START or
-            player.action == Action.FOX_ILLUSION or
-            player.action == Action.FOX_ILLUSION_SHORTENED or
-            player.action == Action.FIREFOX_WAIT_GROUND or
-            player.action == Action.FIREFOX_WAIT_AIR or
-            player.action == Action.FIREFOX_GROUND or
-            player.action == Action.FIREFOX_AIR or
-            player.action == Action.UP_B_AIR or
-            player.action == Action.MARTH_COUNTER or
-            player.action == Action.MARTH_COUNTER_FALLING or
-            player.action == Action.NESS_SHEILD_START or
-            player.action == Action.NESS_SHEILD or
-            player.action == Action.NESS_SHEILD_AIR or
-            player.action == Action.NESS_SHEILD_AIR_END or
-            player.action == Action.DK_GROUND_POUND_START or
-            player.action == Action.DK_GROUND_POUND or
-            player.action == Action.DK_GROUND_POUND_END or
-            player.action == Action.KIRBY_BLADE_GROUND or
-            player.action == Action.KIRBY_BLADE_UP or
-            player.action == Action.KIRBY_BLADE_APEX or
-            player.action == Action.KIRBY_BLADE_DOWN or
-            player.action == Action.KIRBY_STONE_FORMING_GROUND or
-            player.action == Action.KIRBY_STONE_RESTING or
-            player.action == Action.KIRBY_STONE_RELEASE or
-            player.action == Action.KIRBY_STONE_FORMING_AIR or
-            player.action == Action.KIRBY_STONE_FALLING or
-            player.action == Action.KIRBY_STONE_UNFORMING)
-        )
+        return IS_SPECIAL_ATTACKING(player.action, player.character)
     
     def is_item_attacking(self, player):
         """Whether the player is in an item attack state"""
-        return (
-            player.action == Action.ITEM_THROW_LIGHT_FORWARD or
-            player.action == Action.ITEM_THROW_LIGHT_BACK or
-            player.action == Action.ITEM_THROW_LIGHT_HIGH or
-            player.action == Action.ITEM_THROW_LIGHT_LOW or
-            player.action == Action.ITEM_THROW_LIGHT_DASH or
-            player.action == Action.ITEM_THROW_LIGHT_DROP or
-            player.action == Action.ITEM_THROW_LIGHT_AIR_FORWARD or
-            player.action == Action.ITEM_THROW_LIGHT_AIR_BACK or
-            player.action == Action.ITEM_THROW_LIGHT_AIR_HIGH or
-            player.action == Action.ITEM_THROW_LIGHT_AIR_LOW or
-            player.action == Action.ITEM_THROW_HEAVY_FORWARD or
-            player.action == Action.ITEM_THROW_HEAVY_BACK or
-            player.action == Action.ITEM_THROW_HEAVY_HIGH or
-            player.action == Action.ITEM_THROW_HEAVY_LOW or
-            player.action == Action.ITEM_THROW_LIGHT_SMASH_FORWARD or
-            player.action == Action.ITEM_THROW_LIGHT_SMASH_BACK or
-            player.action == Action.ITEM_THROW_LIGHT_SMASH_UP or
-            player.action == Action.ITEM_THROW_LIGHT_SMASH_DOWN or
-            player.action == Action.ITEM_THROW_LIGHT_AIR_SMASH_FORWARD or
-            player.action == Action.ITEM_THROW_LIGHT_AIR_SMASH_BACK or
-            player.action == Action.ITEM_THROW_LIGHT_AIR_SMASH_HIGH or
-            player.action == Action.ITEM_THROW_LIGHT_AIR_SMASH_LOW or
-            player.action == Action.ITEM_THROW_HEAVY_AIR_SMASH_FORWARD or
-            player.action == Action.ITEM_THROW_HEAVY_AIR_SMASH_BACK or
-            player.action == Action.ITEM_THROW_HEAVY_AIR_SMASH_HIGH or
-            player.action == Action.ITEM_THROW_HEAVY_AIR_SMASH_LOW or
-            player.action == Action.BEAM_SWORD_SWING_1 or
-            player.action == Action.BEAM_SWORD_SWING_2 or
-            player.action == Action.BEAM_SWORD_SWING_3 or
-            player.action == Action.BEAM_SWORD_SWING_4 or
-            player.action == Action.BAT_SWING_1 or
-            player.action == Action.BAT_SWING_2 or
-            player.action == Action.BAT_SWING_3 or
-            player.action == Action.BAT_SWING_4 or
-            player.action == Action.PARASOL_SWING_1 or
-            player.action == Action.PARASOL_SWING_2 or
-            player.action == Action.PARASOL_SWING_3 or
-            player.action == Action.PARASOL_SWING_4 or
-            player.action == Action.FAN_SWING_1 or
-            player.action == Action.FAN_SWING_2 or
-            player.action == Action.FAN_SWING_3 or
-            player.action == Action.FAN_SWING_4 or
-            player.action == Action.STAR_ROD_SWING_1 or
-            player.action == Action.STAR_ROD_SWING_2 or
-            player.action == Action.STAR_ROD_SWING_3 or
-            player.action == Action.STAR_ROD_SWING_4 or
-            player.action == Action.LIP_STICK_SWING_1 or
-            player.action == Action.LIP_STICK_SWING_2 or
-            player.action == Action.LIP_STICK_SWING_3 or
-            player.action == Action.LIP_STICK_SWING_4 or
-            player.action == Action.ITEM_PARASOL_OPEN or
-            player.action == Action.ITEM_PARASOL_FALL or
-            player.action == Action.ITEM_PARASOL_FALL_SPECIAL or
-            player.action == Action.ITEM_PARASOL_DAMAGE_FALL or
-            player.action == Action.GUN_SHOOT or
-            player.action == Action.GUN_SHOOT_AIR or
-            player.action == Action.GUN_SHOOT_EMPTY or
-            player.action == Action.GUN_SHOOT_AIR_EMPTY or
-            player.action == Action.FIRE_FLOWER_SHOOT or
-            player.action == Action.FIRE_FLOWER_SHOOT_AIR or
-            player.action == Action.ITEM_SCREW or
-            player.action == Action.ITEM_SCREW_AIR or
-            player.action == Action.DAMAGE_SCREW or
-            player.action == Action.DAMAGE_SCREW_AIR or
-            player.action == Action.ITEM_SCOPE_START or
-            player.action == Action.ITEM_SCOPE_RAPID or
-            player.action == Action.ITEM_SCOPE_FIRE or
-            player.action == Action.ITEM_SCOPE_END or
-            player.action == Action.ITEM_SCOPE_AIR_START or
-            player.action == Action.ITEM_SCOPE_AIR_RAPID or
-            player.action == Action.ITEM_SCOPE_AIR_FIRE or
-            player.action == Action.ITEM_SCOPE_AIR_END or
-            player.action == Action.ITEM_SCOPE_START_EMPTY or
-            player.action == Action.ITEM_SCOPE_RAPID_EMPTY or
-            player.action == Action.ITEM_SCOPE_FIRE_EMPTY or
-            player.action == Action.ITEM_SCOPE_END_EMPTY or
-            player.action == Action.ITEM_SCOPE_AIR_START_EMPTY or
-            player.action == Action.ITEM_SCOPE_AIR_RAPID_EMPTY or
-            player.action == Action.ITEM_SCOPE_AIR_FIRE_EMPTY or
-            player.action == Action.ITEM_SCOPE_AIR_END_EMPTY or
-            player.action == Action.WARP_STAR_JUMP or
-            player.action == Action.WARP_STAR_FALL or
-            player.action == Action.HAMMER_WAIT or
-            player.action == Action.HAMMER_WALK or
-            player.action == Action.HAMMER_TURN or
-            player.action == Action.HAMMER_KNEE_BEND or
-            player.action == Action.HAMMER_FALL or
-            player.action == Action.HAMMER_JUMP or
-            player.action == Action.HAMMER_LANDING
-        )
+        return IS_ITEM_ATTACKING(player.action)
         
     def is_grabbing(self, player):
         """Whether the player is in a Z-grab state"""
-        return (
-            player.action == Action.GRAB or
-            player.action == Action.GRAB_PULLING or
-            player.action == Action.GRAB_RUNNING or
-            player.action == Action.GRAB_RUNNING_PULLING or
-            player.action == Action.GRAB_WAIT or
-            player.action == Action.GRAB_PUMMEL or
-            player.action == Action.GRAB_BREAK or
-            player.action == Action.THROW_FORWARD or
-            player.action == Action.THROW_BACK or
-            player.action == Action.THROW_UP or
-            player.action == Action.THROW_DOWN or
-            player.action == Action.GRAB_PULLING_HIGH or
-            player.action == Action.LIFT_WAIT or
-            player.action == Action.LIFT_WALK_1 or
-            player.action == Action.LIFT_WALK_2 or
-            player.action == Action.LIFT_TURN
-        )
+        return IS_GRABBING(player.action)
         
     def is_shielding(self, player):
-        return (
-            player.action == Action.SHIELD_START or
-            player.action == Action.SHIELD or
-            player.action == Action.SHIELD_STUN or
-            player.action == Action.SHIELD_REFLECT
-        )
+        return IS_SHIELDING(player.action)
         
     def is_falling(self, player):
         """Whether the player is in a fall state"""
-        return (
-            player.action == Action.FALLING or
-            player.action == Action.FALLING_FORWARD or
-            player.action == Action.FALLING_BACKWARD or
-            player.action == Action.FALLING_AERIAL or
-            player.action == Action.FALLING_AERIAL_FORWARD or
-            player.action == Action.FALLING_AERIAL_BACKWARD or
-            player.action == Action.DEAD_FALL or
-            player.action == Action.SPECIAL_FALL_FORWARD or
-            player.action == Action.SPECIAL_FALL_BACK or
-            player.action == Action.ITEM_PARASOL_FALL or
-            player.action == Action.ITEM_PARASOL_FALL_SPECIAL or
-            player.action == Action.ITEM_PARASOL_DAMAGE_FALL or
-            player.action == Action.PLATFORM_DROP or
-            player.action == Action.EDGE_JUMP_2_SLOW or
-            player.action == Action.EDGE_JUMP_2_QUICK or
-            player.action == Action.WARP_STAR_FALL or
-            player.action == Action.HAMMER_FALL or
-            player.action == Action.PARASOL_FALLING
-        )
+        return IS_FALLING(player.action)
     
     def is_item_pulling(self, player):
         """Whether the player is pulling out an item"""
-        player_char = player.character
-        player_action = player.action
-        return (
-            player_action == Action.ITEM_PICKUP_LIGHT or
-            player_action == Action.ITEM_PICKUP_HEAVY or
-            (
-                player_char == Character.LINK and
-                player_action == Action.SWORD_DANCE_1_AIR or
-                player_action == Action.SWORD_DANCE_2_HIGH_AIR
-            ) or
-            (
-                player_char == Character.PEACH and
-                player_action == Action.SWORD_DANCE_3_HIGH
-            )
-        )
+        return IS_ITEM_PULLING(player.action, player.character)
     
     def is_jumping(self, player):
-        return (player.action == Action.KNEE_BEND or
-                player.action == Action.JUMPING_FORWARD or
-                player.action == Action.JUMPING_BACKWARD or
-                player.action == Action.JUMPING_ARIAL_FORWARD or
-                player.action == Action.JUMPING_ARIAL_BACKWARD)
\ No newline at end of file
+        return IS_JUMPING(player.action)
+
+if __name__ == "__main__":
+    compile_framedata()
+    print("Wrote", CACHE_PATH)
@@ -1,18 +1,26 @@
 """ Gamestate is a single snapshot in time of the game that represents all necessary information
         to make gameplay decisions
 """
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 
 import numpy as np
 
 import melee
 from melee import enums
+from melee.features import DEFAULT_SCHEMA
 
 @dataclass
 class Position:
     """Dataclass for position types. Has (x, y) coords."""
-    x: np.float32 = np.float32(0)
-    y: np.float32 = np.float32(0)
+    # Slotted, so the fields can't have class-level defaults. They're in __init__ instead,
+    #   which dataclass leaves alone
+    __slots__ = ('x', 'y')
+    x: np.float32
+    y: np.float32
+
+    def __init__(self, x: np.float32 = np.float32(0), y: np.float32 = np.float32(0)):
+        self.x = x
+        self.y = y
 
 Speed = Position
 Cursor = Position
@@ -20,16 +28,24 @@ Cursor = Position
 @dataclass
 class ECB:
     """ECBs (Environmental collision box) info. It's a diamond with four points that define it."""
-    top: Position = field(default_factory=Position)
-    bottom: Position = field(default_factory=Position)
-    left: Position = field(default_factory=Position)
-    right: Position = field(default_factory=Position)
+    __slots__ = ('top', 'bottom', 'left', 'right')
+    top: Position
+    bottom: Position
+    left: Position
+    right: Position
+
+    def __init__(self, top: Position = None, bottom: Position = None,
+                 left: Position = None, right: Position = None):
+        self.top = top if top is not None else Position()
+        self.bottom = bottom if bottom is not None else Position()
+        self.left = left if left is not None else Position()
+        self.right = right if right is not None else Position()
 
 class GameState(object):
     """Represents the state of a running game of Melee at a given moment in time"""
     __slots__ = ('frame', 'stage', 'menu_state', 'submenu', 'player', 'players', 'projectiles', 'stage_select_cursor_x',
                  'stage_select_cursor_y', 'ready_to_start', 'distance', 'menu_selection', '_newframe', 'playedOn', 'startAt',
-                 'consoleNick', 'is_teams', '_fod_platform_left', '_fod_platform_right', 'custom')
+                 'consoleNick', 'is_teams', '_fod_platform_left', '_fod_platform_right', 'custom', 'geometry')
     def __init__(self):
         self.frame = -10000
         """int: The current frame number. Monotonically increases. Can be negative."""
@@ -69,14 +85,122 @@ class GameState(object):
         """(float): The current height of FoD platforms"""        
         self.custom = dict()
         """(dict): Custom fields to be added by the user"""
+        self.geometry = None
+        """(gamestate.Geometry): Distances and relative positions between every pair of characters.
+                Filled in by the Console's "geometry" pipeline stage, which is off by default.
+                Turn it on with console.pipeline.enable("geometry")"""
 
-class PlayerState(object):
-    """ Represents the state of a single player """
-    __slots__ = ('character', 'character_selected', 'x', 'y', 'percent', 'shield_strength', 'stock', 'facing',
+    def to_array(self, schema=None, out=None):
+        """Write this gamestate into a flat float32 feature vector
+
+        Args:
+            schema (features.FeatureSchema): The layout to use. Defaults to features.DEFAULT_SCHEMA
+            out (np.ndarray): Preallocated buffer of at least schema.size elements to write into.
+                If None, a new one is allocated. Reuse one buffer to avoid allocating every frame.
+
+        Returns:
+            The feature vector (out, if given)
+        """
+        if schema is None:
+            schema = DEFAULT_SCHEMA
+        if out is None:
+            out = schema.empty()
+        return schema.write(self, out)
+
+    def nearest_opponent(self, port):
+        """The port of the closest opponent to the given port's character
+
+        Opponents are everyone not on the same team (or everyone else, outside of teams).
+        Nana counts as well, so an Ice Climbers player is as close as the closer climber.
+
+        Args:
+            port (int): Controller port of the player to measure from
+
+        Returns:
+            The opponent's port, or None if there are no opponents
+        """
+        return (self.geometry or Geometry(self)).nearest(port, teammates=False)
+
+    def nearest_teammate(self, port):
+        """The port of the closest teammate to the given port's character, not counting its own Nana
+
+        Returns:
+            The teammate's port, or None if there are no teammates
+        """
+        return (self.geometry or Geometry(self)).nearest(port, teammates=True)
+
+class Geometry:
+    """ Distances and relative positions between every pair of characters in a gamestate
+
+    Nana gets her own row and column. All the matrices are indexed the same as `keys`,
+    so for characters i and j: dx[i, j] is how far j is to the right of i.
+    """
+    __slots__ = ('keys', 'ports', 'x', 'y', 'dx', 'dy', 'distance', 'facing', 'teammates')
+
+    def __init__(self, gamestate):
+        """Compute the geometry of a gamestate"""
+        self.keys = []
+        """(list of (int, bool)): The (port, is_nana) of each row and column"""
+        x, y, facing, teams = [], [], [], []
+        for port, player in gamestate.players.items():
+            for character, nana in ((player, False), (player.nana, True)):
+                if character is None:
+                    continue
+                self.keys.append((port, nana))
+                x.append(character.position.x)
+                y.append(character.position.y)
+                facing.append(character.facing)
+                teams.append(character.team_id)
+        self.ports = np.array([port for port, _ in self.keys], dtype=np.int64)
+        """(np.ndarray): The port of each row"""
+        self.x = np.array(x, dtype=np.float32)
+        self.y = np.array(y, dtype=np.float32)
+        self.dx = self.x[np.newaxis, :] - self.x[:, np.newaxis]
+        """(np.ndarray): N x N. dx[i, j] = x[j] - x[i]"""
+        self.dy = self.y[np.newaxis, :] - self.y[:, np.newaxis]
+        """(np.ndarray): N x N. dy[i, j] = y[j] - y[i]"""
+        self.distance = np.hypot(self.dx, self.dy)
+        """(np.ndarray): N x N. Euclidian distance between each pair"""
+        direction = np.where(np.array(facing, dtype=bool), 1, -1).astype(np.int8)
+        self.facing = np.sign(self.dx).astype(np.int8) * direction[:, np.newaxis]
+        """(np.ndarray): N x N. 1 if i is facing towards j, -1 if facing away, 0 if level with it"""
+        self.teammates = self.ports[:, np.newaxis] == self.ports[np.newaxis, :]
+        """(np.ndarray): N x N bool. Whether i and j are on the same side (including themselves)"""
+        if gamestate.is_teams:
+            teams = np.array(teams, dtype=np.int64)
+            self.teammates |= teams[:, np.newaxis] == teams[np.newaxis, :]
+
+    def index(self, port, nana=False):
+        """The row of the given port's character (or its Nana)"""
+        return self.keys.index((port, nana))
+
+    def nearest(self, port, teammates=False):
+        """The port of the closest opponent (or teammate) to the given port's character
+
+        Returns:
+            The port, or None if there isn't one
+        """
+        try:
+            row = self.index(port)
+        except ValueError:
+            return None
+        if teammates:
+            candidates = self.teammates[row] & (self.ports != port)
+        else:
+            candidates = ~self.teammates[row]
+        if not candidates.any():
+            return None
+        distances = np.where(candidates, self.distance[row], np.inf)
+        return int(self.ports[np.argmin(distances)])
+
+class _BasePlayerState(object):
+    """ The fields PlayerState and LeanPlayerState share: everything but the deprecated
+        x, y and ecb_* duplicates, which each of them provides its own way """
+    __slots__ = ('character', 'character_selected', 'percent', 'shield_strength', 'stock', 'facing',
                  'action', 'action_frame', 'invulnerable', 'hitlag_left', 'hitstun_frames_left',
                  'jumps_left', 'on_ground', 'speed_air_x_self', 'speed_y_self', 'speed_x_attack', 'speed_y_attack',
                  'speed_ground_x_self', 'cursor_x', 'cursor_y', 'coin_down', 'controller_status', 'off_stage', 'iasa',
-                 'moonwalkwarning', 'controller_state', 'ecb_bottom', 'ecb_top', 'ecb_left', 'ecb_right',
+                 'moonwalkwarning', 'controller_state',
                  'costume', 'cpu_level', 'is_holding_cpu_slider', 'nana', 'position', 'cursor', 'ecb', 'nickName', 'connectCode',
                  'displayName', 'team_id', 'is_powershield')
     def __init__(self):
@@ -91,10 +215,6 @@ class PlayerState(object):
         self.character_selected = enums.Character.UNKNOWN_CHARACTER
         self.position = Position()
         """(Position): x, y character position"""
-        self.x = 0
-        """(float): DEPRECATED. Use `position` instead. Will be removed in 1.0.0. The character's X position"""
-        self.y = 0
-        """(float): DEPRECATED. Use `position` instead. Will be removed in 1.0.0. The character's Y position"""
         self.percent = 0
         """(int): The player's damage"""
         self.shield_strength = 60.
@@ -152,14 +272,7 @@ class PlayerState(object):
         self.controller_state = melee.ControllerState()
         """(controller.ControllerState): What buttons were pressed for this character"""
         self.ecb = ECB()
-        self.ecb_right = (0, 0)
-        """(float, float): Right edge of the ECB. (x, y) offset from player's center."""
-        self.ecb_left = (0, 0)
-        """(float, float): Left edge of the ECB. (x, y) offset from player's center."""
-        self.ecb_top = (0, 0)
-        """(float, float): Top edge of the ECB. (x, y) offset from player's center."""
-        self.ecb_bottom = (0, 0)
-        """(float, float): Bottom edge of the ECB. (x, y) offset from player's center."""
+        """(ECB): The player's ECB. Each point is an (x, y) offset from the player's center."""
         self.costume = 0
         """(int): Index for which costume the player is wearing"""
         self.cpu_level = False
@@ -175,21 +288,50 @@ class PlayerState(object):
         self.team_id = 0
         """(int): The team ID of the player. This is different than costume, and only relevant during teams."""
 
-class Projectile:
-    """ Represents the state of a projectile (items, lasers, etc...) """
+    def to_array(self, schema=None, out=None):
+        """Write this player into a flat float32 feature vector
+
+        Args:
+            schema (features.FeatureSchema): The layout to use. Defaults to features.DEFAULT_SCHEMA
+            out (np.ndarray): Preallocated buffer of at least schema.player_size elements.
+                If None, a new one is allocated.
+
+        Returns:
+            The feature vector (out, if given)
+        """
+        if schema is None:
+            schema = DEFAULT_SCHEMA
+        if out is None:
+            out = np.zeros(schema.player_size, dtype=np.float32)
+        schema.write_player(self, out)
+        return out
+
+class PlayerState(_BasePlayerState):
+    """ Represents the state of a single player """
+    __slots__ = ('x', 'y', 'ecb_bottom', 'ecb_top', 'ecb_left', 'ecb_right')
     def __init__(self):
-        self.position = Position()
-        """(Position): x, y projectile position"""
+        super().__init__()
         self.x = 0
-        """(float): DEPRECATED. Use `position` instead. Will be removed in 1.0.0. Projectile's X position"""
+        """(float): DEPRECATED. Use `position` instead. Will be removed in 1.0.0. The character's X position"""
         self.y = 0
-        """(float): DEPRECATED. Use `position` instead. Will be removed in 1.0.0. Projectile's Y position"""
+        """(float): DEPRECATED. Use `position` instead. Will be removed in 1.0.0. The character's Y position"""
+        self.ecb_right = (0, 0)
+        """(float, float): Right edge of the ECB. (x, y) offset from player's center."""
+        self.ecb_left = (0, 0)
+        """(float, float): Left edge of the ECB. (x, y) offset from player's center."""
+        self.ecb_top = (0, 0)
+        """(float, float): Top edge of the ECB. (x, y) offset from player's center."""
+        self.ecb_bottom = (0, 0)
+        """(float, float): Bottom edge of the ECB. (x, y) offset from player's center."""
+
+class _BaseProjectile:
+    """ The fields Projectile and LeanProjectile share. See _BasePlayerState """
+    __slots__ = ('position', 'speed', 'owner', 'type', 'frame', 'subtype')
+    def __init__(self):
+        self.position = Position()
+        """(Position): x, y projectile position"""
         self.speed = Speed()
         """(Position): x, y projectile speed"""
-        self.x_speed = 0
-        """(float): DEPRECATED. Use `speed` instead. Will be removed in 1.0.0. Projectile's horizontal speed"""
-        self.y_speed = 0
-        """(float): DEPRECATED. Use `speed` instead. Will be removed in 1.0.0. Projectile's vertical speed"""
         self.owner = -1
         """(int): Player port of the projectile's owner. -1 for no owner"""
         self.type = enums.ProjectileType.UNKNOWN_PROJECTILE
@@ -199,6 +341,66 @@ class Projectile:
         self.subtype = 0
         """(int): The subtype of the item. Many projectiles have 'subtypes' that make them different. They're all different, so it's not an enum"""
 
+class Projectile(_BaseProjectile):
+    """ Represents the state of a projectile (items, lasers, etc...) """
+    __slots__ = ('x', 'y', 'x_speed', 'y_speed')
+    def __init__(self):
+        super().__init__()
+        self.x = 0
+        """(float): DEPRECATED. Use `position` instead. Will be removed in 1.0.0. Projectile's X position"""
+        self.y = 0
+        """(float): DEPRECATED. Use `position` instead. Will be removed in 1.0.0. Projectile's Y position"""
+        self.x_speed = 0
+        """(float): DEPRECATED. Use `speed` instead. Will be removed in 1.0.0. Projectile's horizontal speed"""
+        self.y_speed = 0
+        """(float): DEPRECATED. Use `speed` instead. Will be removed in 1.0.0. Projectile's vertical speed"""
+
+def _alias(attribute, field):
+    """A property that reads and writes field of another attribute, like position.x"""
+    def fget(self):
+        return getattr(getattr(self, attribute), field)
+    def fset(self, value):
+        setattr(getattr(self, attribute), field, value)
+    return property(fget, fset)
+
+def _pair_alias(side):
+    """A property for a deprecated (x, y) ECB tuple, backed by the given side of ecb"""
+    def fget(self):
+        position = getattr(self.ecb, side)
+        return (position.x, position.y)
+    def fset(self, value):
+        position = getattr(self.ecb, side)
+        position.x, position.y = value
+    return property(fget, fset)
+
+class LeanPlayerState(_BasePlayerState):
+    """A player state that only stores the canonical copy of each value
+
+    The deprecated fields (x, y and the ecb_* tuples) are computed from position and ecb
+    instead of being stored, and have no slots of their own. cursor_x and cursor_y stay stored:
+    they are the character select cursor, while cursor is the stage select cursor.
+    It has all the same attributes as PlayerState, but isn't a subclass of it.
+    Used by Console(lean_state=True)
+    """
+    __slots__ = ()
+    x = _alias('position', 'x')
+    y = _alias('position', 'y')
+    ecb_top = _pair_alias('top')
+    ecb_bottom = _pair_alias('bottom')
+    ecb_left = _pair_alias('left')
+    ecb_right = _pair_alias('right')
+
+class LeanProjectile(_BaseProjectile):
+    """A projectile that computes its deprecated fields from position and speed, like LeanPlayerState
+
+    Used by Console(lean_state=True)
+    """
+    __slots__ = ()
+    x = _alias('position', 'x')
+    y = _alias('position', 'y')
+    x_speed = _alias('speed', 'x')
+    y_speed = _alias('speed', 'y')
+
 def port_detector(gamestate, character, costume):
     """Autodiscover what port the given character is on
 
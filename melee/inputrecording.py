@@ -0,0 +1,165 @@
+""" Compact binary recordings of controller inputs, and deterministic playback
+
+A recording holds one fixed-size record per flushed ControllerState: the game
+frame, the controller port, the button bitmask, both sticks and both shoulders.
+The file is a short header followed by the raw records, so it loads straight into
+a numpy structured array.
+
+Record a bot by attaching an InputRecorder to its controllers. Feed a recording
+back in with InputPlayer, which schedules the states on a Controller so they're
+sent at flush time on the same game frames as when they were recorded.
+"""
+
+import numpy as np
+
+from melee.controller import ControllerState
+
+# File signature, including a format version number
+MAGIC = b"LMINPUT1"
+
+RECORD_DTYPE = np.dtype([
+    ("frame", "<i4"),
+    ("port", "u1"),
+    ("buttons", "<u2"),
+    ("main_x", "<f4"),
+    ("main_y", "<f4"),
+    ("c_x", "<f4"),
+    ("c_y", "<f4"),
+    ("l_shoulder", "<f4"),
+    ("r_shoulder", "<f4"),
+])
+
+class InputRecorder:
+    """ Writes every flushed controller state to a recording file """
+
+    def __init__(self, path, buffer_size=1024):
+        """Create a recording file, replacing any existing one
+
+        Args:
+            path (str): Path of the file to write
+            buffer_size (int): How many records to keep in memory between writes to disk
+        """
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._buffer = np.zeros(buffer_size, dtype=RECORD_DTYPE)
+        self._count = 0
+        self.records = 0
+        """(int): Number of records written so far"""
+
+    def attach(self, controller):
+        """Record every state the given controller flushes from now on"""
+        controller.recorder = self
+
+    def record(self, frame, port, state):
+        """Add a controller state to the recording
+
+        Args:
+            frame (int): The game frame the state was sent on
+            port (int): Controller port
+            state (ControllerState): The state that was sent
+        """
+        self._buffer[self._count] = (frame, port, state.buttons,
+                                     state.main_x, state.main_y, state.c_x, state.c_y,
+                                     state.l_shoulder, state.r_shoulder)
+        self._count += 1
+        self.records += 1
+        if self._count == len(self._buffer):
+            self.flush()
+
+    def flush(self):
+        """Write all buffered records to disk"""
+        if self._file is None:
+            return
+        self._file.write(self._buffer[:self._count].tobytes())
+        self._file.flush()
+        self._count = 0
+
+    def close(self):
+        """Write out anything buffered and close the file"""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def load_recording(path):
+    """Read a recording file
+
+    Args:
+        path (str): Path of the recording
+
+    Returns:
+        numpy structured array with RECORD_DTYPE, one element per record
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a libmelee input recording")
+        return np.frombuffer(file.read(), dtype=RECORD_DTYPE)
+
+def records_to_states(records):
+    """Convert recording records into ControllerStates
+
+    Args:
+        records (np.ndarray): Structured array with RECORD_DTYPE
+
+    Returns:
+        List of ControllerState objects, one per record
+    """
+    states = []
+    columns = zip(records["buttons"].tolist(),
+                  records["main_x"].tolist(), records["main_y"].tolist(),
+                  records["c_x"].tolist(), records["c_y"].tolist(),
+                  records["l_shoulder"].tolist(), records["r_shoulder"].tolist())
+    for buttons, main_x, main_y, c_x, c_y, l_shoulder, r_shoulder in columns:
+        state = ControllerState()
+        state.buttons = buttons
+        state.main_x, state.main_y = main_x, main_y
+        state.c_x, state.c_y = c_x, c_y
+        state.l_shoulder, state.r_shoulder = l_shoulder, r_shoulder
+        states.append(state)
+    return states
+
+class InputPlayer:
+    """ Plays back a recording through Controllers """
+
+    def __init__(self, recording):
+        """Create a player
+
+        Args:
+            recording: Path to a recording file, or an array from load_recording()
+        """
+        if isinstance(recording, np.ndarray):
+            self.records = recording
+        else:
+            self.records = load_recording(recording)
+
+    @property
+    def ports(self):
+        """(list of ints): The controller ports that appear in the recording"""
+        return sorted(set(self.records["port"].tolist()))
+
+    def play(self, controller, port=None, frame_offset=0):
+        """Schedule a port's recorded inputs on a controller
+
+        The states are sent at flush time, exactly as recorded, on the same game
+        frames. See Controller.schedule() for the timing details. If a frame was
+        recorded more than once (such as in menus, where the frame doesn't advance)
+        the last record for it wins.
+
+        Args:
+            controller (controller.Controller): Controller to send the inputs with
+            port (int): Which port's inputs to play. Defaults to the controller's own port
+            frame_offset (int): Added to every recorded frame number
+        """
+        if port is None:
+            port = controller.port
+        records = self.records[self.records["port"] == port]
+        frames = (records["frame"].astype(np.int64) + frame_offset).tolist()
+        controller.schedule_states(frames, records_to_states(records))
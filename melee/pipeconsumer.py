@@ -0,0 +1,131 @@
+""" A local stand-in for dolphin's end of a controller pipe
+
+Opens the slippibot FIFO that Console.setup_dolphin_controller() creates and reads
+PRESS / RELEASE / SET / FLUSH commands from it the way dolphin's pipe device does.
+This lets you exercise (and time) the whole Controller input path without dolphin.
+Linux/OSX only, since it needs a real FIFO.
+"""
+
+import multiprocessing as mp
+import os
+import time
+
+from melee import enums
+from melee.controller import ControllerState, BUTTON_BITS
+
+_BUTTONS = {button.value: bit for button, bit in BUTTON_BITS.items()}
+
+class PipeStats:
+    """What a PipeConsumer saw on its pipe"""
+    def __init__(self):
+        self.commands = 0
+        """(int): Number of commands read, including FLUSHes"""
+        self.invalid_commands = 0
+        """(int): Number of lines that weren't a valid command. Dolphin ignores these"""
+        self.flush_times = []
+        """(list of floats): time.perf_counter() when each FLUSH arrived"""
+        self.states = []
+        """(list of ControllerState): The controller state at each FLUSH, if recorded"""
+        self.state = ControllerState()
+        """(ControllerState): The controller state after the last command"""
+
+class PipeConsumer:
+    """ Reads and parses the commands a Controller writes to its pipe """
+
+    def __init__(self, path, record_states=False):
+        """Create a PipeConsumer
+
+        Args:
+            path (str): Path to the controller's FIFO. See Console.get_dolphin_pipes_path()
+            record_states (bool): Keep a copy of the controller state at every FLUSH
+        """
+        self.path = path
+        self.record_states = record_states
+        self._process = None
+        self._results = None
+
+    def _handle(self, line, stats):
+        """Apply a single command line to stats. Mirrors dolphin's pipe device parsing"""
+        parts = line.split()
+        state = stats.state
+        if len(parts) == 1 and parts[0] == "FLUSH":
+            stats.flush_times.append(time.perf_counter())
+            if self.record_states:
+                stats.states.append(state.copy())
+        elif len(parts) == 2 and parts[0] in ("PRESS", "RELEASE") and parts[1] in _BUTTONS:
+            if parts[0] == "PRESS":
+                state.buttons |= _BUTTONS[parts[1]]
+            else:
+                state.buttons &= ~_BUTTONS[parts[1]]
+        elif len(parts) == 4 and parts[0] == "SET" and parts[1] in ("MAIN", "C"):
+            if parts[1] == enums.Button.BUTTON_MAIN.value:
+                state.main_x, state.main_y = float(parts[2]), float(parts[3])
+            else:
+                state.c_x, state.c_y = float(parts[2]), float(parts[3])
+        elif len(parts) == 3 and parts[0] == "SET" and parts[1] in ("L", "R"):
+            if parts[1] == "L":
+                state.l_shoulder = float(parts[2])
+            else:
+                state.r_shoulder = float(parts[2])
+        else:
+            stats.invalid_commands += 1
+            return
+        stats.commands += 1
+
+    def consume(self):
+        """Read the pipe until the controller disconnects
+
+        Blocks until a controller opens the other end, and then until it closes it.
+
+        Returns:
+            PipeStats of everything that was read
+        """
+        stats = PipeStats()
+        buffer = b""
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            while True:
+                data = os.read(fd, 65536)
+                if not data:
+                    break
+                buffer += data
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    if line:
+                        self._handle(line.decode(), stats)
+        finally:
+            os.close(fd)
+        return stats
+
+    def start(self):
+        """Run consume() in a background process. Get the results with join()"""
+        results, child = mp.Pipe(duplex=False)
+        process = mp.Process(target=_run_consumer, args=(self.path, self.record_states, child),
+                             daemon=True)
+        process.start()
+        child.close()
+        self._process, self._results = process, results
+
+    def join(self, timeout=None):
+        """Wait for the background process to finish reading the pipe
+
+        Args:
+            timeout (float): How long to wait for the controller to disconnect. None to wait forever
+
+        Returns:
+            PipeStats, or None if the timeout ran out
+        """
+        if self._process is None:
+            return None
+        if not self._results.poll(timeout):
+            return None
+        stats = self._results.recv()
+        self._process.join()
+        self._process = None
+        return stats
+
+def _run_consumer(path, record_states, connection):
+    try:
+        connection.send(PipeConsumer(path, record_states).consume())
+    except KeyboardInterrupt:
+        pass  # don't spam the console with stack traces
@@ -0,0 +1,255 @@
+""" Derived features computed on each gamestate after it's decoded
+
+Console runs a FeaturePipeline over every gamestate it returns from step(). The
+pipeline holds named FeatureStages, in order. The built-in ones fill in helpers like
+`moonwalkwarning`, `off_stage` and `distance`, and fix up some of Melee's quirks.
+
+Any stage can be turned off if your bot doesn't need it, and you can register your
+own. All the per-player work of every enabled stage happens in a single loop over
+the players, so adding a stage doesn't mean another pass over the gamestate.
+
+    console.pipeline.disable("moonwalkwarning")
+
+The "geometry" stage (all-pairs distances in `GameState.geometry`) is off by default,
+since most bots only need `distance`. Turn it on with:
+
+    console.pipeline.enable("geometry")
+
+    class Airborne(FeatureStage):
+        name = "airborne"
+        def process_player(self, player, prev_player, gamestate):
+            player.airborne = not player.on_ground
+
+    console.pipeline.register(Airborne())
+"""
+
+import math
+
+from melee import stages
+from melee.enums import Action
+from melee.gamestate import Geometry
+
+class FeatureStage:
+    """ A single derived computation. Subclass this and override either or both methods
+
+    process_player() is called once per player (and per Nana, if `nana` is True),
+    and then process() is called once for the whole gamestate.
+    """
+    name = None
+    """(str): Unique name of the stage, used to enable and disable it"""
+    nana = False
+    """(bool): Whether process_player() also runs for Nana"""
+
+    def process_player(self, player, prev_player, gamestate):
+        """Compute features for one player
+
+        Args:
+            player (gamestate.PlayerState): The player to update
+            prev_player (gamestate.PlayerState): The same player on the previous frame, or None
+            gamestate (gamestate.GameState): The gamestate the player is in
+        """
+
+    def process(self, gamestate, prev_gamestate):
+        """Compute features for the whole gamestate, after all the players are done
+
+        Args:
+            gamestate (gamestate.GameState): The gamestate to update
+            prev_gamestate (gamestate.GameState): The previous frame's gamestate, or None
+        """
+
+def _overrides(stage, method):
+    return getattr(type(stage), method) is not getattr(FeatureStage, method)
+
+class FeaturePipeline:
+    """ An ordered set of FeatureStages, run over each gamestate """
+
+    def __init__(self, stages=()):
+        """Create a pipeline
+
+        Args:
+            stages (list of FeatureStage): Initial stages, in the order to run them
+        """
+        self._stages = []
+        self._disabled = set()
+        self._player_stages = []
+        self._nana_stages = []
+        self._frame_stages = []
+        for stage in stages:
+            self.register(stage)
+
+    @property
+    def names(self):
+        """(list of str): Names of all registered stages, in order"""
+        return [stage.name for stage in self._stages]
+
+    def __getitem__(self, name):
+        for stage in self._stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+    def __contains__(self, name):
+        return any(stage.name == name for stage in self._stages)
+
+    def register(self, stage, before=None):
+        """Add a stage to the pipeline, enabled
+
+        Args:
+            stage (FeatureStage): The stage to add. Its name must not already be registered
+            before (str): Name of a stage to run this one before. None to run it last
+        """
+        if not stage.name:
+            raise ValueError("FeatureStage needs a name")
+        if stage.name in self:
+            raise ValueError(f"A stage named {stage.name!r} is already registered")
+        if before is None:
+            self._stages.append(stage)
+        else:
+            self._stages.insert(self._stages.index(self[before]), stage)
+        self._rebuild()
+
+    def unregister(self, name):
+        """Remove a stage from the pipeline"""
+        self._stages.remove(self[name])
+        self._disabled.discard(name)
+        self._rebuild()
+
+    def enable(self, name):
+        """Turn a stage back on"""
+        self[name]
+        self._disabled.discard(name)
+        self._rebuild()
+
+    def disable(self, name):
+        """Turn a stage off. Whatever it computes keeps its default value"""
+        self[name]
+        self._disabled.add(name)
+        self._rebuild()
+
+    def is_enabled(self, name):
+        """Whether the named stage is registered and enabled"""
+        return name in self and name not in self._disabled
+
+    def _rebuild(self):
+        """Work out which stages to call where, so run() doesn't have to"""
+        enabled = [stage for stage in self._stages if stage.name not in self._disabled]
+        self._player_stages = [stage.process_player for stage in enabled
+                               if _overrides(stage, "process_player")]
+        self._nana_stages = [stage.process_player for stage in enabled
+                             if stage.nana and _overrides(stage, "process_player")]
+        self._frame_stages = [stage.process for stage in enabled if _overrides(stage, "process")]
+
+    def run(self, gamestate, prev_gamestate=None):
+        """Run every enabled stage over a gamestate
+
+        Args:
+            gamestate (gamestate.GameState): The freshly decoded gamestate
+            prev_gamestate (gamestate.GameState): The previous frame's gamestate, or None
+        """
+        player_stages = self._player_stages
+        if player_stages:
+            nana_stages = self._nana_stages
+            prev_players = prev_gamestate.players if prev_gamestate is not None else {}
+            for port, player in gamestate.players.items():
+                prev_player = prev_players.get(port)
+                for stage in player_stages:
+                    stage(player, prev_player, gamestate)
+                nana = player.nana
+                if nana_stages and nana is not None:
+                    prev_nana = prev_player.nana if prev_player is not None else None
+                    for stage in nana_stages:
+                        stage(nana, prev_nana, gamestate)
+        for stage in self._frame_stages:
+            stage(gamestate, prev_gamestate)
+
+class FixFrameIndexing(FeatureStage):
+    """ Melee's indexing of action frames is wildly inconsistent.
+        Here we adjust all of the frames to be indexed at 1 (so math is easier)"""
+    name = "fix_frame_indexing"
+
+    def __init__(self, zero_indices):
+        """
+        Args:
+            zero_indices (dict of int - set of ints): The zero-indexed action values of each character value
+        """
+        self.zero_indices = zero_indices
+
+    def process_player(self, player, prev_player, gamestate):
+        if player.action.value in self.zero_indices[player.character.value]:
+            player.action_frame = player.action_frame + 1
+
+class FixIASA(FeatureStage):
+    """ The IASA flag doesn't set or reset for special attacks.
+        So let's just set IASA to False for all non-A attacks.
+    """
+    name = "fix_iasa"
+
+    def process_player(self, player, prev_player, gamestate):
+        # Luckily for us, all the A-attacks are in a contiguous place in the enums!
+        #   So we don't need to call them out one by one
+        if player.action.value < Action.NEUTRAL_ATTACK_1.value or player.action.value > Action.DAIR.value:
+            player.iasa = False
+
+class MoonwalkWarning(FeatureStage):
+    """ Sets `moonwalkwarning` on the first frame of a dash dance """
+    name = "moonwalkwarning"
+    nana = True
+
+    def process_player(self, player, prev_player, gamestate):
+        # The pre-warning occurs when we first start a dash dance.
+        player.moonwalkwarning = player.action == Action.DASHING and prev_player is not None and \
+            prev_player.action not in (Action.DASHING, Action.TURNING)
+
+class OffStage(FeatureStage):
+    """ Sets `off_stage` for players in the air past the edge, or below the stage """
+    name = "off_stage"
+    nana = True
+
+    def process_player(self, player, prev_player, gamestate):
+        edge = stages.EDGE_GROUND_POSITION.get(gamestate.stage)
+        if edge is None:
+            player.off_stage = False
+            return
+        player.off_stage = (abs(player.position.x) > edge or player.position.y < -6) and not player.on_ground
+
+class Distance(FeatureStage):
+    """ Sets the gamestate's `distance` between the first two players """
+    name = "distance"
+
+    def process(self, gamestate, prev_gamestate):
+        #   This is a bit kludgey.... :/
+        player_one_x, player_one_y, player_two_x, player_two_y = 0, 0, 0, 0
+        for i, player_state in enumerate(gamestate.players.values()):
+            if i == 0:
+                player_one_x, player_one_y = player_state.position.x, player_state.position.y
+            elif i == 1:
+                player_two_x, player_two_y = player_state.position.x, player_state.position.y
+                break
+        xdist = player_one_x - player_two_x
+        ydist = player_one_y - player_two_y
+        gamestate.distance = math.sqrt((xdist**2) + (ydist**2))
+
+class GeometryStage(FeatureStage):
+    """ Sets the gamestate's `geometry`: all-pairs distances and relative positions """
+    name = "geometry"
+
+    def process(self, gamestate, prev_gamestate):
+        gamestate.geometry = Geometry(gamestate)
+
+def default_pipeline(zero_indices):
+    """The pipeline Console uses unless told otherwise, with every built-in stage
+    enabled except "geometry"
+
+    Args:
+        zero_indices (dict of int - set of ints): See FixFrameIndexing
+    """
+    pipeline = FeaturePipeline([
+        FixFrameIndexing(zero_indices),
+        FixIASA(),
+        MoonwalkWarning(),
+        OffStage(),
+        GeometryStage(),
+        Distance(),
+    ])
+    pipeline.disable("geometry")
+    return pipeline
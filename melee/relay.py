@@ -0,0 +1,168 @@
+""" Fan-out relay for sharing one Slippstream connection between many consumers
+
+The relay owns a single Console (and so a single enet connection to dolphin or
+a Wii), decodes each frame once, and republishes the resulting GameState to any
+number of local subscribers. Subscribers connect over a local socket (a Unix
+domain socket on Linux/OSX, a named pipe on Windows), so bots, loggers, stats
+engines and overlays can all run in their own processes.
+"""
+
+import collections
+import pickle
+import threading
+from multiprocessing.connection import Listener, Client
+
+class _Subscriber:
+    """A single connected subscriber, fed by its own sender thread
+
+    Each subscriber has a bounded queue so that one slow consumer can't stall
+    the relay (or dolphin). When the queue is full, the oldest frame is dropped.
+    """
+    def __init__(self, connection, queue_size):
+        self.connection = connection
+        self.dropped_frames = 0
+        self.alive = True
+        self._queue = collections.deque()
+        self._queue_size = queue_size
+        self._closing = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, data):
+        with self._condition:
+            if self._queue_size is not None and len(self._queue) >= self._queue_size:
+                self._queue.popleft()
+                self.dropped_frames += 1
+            self._queue.append(data)
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._closing:
+                    self._condition.wait()
+                if not self._queue:
+                    break
+                data = self._queue.popleft()
+            try:
+                self.connection.send_bytes(data)
+            except OSError:
+                break
+        self.alive = False
+        self.connection.close()
+
+class SlippstreamRelay:
+    """Republishes the gamestates of a single Console to many local subscribers"""
+    def __init__(self, console, address=None, authkey=None, queue_size=60):
+        """Create a relay and start listening for subscribers
+
+        Args:
+            console (console.Console): The console to read gamestates from. It should
+                already be connected (or at least be set up to connect).
+            address: Local address to listen on. A filesystem path for Unix sockets,
+                a pipe name on Windows, or None to pick a free one automatically.
+            authkey (bytes): Optional shared secret that subscribers must present
+            queue_size (int): How many frames to buffer per subscriber before dropping
+                the oldest. None for an unbounded queue.
+        """
+        self._console = console
+        self._queue_size = queue_size
+        self._listener = Listener(address, authkey=authkey)
+        self.address = self._listener.address
+        """The address subscribers should connect to"""
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._accept_thread = threading.Thread(target=self._accept, daemon=True)
+        self._accept_thread.start()
+
+    @property
+    def subscriber_count(self):
+        """(int): Number of currently connected subscribers"""
+        with self._lock:
+            return sum(subscriber.alive for subscriber in self._subscribers)
+
+    def _accept(self):
+        while True:
+            try:
+                connection = self._listener.accept()
+            except OSError:
+                return  # The listener was closed
+            with self._lock:
+                self._subscribers.append(_Subscriber(connection, self._queue_size))
+
+    def publish(self, gamestate):
+        """Send a gamestate to every connected subscriber
+
+        The gamestate is serialized once, no matter how many subscribers there are.
+        """
+        data = pickle.dumps(gamestate, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._subscribers = [subscriber for subscriber in self._subscribers if subscriber.alive]
+            for subscriber in self._subscribers:
+                subscriber.put(data)
+
+    def step(self):
+        """Step the underlying console and publish the new gamestate
+
+        Returns:
+            GameState object that represents new current state of the game,
+            same as Console.step()
+        """
+        gamestate = self._console.step()
+        if gamestate is not None:
+            self.publish(gamestate)
+        return gamestate
+
+    def close(self):
+        """Stop accepting subscribers, and disconnect the existing ones
+
+        Frames already queued for a subscriber are still delivered (in the
+        background) before its connection is closed.
+        """
+        self._listener.close()
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, []
+        for subscriber in subscribers:
+            subscriber.close()
+
+class RelaySubscriber:
+    """Receives gamestates from a SlippstreamRelay
+
+    Use this in place of a Console in processes that only need to read the game.
+    """
+    def __init__(self, address, authkey=None):
+        """Connect to a relay
+
+        Args:
+            address: The relay's address (SlippstreamRelay.address)
+            authkey (bytes): Shared secret, if the relay was given one
+        """
+        self._connection = Client(address, authkey=authkey)
+
+    def step(self, polling_mode=False, timeout=0):
+        """Get the next gamestate from the relay
+
+        Args:
+            polling_mode (bool): Return None right away if no gamestate is ready yet
+            timeout (float): In polling_mode, how long to wait for
+
+        Returns:
+            GameState object, or None if polling and nothing is available, or the
+            relay has gone away
+        """
+        try:
+            if polling_mode and not self._connection.poll(timeout):
+                return None
+            return pickle.loads(self._connection.recv_bytes())
+        except (EOFError, OSError):
+            return None
+
+    def close(self):
+        """Disconnect from the relay"""
+        self._connection.close()
@@ -0,0 +1,235 @@
+""" Fixed-layout gamestate snapshots in shared memory
+
+Instead of pickling whole GameState objects to send them to other processes, the
+console's process writes each frame into a single multiprocessing.shared_memory
+block, in a fixed binary layout (STATE_DTYPE). Any number of readers in other
+processes can then map the same block and look at the current frame without
+copying or unpickling anything.
+
+Writes are guarded by a sequence counter (a seqlock): the writer makes it odd
+while it's writing, and even again when the frame is complete. SharedStateReader.read()
+uses it to always return a consistent frame.
+
+    # Actor process
+    console = melee.Console(..., shared_state=True)
+    name = console.shared_state.name   # hand this to the other processes
+
+    # Learner process
+    reader = SharedStateReader(name)
+    state = reader.read()
+    state["players"][0]["x"], state["frame"]
+"""
+
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+MAX_PROJECTILES = 16
+"""Projectiles past this many in a frame aren't included in the snapshot"""
+
+PLAYER_DTYPE = np.dtype([
+    ("present", "u1"),
+    ("character", "u1"),
+    ("costume", "u1"),
+    ("action", "<u2"),
+    ("action_frame", "<i2"),
+    ("x", "<f4"),
+    ("y", "<f4"),
+    ("percent", "<u2"),
+    ("stock", "u1"),
+    ("facing", "u1"),
+    ("on_ground", "u1"),
+    ("invulnerable", "u1"),
+    ("jumps_left", "u1"),
+    ("shield_strength", "<f4"),
+    ("hitlag_left", "<i2"),
+    ("hitstun_frames_left", "<i2"),
+    ("speed_air_x_self", "<f4"),
+    ("speed_y_self", "<f4"),
+    ("speed_x_attack", "<f4"),
+    ("speed_y_attack", "<f4"),
+    ("speed_ground_x_self", "<f4"),
+    ("ecb", "<f4", (4, 2)),  # top, bottom, left, right. (x, y) each
+    ("buttons", "<u2"),  # See controller.BUTTON_BITS
+    ("main_stick", "<f4", (2,)),
+    ("c_stick", "<f4", (2,)),
+    ("l_shoulder", "<f4"),
+    ("r_shoulder", "<f4"),
+])
+"""Layout of a single player in a snapshot"""
+
+PROJECTILE_DTYPE = np.dtype([
+    ("x", "<f4"),
+    ("y", "<f4"),
+    ("speed_x", "<f4"),
+    ("speed_y", "<f4"),
+    ("owner", "i1"),
+    ("type", "<u2"),
+    ("subtype", "u1"),
+    ("frame", "<i4"),
+])
+"""Layout of a single projectile in a snapshot"""
+
+STATE_DTYPE = np.dtype([
+    ("frame", "<i4"),
+    ("stage", "u1"),
+    ("menu_state", "u1"),
+    ("distance", "<f4"),
+    ("players", PLAYER_DTYPE, (4,)),  # Indexed by port - 1
+    ("nanas", PLAYER_DTYPE, (4,)),
+    ("projectile_count", "u1"),
+    ("projectiles", PROJECTILE_DTYPE, (MAX_PROJECTILES,)),
+])
+"""Layout of a whole gamestate snapshot"""
+
+_BLOCK_DTYPE = np.dtype([
+    ("sequence", "<u8"),
+    ("state", STATE_DTYPE),
+])
+
+# Blocks created by writers in this process
+_OWNED_BLOCKS = set()
+
+_EMPTY_PLAYER = np.zeros((), dtype=PLAYER_DTYPE).item()
+_EMPTY_PROJECTILE = np.zeros((), dtype=PROJECTILE_DTYPE).item()
+
+def _player_record(player):
+    if player is None:
+        return _EMPTY_PLAYER
+    ecb = player.ecb
+    controller_state = player.controller_state
+    return (
+        1, player.character.value, player.costume, player.action.value, player.action_frame,
+        player.position.x, player.position.y, player.percent, player.stock,
+        player.facing, player.on_ground, player.invulnerable, player.jumps_left,
+        player.shield_strength, player.hitlag_left, player.hitstun_frames_left,
+        player.speed_air_x_self, player.speed_y_self, player.speed_x_attack,
+        player.speed_y_attack, player.speed_ground_x_self,
+        ((ecb.top.x, ecb.top.y), (ecb.bottom.x, ecb.bottom.y),
+         (ecb.left.x, ecb.left.y), (ecb.right.x, ecb.right.y)),
+        controller_state.buttons,
+        (controller_state.main_x, controller_state.main_y),
+        (controller_state.c_x, controller_state.c_y),
+        controller_state.l_shoulder, controller_state.r_shoulder,
+    )
+
+def _projectile_record(projectile):
+    return (projectile.position.x, projectile.position.y, projectile.speed.x, projectile.speed.y,
+            projectile.owner, projectile.type.value, projectile.subtype, projectile.frame)
+
+class SharedStateWriter:
+    """ Owns a shared memory block, and writes gamestates into it """
+
+    def __init__(self, name=None):
+        """Create the shared memory block
+
+        Args:
+            name (str): Name for the block. None to pick a unique one
+        """
+        self._shm = shared_memory.SharedMemory(name=name, create=True, size=_BLOCK_DTYPE.itemsize)
+        self._block = np.ndarray((), dtype=_BLOCK_DTYPE, buffer=self._shm.buf)
+        self._block[()] = np.zeros((), dtype=_BLOCK_DTYPE)
+        self._sequence = 0
+        _OWNED_BLOCKS.add(self._shm.name)
+
+    @property
+    def name(self):
+        """(str): Name of the shared memory block. Give this to SharedStateReader"""
+        return self._shm.name
+
+    def write(self, gamestate):
+        """Write a gamestate into shared memory
+
+        Args:
+            gamestate (gamestate.GameState): The gamestate to publish
+        """
+        players = gamestate.players
+        projectiles = gamestate.projectiles[:MAX_PROJECTILES]
+        records = [_projectile_record(projectile) for projectile in projectiles]
+        records += [_EMPTY_PROJECTILE] * (MAX_PROJECTILES - len(records))
+        state = (
+            gamestate.frame, gamestate.stage.value, gamestate.menu_state.value, gamestate.distance,
+            [_player_record(players.get(port)) for port in range(1, 5)],
+            [_player_record(players[port].nana if port in players else None) for port in range(1, 5)],
+            len(projectiles),
+            records,
+        )
+        # Odd while writing, so readers know to try again
+        self._sequence += 1
+        self._block["sequence"] = self._sequence
+        self._block["state"] = state
+        self._sequence += 1
+        self._block["sequence"] = self._sequence
+
+    def close(self):
+        """Release and destroy the shared memory block"""
+        if self._shm is None:
+            return
+        self._block = None
+        _OWNED_BLOCKS.discard(self._shm.name)
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+class SharedStateReader:
+    """ Reads gamestate snapshots that a SharedStateWriter publishes """
+
+    def __init__(self, name):
+        """Attach to an existing shared memory block
+
+        Args:
+            name (str): SharedStateWriter.name
+        """
+        self._shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix" and name not in _OWNED_BLOCKS:
+            # The writer owns the block. Don't let this process's resource tracker destroy it
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+        self._block = np.ndarray((), dtype=_BLOCK_DTYPE, buffer=self._shm.buf)
+
+    @property
+    def view(self):
+        """(np.ndarray): Zero-copy view of the current snapshot, with STATE_DTYPE
+
+        This looks directly at shared memory, so values can change (or be half written)
+        while you read them. Use read() for a consistent frame.
+        """
+        return self._block["state"]
+
+    @property
+    def sequence(self):
+        """(int): Increases by 2 with every frame written. 0 means nothing written yet"""
+        return int(self._block["sequence"])
+
+    def read(self, timeout=None):
+        """Copy out a consistent snapshot of the current frame
+
+        Args:
+            timeout (float): How long to keep retrying while the writer is mid-frame.
+                None to retry forever.
+
+        Returns:
+            A STATE_DTYPE numpy record, or None if nothing has been written yet (or the timeout ran out)
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        block = self._block
+        while True:
+            before = int(block["sequence"])
+            if before == 0:
+                return None
+            if not before & 1:
+                state = block["state"].copy()
+                if int(block["sequence"]) == before:
+                    return state
+            if deadline is not None and time.perf_counter() > deadline:
+                return None
+
+    def close(self):
+        """Detach from the shared memory block"""
+        if self._shm is None:
+            return
+        self._block = None
+        self._shm.close()
+        self._shm = None
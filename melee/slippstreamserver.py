@@ -0,0 +1,202 @@
+""" A local stand-in for a SlippiComm server
+
+Replays an SLP file over enet using the same protocol that Slippi Ishiiruka's
+spectator port speaks. This lets you exercise the whole live path
+(SlippstreamClient -> Console.step) without a running dolphin or an ISO,
+which is handy for tests and benchmarks.
+"""
+
+import base64
+import json
+import logging
+import multiprocessing as mp
+import time
+
+import enet
+
+from melee.slippstream import EventType
+from melee.slpfilestreamer import SLPFileStreamer
+
+# Melee runs at 60 frames per second
+FRAME_TIME = 1 / 60
+
+class SlippstreamServer:
+    """ Serves the game events of an SLP file to a single Slippstream client """
+
+    def __init__(
+        self,
+        path,
+        address="127.0.0.1",
+        port=51441,
+        speed=1.0,
+        nick="libmelee",
+        version="3.4.0",
+        connect_timeout=10,
+    ):
+        """Create a SlippstreamServer
+
+        Args:
+            path (str): Path to the SLP file to replay
+            address (str): IP address to listen on
+            port (int): UDP port to listen on
+            speed (float): Playback speed as a multiple of real time (60 fps).
+                Set to 0 to send frames as fast as possible.
+            nick (str): Console nickname to report in the connect reply
+            version (str): Slippi version to report in the connect reply
+            connect_timeout (float): How long (in seconds) to wait for a client
+        """
+        self.path = path
+        self.address = address
+        self.port = port
+        self.speed = speed
+        self.nick = nick
+        self.version = version
+        self.connect_timeout = connect_timeout
+        self._host = None
+        self._peer = None
+        self._process = None
+        self._shutdown = mp.Event()
+
+    def _messages(self):
+        """Generator of SlippiComm messages, one per frame of the SLP file"""
+        streamer = SLPFileStreamer(self.path)
+        streamer.connect()
+
+        chunk = b""
+        has_bookends = True
+        while True:
+            wrapper = streamer.dispatch()
+            if wrapper is None:
+                break
+            # Old SLP files have no frame bookends, so pass along the frame markers instead
+            if wrapper["type"] == "frame_end":
+                if not has_bookends:
+                    if chunk:
+                        yield "game_event", chunk
+                        chunk = b""
+                    yield "frame_end", None
+                continue
+
+            payload = bytes(wrapper["payload"])
+            if payload[0] == EventType.GAME_START.value:
+                # Frame bookends were added in 3.0.0
+                has_bookends = payload[1] >= 3
+            chunk += payload
+            # Dolphin sends everything up to and including the frame bookend together
+            if payload[0] in (EventType.FRAME_BOOKEND.value, EventType.GAME_END.value):
+                yield "game_event", chunk
+                chunk = b""
+        if chunk:
+            yield "game_event", chunk
+
+    def _send(self, message):
+        self._peer.send(0, enet.Packet(json.dumps(message).encode(), enet.PACKET_FLAG_RELIABLE))
+
+    def _wait_for_handshake(self):
+        """Wait for a client to connect and send a connect_request
+
+        Returns the cursor the client asked for, or None if nobody showed up
+        """
+        deadline = time.time() + self.connect_timeout
+        while time.time() < deadline and not self._shutdown.is_set():
+            event = self._host.service(100)
+            if event.type == enet.EVENT_TYPE_CONNECT:
+                self._peer = event.peer
+            elif event.type == enet.EVENT_TYPE_RECEIVE:
+                message = json.loads(event.packet.data)
+                if message.get("type") == "connect_request":
+                    return message.get("cursor", 0)
+            elif event.type == enet.EVENT_TYPE_DISCONNECT:
+                self._peer = None
+        logging.error("No Slippstream client connected to %s:%d", self.address, self.port)
+        return None
+
+    def _pump(self):
+        """Service the host without blocking. Returns False if the client went away"""
+        event = self._host.service(0)
+        while event.type != enet.EVENT_TYPE_NONE:
+            if event.type == enet.EVENT_TYPE_DISCONNECT:
+                return False
+            event = self._host.service(0)
+        return True
+
+    def serve(self):
+        """Wait for a client, then stream the whole SLP file to it
+
+        Blocks until the file has been sent and the client disconnected.
+
+        Returns:
+            True if the whole file was streamed, False otherwise
+        """
+        self._host = enet.Host(enet.Address(bytes(self.address, "utf-8"), self.port), 1, 0, 0, 0)
+        try:
+            cursor = self._wait_for_handshake()
+            if cursor is None:
+                return False
+
+            self._send({
+                "type": "connect_reply",
+                "nick": self.nick,
+                "version": self.version,
+                "cursor": cursor,
+            })
+            self._send({"type": "start_game"})
+
+            next_frame = time.perf_counter()
+            for message_type, payload in self._messages():
+                if self._shutdown.is_set() or not self._pump():
+                    return False
+                if message_type == "frame_end":
+                    self._send({"type": "frame_end"})
+                    continue
+
+                self._send({
+                    "type": "game_event",
+                    "payload": base64.b64encode(payload).decode(),
+                    "cursor": cursor,
+                    "next_cursor": cursor + 1,
+                })
+                cursor += 1
+
+                if self.speed > 0:
+                    next_frame += FRAME_TIME / self.speed
+                    delay = next_frame - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+            self._send({"type": "end_game"})
+            self._host.flush()
+            self._peer.disconnect_later()
+            # Wait for everything to be delivered before tearing down
+            deadline = time.time() + self.connect_timeout
+            while time.time() < deadline:
+                if self._host.service(100).type == enet.EVENT_TYPE_DISCONNECT:
+                    break
+            return True
+        finally:
+            self._peer = None
+            self._host = None
+
+    def start(self):
+        """Run serve() in a background process
+
+        A separate process keeps enet from competing with the client for the GIL.
+        """
+        self._shutdown.clear()
+        # Start before keeping a handle, so self stays picklable for spawned processes
+        process = mp.Process(target=_run_server, args=(self,), daemon=True)
+        process.start()
+        self._process = process
+
+    def shutdown(self):
+        """Stop streaming and wait for the background process to finish"""
+        self._shutdown.set()
+        if self._process is not None:
+            self._process.join()
+            self._process = None
+
+def _run_server(server):
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass  # don't spam the console with stack traces
@@ -1,5 +1,6 @@
 """Helper functions for with some techskill examples"""
 from melee import enums
+from melee.controller import InputSequence
 
 def multishine(ai_state, controller):
     """ Frame-perfect Multishines as Fox """
@@ -32,6 +33,24 @@ def multishine(ai_state, controller):
 
     controller.release_all()
 
+def multishine_sequence(count=1, jumpsquat=3):
+    """ Precompiled frame-perfect multishines, for Controller.schedule()
+
+    Start it while standing. Each shine is jump cancelled, then the next one
+    comes out of the last frame of jumpsquat.
+
+    Args:
+        count (int): How many shines to do
+        jumpsquat (int): The character's jumpsquat length in frames. (3 for Fox)
+    """
+    sequence = InputSequence()
+    for _ in range(count):
+        sequence.add(buttons=[enums.Button.BUTTON_B], main_stick=(.5, 0))
+        sequence.add(frames=3)
+        sequence.add(buttons=[enums.Button.BUTTON_Y])
+        sequence.add(frames=jumpsquat-1)
+    return sequence
+
 def upsmashes(ai_state, controller):
     """ Spam upsmashes """
     if ai_state.action == enums.Action.STANDING:
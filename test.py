@@ -1,7 +1,25 @@
 #!/usr/bin/python3
+import dataclasses
+import io
+import math
+import os
+import pickle
+import platform
+import tempfile
+import time
 import unittest
 
+import numpy as np
+
 import melee
+from melee.slippstream import EnetDisconnected
+from melee.slippstreamserver import SlippstreamServer
+from melee.relay import SlippstreamRelay, RelaySubscriber
+from melee.pipeconsumer import PipeConsumer, PipeStats
+from melee.inputrecording import InputRecorder, InputPlayer
+from melee.features import FeatureSchema
+from melee.sharedstate import SharedStateReader
+from melee.pipeline import FeatureStage
 
 class SLPFile(unittest.TestCase):
     """
@@ -59,6 +77,526 @@ class SLPFile(unittest.TestCase):
                 self.assertEqual(gamestate.players[2].percent, 25)
                 self.assertEqual(gamestate.players[3].percent, 0)
 
+    def test_slippstream_server(self):
+        """
+        Stream an SLP file over the local Slippstream server
+        """
+        server = SlippstreamServer("test_artifacts/test_game_1.slp", port=51460, speed=0)
+        server.start()
+        console = melee.Console(tmp_home_directory=False, slippi_port=51460)
+        try:
+            self.assertTrue(console.connect())
+            framecount = 0
+            with self.assertRaises(EnetDisconnected):
+                while True:
+                    gamestate = console.step()
+                    framecount += 1
+                    if gamestate.frame == 297:
+                        self.assertEqual(gamestate.players[1].action.value, 0)
+                        self.assertEqual(gamestate.players[2].action.value, 27)
+                        self.assertEqual(gamestate.players[1].percent, 17)
+            self.assertEqual(framecount, 1038)
+            self.assertEqual(console.nick, "libmelee")
+        finally:
+            console.stop()
+            server.shutdown()
+
+    def test_relay(self):
+        """
+        Fan out one console's gamestates to several subscribers
+        """
+        console = melee.Console(is_dolphin=False,
+                                path="test_artifacts/test_game_1.slp")
+        self.assertTrue(console.connect())
+        relay = SlippstreamRelay(console, queue_size=None)
+        subscribers = [RelaySubscriber(relay.address) for _ in range(2)]
+        while relay.subscriber_count < 2:
+            time.sleep(0.01)
+
+        frames = []
+        while True:
+            gamestate = relay.step()
+            if gamestate is None:
+                break
+            frames.append(gamestate.frame)
+        relay.close()
+
+        for subscriber in subscribers:
+            received = []
+            while True:
+                gamestate = subscriber.step()
+                if gamestate is None:
+                    break
+                received.append(gamestate.frame)
+                if gamestate.frame == 297:
+                    self.assertEqual(gamestate.players[2].action.value, 27)
+            self.assertEqual(received, frames)
+            subscriber.close()
+
+    def test_controller_state(self):
+        """
+        Test the packed controller state and its compatibility views
+        """
+        state = melee.ControllerState()
+        state.button[melee.Button.BUTTON_A] = True
+        state.main_stick = (1, .5)
+        self.assertTrue(state.button[melee.Button.BUTTON_A])
+        self.assertFalse(state.button[melee.Button.BUTTON_B])
+        self.assertEqual(state.buttons, 0x0100)
+
+        snapshot = state.copy()
+        self.assertEqual(snapshot, state)
+        state.button[melee.Button.BUTTON_A] = False
+        state.button[melee.Button.BUTTON_Z] = True
+        self.assertNotEqual(snapshot, state)
+        self.assertTrue(snapshot.button[melee.Button.BUTTON_A])
+        self.assertEqual(state.buttons ^ snapshot.buttons, 0x0110)
+        self.assertEqual(len({state, snapshot, state}), 2)
+
+    def test_actions_to_states(self):
+        """
+        Test converting action vectors into controller states
+        """
+        actions = np.zeros((2, melee.controller.ACTION_SIZE))
+        actions[0, melee.controller.ACTION_BUTTONS.index(melee.Button.BUTTON_B)] = 1
+        actions[:, -5:] = [1, .5, .5, 0, .25]
+        states = melee.controller.actions_to_states(actions)
+        self.assertTrue(states[0].button[melee.Button.BUTTON_B])
+        self.assertEqual(states[1].buttons, 0)
+        self.assertEqual(states[0].main_x, melee.controller.fix_analog_stick(1))
+        self.assertEqual(states[1].c_y, melee.controller.fix_analog_stick(0))
+        self.assertEqual(states[1].l_shoulder, .25)
+        self.assertEqual(states[1].r_shoulder, 0)
+
+        console = melee.Console(dolphin_home_path=tempfile.mkdtemp(prefix='libmelee_') + "/",
+                                tmp_home_directory=False)
+        controllers = [melee.Controller(console, port) for port in (1, 2)]
+        console.controllers.extend(controllers)
+        for controller in controllers:
+            controller.set_action_table(actions)
+        console.apply_actions([1, 2], np.array([1., 0.]))
+        self.assertEqual(controllers[0].current, states[1])
+        self.assertEqual(controllers[1].current, states[0])
+        console.apply_actions([1, 2], actions[::-1])
+        self.assertEqual(controllers[0].current, states[1])
+        with self.assertRaises(ValueError):
+            console.apply_actions([1, 2], np.array([.5, 0]))
+        with self.assertRaises(ValueError):
+            console.apply_actions([1, 2], np.array([0]))
+        controllers[0].apply(np.float32(0))
+        self.assertEqual(controllers[0].current, states[0])
+        controllers[0].apply(1.0)
+        self.assertEqual(controllers[0].current, states[1])
+        with self.assertRaises(ValueError):
+            controllers[0].apply(1.5)
+
+    @unittest.skipIf(platform.system() == "Windows", "Windows writes with win32file")
+    def test_controller_flush(self):
+        """
+        Flushing only sends the inputs that changed, in a single write
+        """
+        console = melee.Console(dolphin_home_path=tempfile.mkdtemp(prefix='libmelee_') + "/",
+                                tmp_home_directory=False)
+        controller = melee.Controller(console, 1, fix_analog_inputs=False)
+        controller.pipe = io.StringIO()
+        writes = []
+        write = controller._write
+        controller._write = lambda command: (writes.append(command), write(command))
+
+        controller.flush()
+        self.assertEqual(writes, ["FLUSH\n"])
+        controller.press_button(melee.Button.BUTTON_A)
+        controller.tilt_analog(melee.Button.BUTTON_MAIN, 1, .5)
+        controller.flush()
+        self.assertEqual(writes[1], "PRESS A\nSET MAIN 1 0.5\nFLUSH\n")
+        controller.flush()
+        self.assertEqual(writes[2], "FLUSH\n")
+        controller.release_button(melee.Button.BUTTON_A)
+        controller.press_button(melee.Button.BUTTON_Z)
+        controller.press_shoulder(melee.Button.BUTTON_L, .25)
+        controller.flush()
+        self.assertEqual(writes[3], "RELEASE A\nPRESS Z\nSET L 0.25\nFLUSH\n")
+        self.assertEqual(len(writes), 4)
+        self.assertEqual(controller.pipe.getvalue(), "".join(writes))
+
+    @unittest.skipIf(platform.system() == "Windows", "Needs a FIFO")
+    def test_pipe_consumer(self):
+        """
+        Send controller inputs through a real pipe to a local consumer
+        """
+        console = melee.Console(dolphin_home_path=tempfile.mkdtemp(prefix='libmelee_') + "/",
+                                tmp_home_directory=False)
+        controller = melee.Controller(console, 1)
+        consumer = PipeConsumer(console.get_dolphin_pipes_path(1), record_states=True)
+        consumer.start()
+        self.assertTrue(controller.connect())
+
+        controller.press_button(melee.Button.BUTTON_A)
+        controller.flush()
+        controller.tilt_analog(melee.Button.BUTTON_MAIN, 1, .5)
+        controller.flush()
+        controller.release_all()
+        controller.flush()
+        controller.disconnect()
+
+        stats = consumer.join(timeout=10)
+        self.assertEqual(stats.invalid_commands, 0)
+        self.assertEqual(len(stats.flush_times), 3)
+        self.assertEqual(stats.states[0].buttons, 0x0100)
+        self.assertEqual(stats.states[1].main_x, melee.controller.fix_analog_stick(1))
+        self.assertEqual(stats.states[2].buttons, 0)
+        self.assertEqual(stats.states[2].main_x, .5)
+
+    @unittest.skipIf(platform.system() == "Windows", "Needs a FIFO")
+    def test_nonblocking_controller(self):
+        """
+        A nonblocking controller drops or merges frames while the reader stalls, then catches up
+        """
+        for policy in ("drop_oldest", "coalesce"):
+            console = melee.Console(dolphin_home_path=tempfile.mkdtemp(prefix='libmelee_') + "/",
+                                    tmp_home_directory=False)
+            controller = melee.Controller(console, 1, nonblocking=True, queue_size=4,
+                                          queue_policy=policy)
+            # Open the read end but don't read from it, so the pipe fills up
+            fd = os.open(console.get_dolphin_pipes_path(1), os.O_RDONLY | os.O_NONBLOCK)
+            self.assertTrue(controller.connect())
+            flushed = 0
+            while controller.dropped_frames + controller.coalesced_frames < 10:
+                if flushed % 2:
+                    controller.press_button(melee.Button.BUTTON_A)
+                else:
+                    controller.release_button(melee.Button.BUTTON_A)
+                controller.tilt_analog(melee.Button.BUTTON_MAIN, (flushed % 100) / 100, .5)
+                controller.flush()
+                flushed += 1
+                self.assertLessEqual(controller.queued_frames, 5)
+            last = controller.current.copy()
+            self.assertEqual(controller.dropped_frames > 0, policy == "drop_oldest")
+            self.assertEqual(controller.coalesced_frames > 0, policy == "coalesce")
+            self.assertFalse(controller.drain(timeout=0))
+
+            consumer = PipeConsumer(console.get_dolphin_pipes_path(1))
+            stats = PipeStats()
+            buffer = b""
+            while True:
+                drained = controller.drain(timeout=0)
+                if drained:
+                    controller.disconnect()
+                try:
+                    data = os.read(fd, 65536)
+                except BlockingIOError:
+                    continue
+                if not data and drained:
+                    break
+                buffer += data
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    consumer._handle(line.decode(), stats)
+            os.close(fd)
+
+            self.assertEqual(stats.invalid_commands, 0)
+            self.assertEqual(len(stats.flush_times),
+                             flushed - controller.dropped_frames - controller.coalesced_frames)
+            self.assertEqual(stats.state.buttons, last.buttons)
+            self.assertEqual(stats.state.main_x, last.main_x)
+            self.assertEqual(stats.state.main_y, last.main_y)
+
+    def test_schedule(self):
+        """
+        Scheduled inputs go out on their frame, and the latest one due wins after skipped frames
+        """
+        sequence = melee.techskill.multishine_sequence(count=2)
+        self.assertEqual(len(sequence), 14)
+        actions = sequence.actions
+        b_button = melee.controller.ACTION_BUTTONS.index(melee.Button.BUTTON_B)
+        y_button = melee.controller.ACTION_BUTTONS.index(melee.Button.BUTTON_Y)
+        self.assertEqual(np.flatnonzero(actions[:, b_button]).tolist(), [0, 7])
+        self.assertEqual(np.flatnonzero(actions[:, y_button]).tolist(), [4, 11])
+        self.assertEqual(actions[:, :len(melee.controller.ACTION_BUTTONS)].sum(), 4)
+
+        console = melee.Console(dolphin_home_path=tempfile.mkdtemp(prefix='libmelee_') + "/",
+                                tmp_home_directory=False)
+        controller = melee.Controller(console, 1)
+        controller.schedule(sequence, frame=100)
+        self.assertEqual(controller.scheduled_frames, 14)
+
+        controller.press_button(melee.Button.BUTTON_A)
+        console._frame = 99
+        controller.flush()
+        self.assertTrue(controller.prev.button[melee.Button.BUTTON_A])
+        console._frame = 100
+        controller.flush()
+        self.assertTrue(controller.prev.button[melee.Button.BUTTON_B])
+        self.assertFalse(controller.prev.button[melee.Button.BUTTON_A])
+        self.assertEqual(controller.prev.main_y, melee.controller.fix_analog_stick(0))
+        # Frames 101-103 got skipped, so only the jump on 104 goes out
+        console._frame = 104
+        controller.flush()
+        self.assertTrue(controller.prev.button[melee.Button.BUTTON_Y])
+        self.assertEqual(controller.prev.main_y, melee.controller.fix_analog_stick(.5))
+        self.assertEqual(controller.scheduled_frames, 9)
+
+        grab = melee.ControllerState()
+        grab.button[melee.Button.BUTTON_Z] = True
+        controller.schedule_states([107, 120], [grab, grab])
+        self.assertEqual(controller.scheduled_frames, 10)
+        console._frame = 107
+        controller.flush()
+        self.assertEqual(controller.prev, grab)
+
+        controller.clear_schedule()
+        self.assertEqual(controller.scheduled_frames, 0)
+        controller.release_all()
+        console._frame = 120
+        controller.flush()
+        self.assertEqual(controller.prev, melee.ControllerState())
+
+    def test_input_recording(self):
+        """
+        Record controller states to a file and schedule them back on a controller
+        """
+        path = tempfile.mkdtemp(prefix='libmelee_') + "/inputs.bin"
+        state = melee.ControllerState()
+        state.button[melee.Button.BUTTON_B] = True
+        state.main_stick = (.5, 0)
+        with InputRecorder(path, buffer_size=2) as recorder:
+            recorder.record(10, 1, state)
+            recorder.record(11, 1, melee.ControllerState())
+            recorder.record(10, 2, state)
+        self.assertEqual(recorder.records, 3)
+
+        player = InputPlayer(path)
+        self.assertEqual(player.ports, [1, 2])
+        self.assertEqual(player.records["frame"].tolist(), [10, 11, 10])
+
+        console = melee.Console(dolphin_home_path=tempfile.mkdtemp(prefix='libmelee_') + "/",
+                                tmp_home_directory=False)
+        controller = melee.Controller(console, 2)
+        player.play(controller)
+        self.assertEqual(controller.scheduled_frames, 1)
+        controller.clear_schedule()
+        player.play(controller, port=1, frame_offset=-10)
+        self.assertEqual(controller.scheduled_frames, 2)
+        controller.flush()
+        self.assertEqual(controller.prev, state)
+
+    def test_feature_vector(self):
+        """
+        Write gamestates into preallocated feature vectors
+        """
+        console = melee.Console(is_dolphin=False,
+                                path="test_artifacts/test_game_1.slp")
+        self.assertTrue(console.connect())
+        schema = FeatureSchema(ports=(1, 2), action_encoding="onehot", max_projectiles=2)
+        features = schema.empty()
+        self.assertEqual(len(schema.names), schema.size)
+        while True:
+            gamestate = console.step()
+            if gamestate is None:
+                break
+            self.assertIs(gamestate.to_array(schema, out=features), features)
+            if gamestate.frame == 297:
+                break
+        names = dict(zip(schema.names, features.tolist()))
+        self.assertEqual(names["p1_percent"], 17)
+        self.assertEqual(names["p2_action_" + melee.Action(27).name], 1)
+        self.assertEqual(sum(features[schema.player_offsets[2] + len(melee.features.PLAYER_FEATURES):][:schema.action_size]), 1)
+        self.assertEqual(gamestate.players[2].to_array()[-1], 27)
+
+    def test_state_options(self):
+        """
+        Lean state objects decode the same as the defaults
+        """
+        frames = {}
+        for lean_state in (False, True):
+            console = melee.Console(is_dolphin=False,
+                                    path="test_artifacts/test_game_1.slp",
+                                    lean_state=lean_state)
+            self.assertTrue(console.connect())
+            decoded = []
+            while True:
+                gamestate = console.step()
+                if gamestate is None:
+                    break
+                player = gamestate.players[2]
+                decoded.append((gamestate.frame, player.action, gamestate.players[1].percent,
+                                player.x, player.ecb_bottom, len(gamestate.projectiles)))
+                if gamestate.frame == 297:
+                    self.assertEqual(player.action.value, 27)
+            frames[lean_state] = decoded
+        self.assertEqual(frames[True], frames[False])
+        # Lean states don't even have room for the deprecated fields
+        def slots(cls):
+            return {name for klass in cls.__mro__ for name in getattr(klass, "__slots__", ())}
+        self.assertFalse({"x", "y", "ecb_top"} & slots(melee.gamestate.LeanPlayerState))
+        self.assertFalse({"x", "x_speed"} & slots(melee.gamestate.LeanProjectile))
+        self.assertIn("cursor_x", slots(melee.gamestate.LeanPlayerState))
+
+    def test_position_classes(self):
+        """
+        Position, Cursor and ECB are slotted dataclasses
+        """
+        position = melee.Position(np.float32(1.5), np.float32(-2))
+        self.assertEqual(position, melee.Position(1.5, -2))
+        self.assertNotEqual(position, melee.Position())
+        self.assertEqual(repr(melee.Position(1, 2)), "Position(x=1, y=2)")
+        self.assertEqual(dataclasses.replace(position, y=3), melee.Position(1.5, 3))
+        ecb = melee.ECB(top=melee.Position(0, 10))
+        self.assertEqual(ecb, melee.ECB(top=melee.Position(0, 10)))
+        self.assertIsNot(melee.ECB().bottom, melee.ECB().bottom)
+        self.assertEqual([field.name for field in dataclasses.fields(ecb)], ["top", "bottom", "left", "right"])
+        self.assertTrue(repr(ecb).startswith("ECB(top=Position(x=0, y=10), bottom=Position("))
+        self.assertIs(melee.gamestate.Cursor, melee.Position)
+        for value in (position, ecb, melee.PlayerState().cursor):
+            self.assertFalse(hasattr(value, "__dict__"))
+            with self.assertRaises(AttributeError):
+                value.z = 0
+
+    def test_lean_menu_cursors(self):
+        """
+        Lean states keep the character select cursor apart from the stage select cursor
+        """
+        css = bytearray(0x3D)
+        css[0x1:0x3] = (0x0002).to_bytes(2, "big")
+        for port in range(4):
+            css[0x3 + 8*port:0xB + 8*port] = np.array([port + .5, -port - .25], ">f4").tobytes()
+        sss = bytearray(0x3D)
+        sss[0x1:0x3] = (0x0102).to_bytes(2, "big")
+        sss[0x31:0x39] = np.array([12.5, -3.75], ">f4").tobytes()
+        cursors = {}
+        for lean_state in (False, True):
+            console = melee.Console(is_dolphin=False,
+                                    path="test_artifacts/test_game_1.slp",
+                                    lean_state=lean_state)
+            decoded = []
+            for event_bytes in (css, sss):
+                gamestate = melee.GameState()
+                console._Console__handle_slippstream_menu_event(bytes(event_bytes), gamestate)
+                for port, player in sorted(gamestate.players.items()):
+                    decoded.append((port, player.cursor_x, player.cursor_y,
+                                    player.cursor.x, player.cursor.y))
+                decoded.append((gamestate.stage_select_cursor_x, gamestate.stage_select_cursor_y))
+            cursors[lean_state] = decoded
+        self.assertEqual(cursors[True], cursors[False])
+        self.assertEqual(cursors[True][1], (2, 1.5, -1.25, 0, 0))
+        self.assertEqual(cursors[True][-2], (4, 0, 0, 12.5, -3.75))
+        self.assertEqual(cursors[True][-1], (12.5, -3.75))
+
+    def test_shared_state(self):
+        """
+        Publish gamestates to shared memory and read them back
+        """
+        console = melee.Console(is_dolphin=False,
+                                path="test_artifacts/test_game_1.slp",
+                                shared_state=True)
+        self.assertTrue(console.connect())
+        reader = SharedStateReader(console.shared_state.name)
+        try:
+            self.assertIsNone(reader.read())
+            while True:
+                gamestate = console.step()
+                if gamestate is None or gamestate.frame == 297:
+                    break
+            state = reader.read()
+            self.assertEqual(state["frame"], 297)
+            self.assertEqual(state["players"][1]["action"], 27)
+            self.assertEqual(state["players"][0]["percent"], 17)
+            self.assertEqual(state["players"][1]["x"], gamestate.players[2].position.x)
+            self.assertEqual(state["projectile_count"], len(gamestate.projectiles))
+            self.assertEqual(reader.view["frame"], 297)
+        finally:
+            reader.close()
+            console.stop()
+
+    def test_feature_history(self):
+        """
+        Keep a stack of the last few frames' feature vectors
+        """
+        console = melee.Console(is_dolphin=False,
+                                path="test_artifacts/test_game_1.slp",
+                                feature_history=4)
+        self.assertTrue(console.connect())
+        history = console.feature_history
+        gamestate = console.step()
+        self.assertEqual(history.stacked.shape, (4, history.schema.size))
+        self.assertEqual(history.stacked[:3].tolist(), np.zeros((3, history.schema.size)).tolist())
+        frames = [gamestate.frame]
+        for _ in range(5):
+            frames.append(console.step().frame)
+        self.assertEqual(history.stacked[:, 0].tolist(), frames[-4:])
+        self.assertEqual(history.latest[0], frames[-1])
+        self.assertTrue(np.shares_memory(history.stacked, history._buffer))
+
+    def test_pipeline(self):
+        """
+        Turn derived features off, and add custom ones
+        """
+        class Airborne(FeatureStage):
+            name = "airborne"
+            nana = True
+            def __init__(self):
+                self.players = 0
+            def process_player(self, player, prev_player, gamestate):
+                self.players += 1
+
+        console = melee.Console(is_dolphin=False,
+                                path="test_artifacts/test_game_1.slp")
+        self.assertTrue(console.connect())
+        airborne = Airborne()
+        console.pipeline.register(airborne, before="distance")
+        console.pipeline.disable("distance")
+        self.assertEqual(console.pipeline.names[-2:], ["airborne", "distance"])
+        self.assertFalse(console.pipeline.is_enabled("distance"))
+        with self.assertRaises(ValueError):
+            console.pipeline.register(Airborne())
+        players = 0
+        for _ in range(100):
+            gamestate = console.step()
+            self.assertEqual(gamestate.distance, 0)
+            players += sum(1 + (player.nana is not None) for player in gamestate.players.values())
+        self.assertEqual(airborne.players, players)
+        console.pipeline.enable("distance")
+        self.assertGreater(console.step().distance, 0)
+
+    def test_geometry(self):
+        """
+        All-pairs distances, and nearest opponents / teammates in a doubles game
+        """
+        gamestate = melee.GameState()
+        gamestate.is_teams = True
+        for port, x, team in ((1, 0, 0), (2, 10, 1), (3, -30, 0), (4, 50, 1)):
+            player = melee.PlayerState()
+            player.position.x, player.position.y = x, 0
+            player.team_id = team
+            player.facing = True
+            gamestate.players[port] = player
+        nana = melee.PlayerState()
+        nana.position.x, nana.position.y = 3, 4
+        nana.team_id = 1
+        gamestate.players[4].nana = nana
+
+        geometry = melee.Geometry(gamestate)
+        self.assertEqual(geometry.keys, [(1, False), (2, False), (3, False), (4, False), (4, True)])
+        self.assertEqual(geometry.distance[0, 4], 5)
+        self.assertEqual(geometry.dx[0, 2], -30)
+        self.assertEqual(geometry.facing[0].tolist(), [0, 1, -1, 1, 1])
+        self.assertEqual(gamestate.nearest_opponent(1), 4)
+        self.assertEqual(gamestate.nearest_teammate(1), 3)
+        self.assertEqual(gamestate.nearest_teammate(4), 2)
+        gamestate.is_teams = False
+        self.assertIsNone(melee.Geometry(gamestate).nearest(1, teammates=True))
+
+        console = melee.Console(is_dolphin=False,
+                                path="test_artifacts/test_game_1.slp")
+        self.assertTrue(console.connect())
+        self.assertFalse(console.pipeline.is_enabled("geometry"))
+        self.assertIsNone(console.step().geometry)
+        console.pipeline.enable("geometry")
+        for _ in range(200):
+            gamestate = console.step()
+        self.assertAlmostEqual(gamestate.geometry.distance[0, 1], gamestate.distance, places=3)
+        self.assertEqual(gamestate.nearest_opponent(2), 1)
+
     def test_framedata(self):
         """
         Test that frame and stage data retreive correctly
@@ -67,5 +605,161 @@ class SLPFile(unittest.TestCase):
         self.assertTrue(framedata.is_attack(melee.Character.FALCO, melee.Action.DAIR))
         self.assertFalse(framedata.is_attack(melee.Character.FALCO, melee.Action.STANDING))
 
+        summary = framedata.summary(melee.Character.FALCO, melee.Action.DAIR)
+        self.assertTrue(summary.is_attack)
+        self.assertLessEqual(summary.first_hitbox_frame, summary.last_hitbox_frame)
+        self.assertEqual(framedata.frame_count(melee.Character.FALCO, melee.Action.DAIR), summary.frame_count)
+        # Queries don't add empty entries to the frame data
+        self.assertIsNone(framedata._getframe(melee.Character.FALCO, melee.Action.DAIR, 1000))
+        self.assertIsNone(framedata._getframe(melee.Character.FALCO, melee.Action.UNKNOWN_ANIMATION, 1))
+        self.assertNotIn(1000, framedata.framedata[melee.Character.FALCO][melee.Action.DAIR])
+        self.assertNotIn(melee.Action.UNKNOWN_ANIMATION, framedata.framedata[melee.Character.FALCO])
+
+        # The compiled cache loads back the same columns, and FrameData survives pickling
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = directory + "/framedata.csv"
+            with open(melee.framedata.CSV_PATH, "rb") as source, open(csv_path, "wb") as copy:
+                copy.write(source.read())
+            cache_path = directory + "/framedata.npz"
+            user_cache_path = directory + "/user/framedata.npz"
+            def load():
+                return melee.framedata.load_framedata(csv_path, cache_path, user_cache_path)
+            columns = melee.framedata.compile_framedata(csv_path, cache_path)
+            loaded = load()
+            for name, column in columns.items():
+                self.assertEqual(column.tolist(), loaded[name].tolist())
+            # A touched but unchanged CSV still matches the cache, by its hash
+            os.utime(csv_path, ns=(0, 0))
+            self.assertEqual(load()["frame"].tolist(), columns["frame"].tolist())
+            self.assertFalse(os.path.exists(user_cache_path))
+            # A truncated (or empty) cache, such as from an interrupted write, isn't used.
+            #   The user cache gets (re)built instead, and the other one is left alone
+            for path, size in ((cache_path, 100), (user_cache_path, 0)):
+                with open(path, "r+b") as file:
+                    file.truncate(size)
+                loaded = load()
+                self.assertEqual(columns["action"].tolist(), loaded["action"].tolist())
+                self.assertGreater(os.path.getsize(user_cache_path), 100)
+            self.assertEqual(os.path.getsize(cache_path), 100)
+        # Dense arrays hold the same values as the nested dicts
+        frames = framedata.action_frames(melee.Character.FALCO, melee.Action.DAIR)
+        for row, action_frame in enumerate(frames.frame.tolist()):
+            frame = framedata.framedata[melee.Character.FALCO][melee.Action.DAIR].get(action_frame)
+            self.assertEqual(frames.present[row], frame is not None)
+            if frame is not None:
+                self.assertEqual(frames.hitbox_x[row].tolist(), [frame[f"hitbox_{i}_x"] for i in range(1, 5)])
+        self.assertEqual(len(framedata.action_frames(melee.Character.FALCO, melee.Action.DAIR, 3, 4)), 2)
+
+        # A defender standing right on the attacker's first hitbox gets hit by it
+        attacker, defender = melee.PlayerState(), melee.PlayerState()
+        frames = framedata.action_frames(melee.Character.FALCO, melee.Action.DAIR)
+        first = int(frames.frame[frames.hitbox_status[:, 0]][0])
+        attacker.character, attacker.action = melee.Character.FALCO, melee.Action.DAIR
+        attacker.action_frame = first - 1
+        attacker.on_ground, attacker.facing = True, True
+        defender.character = melee.Character.FOX
+        frames = framedata.action_frames(melee.Character.FALCO, melee.Action.DAIR, first, first)
+        size = framedata.characterdata[melee.Character.FOX]["size"]
+        defender.position.x = np.float32(frames.hitbox_x[0, 0] + frames.locomotion_x[0])
+        defender.position.y = np.float32(frames.hitbox_y[0, 0] + frames.locomotion_y[0] - size)
+        self.assertEqual(framedata.in_range(attacker, defender, melee.Stage.FINAL_DESTINATION), first)
+        # hitting_moves() agrees with in_range() for every attack started right now
+        hitting = framedata.hitting_moves(attacker, defender, melee.Stage.FINAL_DESTINATION, max_frames=1000)
+        self.assertIn(melee.Action.DAIR, [action for action, _, _ in hitting])
+        for action, frame, margin in hitting:
+            attacker.action, attacker.action_frame = action, 0
+            self.assertEqual(framedata.in_range(attacker, defender, melee.Stage.FINAL_DESTINATION), frame)
+            self.assertGreater(margin, 0)
+        only = framedata.hitting_moves(attacker, defender, melee.Stage.FINAL_DESTINATION, actions=[melee.Action.DAIR])
+        self.assertEqual([action for action, _, _ in only], [melee.Action.DAIR])
+        defender.position.x = np.float32(1000)
+        attacker.action, attacker.action_frame = melee.Action.DAIR, first - 1
+        self.assertEqual(framedata.in_range(attacker, defender, melee.Stage.FINAL_DESTINATION), 0)
+        self.assertEqual(framedata.hitting_moves(attacker, defender, melee.Stage.FINAL_DESTINATION), [])
+
+        # Action lookup tables, one at a time and in bulk
+        player = melee.PlayerState()
+        player.action = melee.Action.TUMBLING
+        self.assertTrue(framedata.is_actionable(player))
+        player.hitstun_frames_left = 5
+        self.assertFalse(framedata.is_actionable(player))
+        self.assertTrue(framedata.is_roll(melee.Character.MARTH, melee.Action.MARTH_COUNTER))
+        self.assertFalse(framedata.is_roll(melee.Character.FOX, melee.Action.MARTH_COUNTER))
+        self.assertFalse(framedata.is_bmove(melee.Character.FOX, melee.Action.UNKNOWN_ANIMATION))
+        actions = np.array([melee.Action.DEAD_UP.value, melee.Action.STANDING.value,
+                            melee.Action.SWORD_DANCE_3_MID.value, melee.Action.UNKNOWN_ANIMATION.value])
+        self.assertEqual(framedata.action_mask("is_dead", actions).tolist(), [True, False, False, False])
+        characters = np.array([melee.Character.BOWSER.value] * 2 + [melee.Character.FOX.value, melee.Character.BOWSER.value])
+        self.assertEqual(framedata.action_mask("is_grab", actions, characters).tolist(), [False, False, False, False])
+        characters[2] = melee.Character.BOWSER.value
+        self.assertEqual(framedata.action_mask("is_grab", actions, characters).tolist(), [False, False, True, False])
+        with self.assertRaises(ValueError):
+            framedata.action_mask("is_actionable", actions)
+
+        # Projecting many flights at once lands each one where projecting it alone does
+        gamestate = melee.GameState()
+        gamestate.stage = melee.Stage.BATTLEFIELD
+        flights = [(0, 60, 3, -2, -1), (-30, 40, 1, -3, 0), (80, 10, -2, 4, 1), (10, 5, 0, 0, -2)]
+        players = []
+        for position_x, position_y, speed_x, speed_y_attack, speed_y_self in flights:
+            player = melee.PlayerState()
+            player.character = melee.Character.FOX
+            player.position.x, player.position.y = np.float32(position_x), np.float32(position_y)
+            player.speed_x_attack, player.speed_y_attack = np.float32(speed_x), np.float32(speed_y_attack)
+            player.speed_y_self = np.float32(speed_y_self)
+            player.on_ground = False
+            players.append(player)
+        columns = [np.array(column, dtype=np.float32) for column in zip(*flights)]
+        end_x, end_y, end_frame = framedata.project_hit_locations(gamestate, melee.Character.FOX, *columns, frames=40)
+        for i, player in enumerate(players):
+            self.assertEqual(framedata.project_hit_location(gamestate, player, 40),
+                             (end_x[i], end_y[i], end_frame[i]))
+
+        # Jump and slide physics
+        player = melee.PlayerState()
+        player.character, player.jumps_left = melee.Character.JIGGLYPUFF, 5
+        first_jump = framedata.dj_height(player)
+        player.jumps_left = 1
+        self.assertGreater(first_jump, framedata.dj_height(player))
+        player.character = melee.Character.FOX
+        gravity = framedata.characterdata[melee.Character.FOX]["Gravity"]
+        speed = framedata.characterdata[melee.Character.FOX]["InitDJSpeed"]
+        self.assertEqual(framedata.frames_until_dj_apex(player), math.ceil(speed / gravity))
+        player.jumps_left, player.speed_y_self = 0, -1
+        self.assertEqual((framedata.dj_height(player), framedata.frames_until_dj_apex(player)), (0, 0))
+        self.assertEqual(framedata.slide_distance(player, -1.5, 30), -framedata.slide_distance(player, 1.5, 30))
+        friction = framedata.characterdata[melee.Character.FOX]["Friction"]
+        walkspeed = framedata.characterdata[melee.Character.FOX]["MaxWalkSpeed"]
+        for initspeed, frames in ((3, 10), (3, 200), (.5, 4), (0, 5)):
+            speed, distance = initspeed, 0
+            for _ in range(frames):
+                speed -= friction * 2 if speed > walkspeed else friction
+                if speed < 0:
+                    break
+                distance += speed
+            self.assertAlmostEqual(framedata.slide_distance(player, initspeed, frames), distance)
+
+        # Memoized physics
+        cache = framedata.enable_cache(maxsize=2)
+        attacker.action, attacker.action_frame = melee.Action.DAIR, first - 1
+        expected = framedata.in_range(attacker, defender, melee.Stage.FINAL_DESTINATION)
+        attacker.position.x += np.float32(0.0001)
+        self.assertEqual(framedata.in_range(attacker, defender, melee.Stage.FINAL_DESTINATION), expected)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        framedata.slide_distance(player, 1.5, 30)
+        framedata.slide_distance(player, 2.5, 30)
+        self.assertEqual(len(cache), 2)
+        cache.invalidate("slide_distance")
+        self.assertEqual(len(cache), 0)
+
+        copied = pickle.loads(pickle.dumps(framedata))
+        self.assertEqual(copied.iasa(melee.Character.FALCO, melee.Action.DAIR),
+                         framedata.iasa(melee.Character.FALCO, melee.Action.DAIR))
+        copied.slide_distance(player, 1.5, 30)
+        self.assertEqual(copied.cache.misses, cache.misses + 1)
+        framedata.disable_cache()
+        self.assertIsNone(framedata.cache)
+        self.assertNotIn("in_range", vars(framedata))
+
 if __name__ == '__main__':
     unittest.main()